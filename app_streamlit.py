@@ -11,14 +11,16 @@ if backend_path not in sys.path:
 
 try:
     from services.audio_service import AudioTranscriptionService
-    from nlp.summarizer import generate_notes
+    from nlp.summarizer import stream_notes
+    from nlp.generation import generate_study_materials
     BACKEND_AVAILABLE = True
 except ImportError as e:
     BACKEND_AVAILABLE = False
     st.warning(f"⚠️ Backend services not available: {e}")
     st.info("Running in limited mode. Some features may not work.")
     AudioTranscriptionService = None
-    generate_notes = None
+    stream_notes = None
+    generate_study_materials = None
 
 try:
     from dotenv import load_dotenv
@@ -241,7 +243,7 @@ with st.sidebar:
     st.markdown("**📝 Note Generation**")
     note_type = st.selectbox(
         "Note Format",
-        ["Summary Notes", "Flashcards", "Quiz Questions", "Bullet Points"],
+        ["Summary Notes", "Flashcards", "Quiz Questions", "Bullet Points", "All Study Materials"],
         help="Choose the type of notes you want"
     )
     
@@ -290,16 +292,20 @@ with col2:
                         # Transcribe with Whisper
                         st.info("🎵 Transcribing audio with Whisper...")
                         service = AudioTranscriptionService(model_name=model_size)
-                        transcript = service.transcribe_file(tmp_path)
+                        segments = service.transcribe_segments(tmp_path)
+                        transcript = " ".join(s["text"] for s in segments if s["text"])
                         
                         if not transcript or transcript.strip() == "":
                             st.error("❌ No speech detected in audio file")
                         else:
                             st.session_state.transcript = transcript
+                            st.session_state.segments = segments
                             st.success("✅ Transcription complete!")
                             
                             # Generate notes
                             st.info("📝 Generating study notes...")
+                            st.session_state.quiz_items = None
+                            st.session_state.flashcard_items = None
                             notes_prompt = f"""
 Based on the following transcript, generate {note_type.lower()} in {note_length} format.
 
@@ -309,7 +315,19 @@ Length: {note_length}
 Transcript:
 {transcript}
 """
-                            notes = generate_notes(notes_prompt)
+                            try:
+                                if note_type == "All Study Materials":
+                                    # Notes, quiz and flashcards from one summary, generated concurrently
+                                    materials = generate_study_materials(transcript) or {}
+                                    notes = materials.get("notes")
+                                    st.session_state.quiz_items = materials.get("quiz_items")
+                                    st.session_state.flashcard_items = materials.get("flashcard_items")
+                                else:
+                                    # Render tokens as they arrive instead of waiting for the full text
+                                    notes = st.write_stream(stream_notes(notes_prompt)) or None
+                            except Exception as e:
+                                st.error(f"❌ Note generation failed: {str(e)}")
+                                notes = None
                             
                             if notes:
                                 st.session_state.notes = notes
@@ -327,15 +345,28 @@ Transcript:
                 except Exception as e:
                     st.error(f"❌ Error: {str(e)}")
                     st.session_state.transcript = None
+                    st.session_state.segments = None
                     st.session_state.notes = None
 
 # Display results
 st.markdown("---")
 
+def format_timestamped_transcript(segments, separator="\n"):
+    """Render segments as "[mm:ss] text" lines."""
+    lines = []
+    for segment in segments:
+        minutes, seconds = divmod(int(segment["start"]), 60)
+        lines.append(f"[{minutes:02d}:{seconds:02d}] {segment['text']}")
+    return separator.join(lines)
+
 if "transcript" in st.session_state and st.session_state.transcript:
     st.markdown("### 📄 Transcript")
     with st.container():
-        st.markdown(f'<div class="transcript-box">{st.session_state.transcript}</div>', unsafe_allow_html=True)
+        if include_timestamps and st.session_state.get("segments"):
+            transcript_html = format_timestamped_transcript(st.session_state.segments, "<br>")
+        else:
+            transcript_html = st.session_state.transcript
+        st.markdown(f'<div class="transcript-box">{transcript_html}</div>', unsafe_allow_html=True)
     
     col1, col2, col3 = st.columns(3)
     with col1:
@@ -345,7 +376,9 @@ if "transcript" in st.session_state and st.session_state.transcript:
         if st.button("⬇️ Download Transcript", use_container_width=True):
             st.download_button(
                 label="Download as .txt",
-                data=st.session_state.transcript,
+                data=(format_timestamped_transcript(st.session_state.segments)
+                      if include_timestamps and st.session_state.get("segments")
+                      else st.session_state.transcript),
                 file_name=f"transcript_{uploaded_file.name.split('.')[0]}.txt",
                 mime="text/plain",
                 use_container_width=True
@@ -370,6 +403,23 @@ if "notes" in st.session_state and st.session_state.notes:
                 use_container_width=True
             )
 
+if st.session_state.get("quiz_items"):
+    st.markdown("### ❓ Quiz")
+    for i, item in enumerate(st.session_state.quiz_items, 1):
+        with st.expander(f"Q{i}. {item['question']}"):
+            for option in item["options"]:
+                st.markdown(option)
+            if item["correct_answer"]:
+                st.success(f"Correct answer: {item['correct_answer']}")
+            if item["explanation"]:
+                st.caption(item["explanation"])
+
+if st.session_state.get("flashcard_items"):
+    st.markdown("### 🗂️ Flashcards")
+    for card in st.session_state.flashcard_items:
+        with st.expander(card["question"]):
+            st.markdown(card["answer"])
+
 # Footer
 st.markdown("---")
 st.markdown("""
@@ -383,5 +433,11 @@ st.markdown("""
 # Initialize session state
 if "transcript" not in st.session_state:
     st.session_state.transcript = None
+if "segments" not in st.session_state:
+    st.session_state.segments = None
 if "notes" not in st.session_state:
     st.session_state.notes = None
+if "quiz_items" not in st.session_state:
+    st.session_state.quiz_items = None
+if "flashcard_items" not in st.session_state:
+    st.session_state.flashcard_items = None
@@ -1,19 +1,49 @@
-from fastapi import FastAPI, UploadFile, File, HTTPException
+from fastapi import FastAPI, Request, HTTPException, Header, Depends
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import JSONResponse, FileResponse
-import tempfile, os, uuid, logging
+from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
+from contextlib import asynccontextmanager
+from functools import partial
+import asyncio, hmac, os, uuid, logging, json
 
-# import heavy/optional modules lazily inside the request handler
+from config import config
+from services.job_service import JobStore, JobQueue, QueueFullError, JOB_COMPLETED, JOB_FAILED
+from services.transcription_pool import TranscriptionPool
+from services.upload_service import stream_audio_upload, UploadError
+from services.transcript_cache import TranscriptCache, transcript_cache_key
+from services.long_audio import transcribe_long_audio
+from nlp.llm_client import aclose_async_client
+from typing import Optional
+
+# import heavy/optional modules lazily inside the job handler
 
 logger = logging.getLogger("backend.app")
 logging.basicConfig(level=logging.INFO)
 
 print("🔥 NEW APP.PY LOADED 🔥")
 
+job_store = JobStore(ttl_seconds=config.JOB_RESULT_TTL)
+job_queue = JobQueue(job_store, workers=config.JOB_WORKERS, max_size=config.JOB_QUEUE_SIZE)
+transcription_pool = TranscriptionPool(workers=config.WHISPER_POOL_WORKERS, vad=config.VAD_ENABLED)
+transcript_cache = TranscriptCache(
+    config.TRANSCRIPT_CACHE_DIR, max_bytes=config.TRANSCRIPT_CACHE_MAX_MB * 1024 * 1024
+) if config.TRANSCRIPT_CACHE_ENABLED else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    transcription_pool.start()
+    await job_queue.start()
+    yield
+    await job_queue.stop()
+    await asyncio.to_thread(transcription_pool.shutdown)
+    await aclose_async_client()
+
+
 app = FastAPI(
     title="Voice Notes Processor",
     description="Convert speech to notes using AI Whisper",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Configure CORS properly
@@ -46,62 +76,197 @@ async def health():
     return JSONResponse({"status": "healthy", "message": "API is operational"})
 
 
-@app.post("/api/process", tags=["Processing"])
-async def process_audio(file: UploadFile = File(...)):
-    """Process audio file: transcribe and generate notes."""
-    job_id = str(uuid.uuid4())
-    tmp_path = None
-
+async def _run_processing_job(job, tmp_path: str, filename: str, audio_sha256: str) -> dict:
+    """Transcribe the uploaded audio and generate notes for a queued job."""
+    notes_task = None
     try:
         # Lazy imports to avoid heavy dependencies at startup
-        try:
-            from services.audio_service import AudioTranscriptionService
-            from nlp.summarizer import generate_notes
-        except ModuleNotFoundError as e:
-            logger.error(f"Missing dependency: {e}")
-            raise HTTPException(
-                status_code=500, 
-                detail=f"Server misconfiguration: {str(e)}. Please install required packages."
-            )
-        
-        # write upload to a temp file
-        with tempfile.NamedTemporaryFile(delete=False, suffix=".tmp") as tmp:
-            content = await file.read()
-            if not content:
-                raise HTTPException(status_code=400, detail="Empty file uploaded")
-            tmp.write(content)
-            tmp_path = tmp.name
-
-        logger.info(f"Processing file: {file.filename} (size: {len(content)} bytes)")
-
-        service = AudioTranscriptionService()
-        try:
-            logger.info("Starting transcription with Whisper...")
-            transcript = service.transcribe_file(tmp_path)
-        except Exception as e:
-            logger.exception("Transcription failed")
-            raise HTTPException(status_code=500, detail=f"Transcription error: {str(e)}")
+        from nlp.summarizer import astream_notes, astream_notes_pipelined
+        from nlp.cleaner import StreamingCleaner
+
+        # chunking and the decode length limit change the transcript too
+        decode_options = {
+            **transcription_pool.decode_options,
+            "long_audio": config.LONG_AUDIO_ENABLED and {
+                "chunk_length_ms": config.CHUNK_LENGTH_MS,
+                "overlap_ms": config.CHUNK_OVERLAP_MS,
+                "min_duration_s": config.LONG_AUDIO_MIN_SECONDS,
+            },
+            "max_duration_s": config.MAX_AUDIO_DURATION_SECONDS,
+        }
+        cache_key = transcript_cache_key(audio_sha256, transcription_pool.model_name, decode_options)
+        # disk I/O off the event loop
+        cached = await asyncio.to_thread(transcript_cache.get, cache_key) if transcript_cache else None
+        segments = None
+        cleaner = StreamingCleaner() if config.TRANSCRIPT_CLEANING_ENABLED else None
+        cleaned_segments = []
+        # segments for the pipelined note generator; None marks the end of the transcript
+        segment_queue = asyncio.Queue()
+
+        def emit_segments(new_segments, final=False):
+            if cleaner is not None:
+                # cleaned as chunks arrive, overlapping with transcription of the rest
+                new_segments = list(cleaner.clean_segments(new_segments, final=final))
+                cleaned_segments.extend(new_segments)
+                if not new_segments:
+                    return
+            for segment in new_segments:
+                segment_queue.put_nowait(segment)
+            job.emit("segments", {"segments": new_segments})
+
+        async def queued_segments():
+            while (segment := await segment_queue.get()) is not None:
+                yield segment
+
+        async def relay_notes(deltas):
+            # relay tokens to /notes/stream followers as they arrive
+            pieces = []
+            async for delta in deltas:
+                pieces.append(delta)
+                job.emit("notes", {"delta": delta})
+            return "".join(pieces).strip() or None
+
+        # map-step summarization of long lectures starts while Whisper is still decoding
+        notes_task = asyncio.create_task(
+            relay_notes(astream_notes_pipelined(queued_segments()))
+        ) if config.NOTES_PIPELINE_ENABLED else None
+
+        if cached is not None:
+            logger.info(f"[{job.job_id}] Using cached transcript for {filename}")
+            transcript, segments = cached["transcript"], cached["segments"]
+            emit_segments(segments)
+        else:
+            job.update("transcribing", 0.1)
+            logger.info(f"[{job.job_id}] Starting transcription with Whisper: {filename}")
+            try:
+                # chunked mode also lets segments stream out as each chunk finishes
+                if config.LONG_AUDIO_ENABLED:
+                    result = await transcribe_long_audio(
+                        transcription_pool,
+                        tmp_path,
+                        chunk_length_ms=config.CHUNK_LENGTH_MS,
+                        overlap_ms=config.CHUNK_OVERLAP_MS,
+                        min_duration_s=config.LONG_AUDIO_MIN_SECONDS,
+                        on_segments=emit_segments
+                    )
+                    transcript, segments = result["text"], result["segments"]
+                else:
+                    segments = await transcription_pool.transcribe_segments(tmp_path)
+                    transcript = " ".join(s["text"] for s in segments if s["text"])
+                    emit_segments(segments)
+            except Exception as e:
+                raise RuntimeError(f"Transcription error: {str(e)}") from e
 
         if not transcript or transcript.strip() == "":
-            raise HTTPException(status_code=400, detail="No speech detected in audio")
+            raise RuntimeError("No speech detected in audio")
 
-        logger.info(f"Transcription complete. Length: {len(transcript)} chars")
+        logger.info(f"[{job.job_id}] Transcription complete. Length: {len(transcript)} chars")
+        if transcript_cache and cached is None:
+            await asyncio.to_thread(transcript_cache.put, cache_key, transcript, segments)
+
+        if cleaner is not None:
+            emit_segments([], final=True)  # the cleaner holds back the last segment
+            segments = cleaned_segments
+            transcript = " ".join(s["text"] for s in segments)
+            if not any(ch.isalnum() for ch in transcript):  # may leave stray punctuation
+                raise RuntimeError("No speech detected in audio (only filler words)")
+        segment_queue.put_nowait(None)
 
         # Generate notes (optional, won't fail if Groq is unavailable)
+        job.update("generating_notes", 0.7)
         notes = None
         try:
-            logger.info("Generating notes with Groq...")
-            notes = generate_notes(transcript)
+            logger.info(f"[{job.job_id}] Generating notes with Groq...")
+            if notes_task is not None:
+                notes = await notes_task
+            else:
+                notes = await relay_notes(astream_notes(transcript))
             if notes:
-                logger.info(f"Notes generated. Length: {len(notes)} chars")
+                logger.info(f"[{job.job_id}] Notes generated. Length: {len(notes)} chars")
         except Exception as e:
-            logger.warning(f"Note generation skipped: {str(e)}")
+            logger.warning(f"[{job.job_id}] Note generation skipped: {str(e)}")
 
-        return JSONResponse({
+        return {
+            "transcript": transcript,
+            "segments": segments,
+            "notes": notes,
+            "cached": cached is not None
+        }
+
+    finally:
+        if notes_task is not None and not notes_task.done():
+            notes_task.cancel()  # transcription failed
+        if tmp_path and os.path.exists(tmp_path):
+            try:
+                os.remove(tmp_path)
+                logger.debug(f"Cleaned up temp file: {tmp_path}")
+            except Exception:
+                logger.warning(f"Failed to remove temp file: {tmp_path}")
+
+
+@app.post(
+    "/api/process",
+    tags=["Processing"],
+    status_code=202,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "multipart/form-data": {
+                    "schema": {
+                        "type": "object",
+                        "properties": {"file": {"type": "string", "format": "binary"}},
+                        "required": ["file"]
+                    }
+                }
+            }
+        }
+    }
+)
+async def process_audio(request: Request):
+    """Queue an audio file for transcription and note generation."""
+    job_id = str(uuid.uuid4())
+    upload = None
+
+    try:
+        # stream upload to a temp file, rejecting oversized/unsupported files early
+        try:
+            upload = await stream_audio_upload(
+                request,
+                max_bytes=config.MAX_UPLOAD_SIZE,
+                allowed_formats=config.ALLOWED_AUDIO_FORMATS,
+                max_duration_s=config.MAX_AUDIO_DURATION_SECONDS
+            )
+        except UploadError as e:
+            raise HTTPException(status_code=e.status_code, detail=str(e))
+
+        logger.info(
+            f"Queueing file: {upload.filename} "
+            f"(size: {upload.size} bytes, format: {upload.audio_format}, "
+            f"duration: {upload.duration or 0:.0f}s, job: {job_id})"
+        )
+
+        try:
+            job = job_queue.submit(
+                job_id, partial(
+                    _run_processing_job,
+                    tmp_path=upload.path,
+                    filename=upload.filename,
+                    audio_sha256=upload.sha256
+                )
+            )
+        except QueueFullError as e:
+            raise HTTPException(status_code=503, detail=f"Server busy: {str(e)}. Please retry later.")
+
+        upload = None  # temp file is owned by the job from here on
+        return JSONResponse(status_code=202, content={
             "success": True,
             "job_id": job_id,
-            "transcript": transcript,
-            "notes": notes
+            "status": job.status,
+            "status_url": f"/api/jobs/{job_id}",
+            "result_url": f"/api/jobs/{job_id}/result",
+            "transcript_stream_url": f"/api/jobs/{job_id}/transcript/stream",
+            "notes_stream_url": f"/api/jobs/{job_id}/notes/stream"
         })
 
     except HTTPException:
@@ -111,9 +276,138 @@ async def process_audio(file: UploadFile = File(...)):
         raise HTTPException(status_code=500, detail=f"Internal error: {str(e)}")
     
     finally:
-        if tmp_path and os.path.exists(tmp_path):
+        if upload is not None:
             try:
-                os.remove(tmp_path)
-                logger.debug(f"Cleaned up temp file: {tmp_path}")
+                upload.remove()
+                logger.debug(f"Cleaned up temp file: {upload.path}")
             except Exception:
-                logger.warning(f"Failed to remove temp file: {tmp_path}")
+                logger.warning(f"Failed to remove temp file: {upload.path}")
+
+
+def _get_job_or_404(job_id: str):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found or expired")
+    return job
+
+
+@app.get("/api/jobs/{job_id}", tags=["Processing"])
+async def get_job_status(job_id: str):
+    """Get status and progress of a processing job."""
+    job = _get_job_or_404(job_id)
+    return JSONResponse(job.to_status())
+
+
+@app.get("/api/jobs/{job_id}/result", tags=["Processing"])
+async def get_job_result(job_id: str):
+    """Get transcript and notes of a finished job."""
+    job = _get_job_or_404(job_id)
+    if job.status == JOB_FAILED:
+        raise HTTPException(status_code=500, detail=job.error or "Job failed")
+    if job.status != JOB_COMPLETED:
+        return JSONResponse(status_code=202, content=job.to_status())
+
+    return JSONResponse({
+        "success": True,
+        "job_id": job.job_id,
+        **job.result
+    })
+
+
+SSE_HEARTBEAT_SECONDS = 15
+
+
+async def _sse_events(job, event_types, final):
+    """
+    Format a job's event log as Server-Sent Events.
+
+    Replays matching events logged so far, then follows the job live. The
+    stream ends with a "done" event carrying ``final(job)`` or an "error" event.
+    """
+    async for event in job.follow(heartbeat=SSE_HEARTBEAT_SECONDS):
+        if event is None:
+            yield ": keep-alive\n\n"
+        elif event["event"] == "done":
+            yield f"event: done\ndata: {json.dumps(final(job))}\n\n"
+        elif event["event"] == "error" or event["event"] in event_types:
+            yield f"event: {event['event']}\ndata: {json.dumps(event['data'])}\n\n"
+
+
+def _sse_response(job, event_types, final) -> StreamingResponse:
+    return StreamingResponse(
+        _sse_events(job, event_types, final),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@app.get("/api/jobs/{job_id}/transcript/stream", tags=["Processing"])
+async def stream_job_transcript(job_id: str):
+    """Stream transcript segments as Server-Sent Events.
+
+    Emits ``segments`` events with ``{"segments": [{start, end, text, ...}]}`` in
+    timeline order as chunks finish, ``status`` progress events, and ends with
+    ``done`` (``{"transcript": full_text}``) or ``error``.
+    """
+    job = _get_job_or_404(job_id)
+    return _sse_response(
+        job, ("segments", "status"), lambda job: {"transcript": (job.result or {}).get("transcript")}
+    )
+
+
+@app.get("/api/jobs/{job_id}/notes/stream", tags=["Processing"])
+async def stream_job_notes(job_id: str):
+    """Stream generated notes as Server-Sent Events.
+
+    Emits ``notes`` events with ``{"delta": text}`` as tokens arrive, ``status``
+    progress events, and ends with ``done`` (``{"notes": full_text}``) or ``error``.
+    """
+    job = _get_job_or_404(job_id)
+    return _sse_response(
+        job, ("notes", "status"), lambda job: {"notes": (job.result or {}).get("notes")}
+    )
+
+
+def _require_admin(x_admin_token: Optional[str] = Header(None)):
+    """Check X-Admin-Token; admin endpoints are closed unless ADMIN_TOKEN is configured."""
+    if not config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin endpoints are disabled (ADMIN_TOKEN not set)")
+    if not x_admin_token or not hmac.compare_digest(x_admin_token, config.ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+
+
+def _get_transcript_cache_or_404():
+    if transcript_cache is None:
+        raise HTTPException(status_code=404, detail="Transcript cache is disabled")
+    return transcript_cache
+
+
+@app.get("/api/admin/transcript-cache", tags=["Admin"], dependencies=[Depends(_require_admin)])
+async def transcript_cache_stats():
+    """Transcript cache size and hit/miss counters."""
+    return JSONResponse(_get_transcript_cache_or_404().stats())
+
+
+@app.delete("/api/admin/transcript-cache", tags=["Admin"], dependencies=[Depends(_require_admin)])
+async def purge_transcript_cache(key: Optional[str] = None):
+    """Purge one transcript cache entry (by key) or the whole cache."""
+    cache = _get_transcript_cache_or_404()
+    if key:
+        if not cache.delete(key):
+            raise HTTPException(status_code=404, detail="Cache entry not found")
+        return JSONResponse({"success": True, "purged": 1})
+    return JSONResponse({"success": True, "purged": cache.purge()})
+
+
+@app.get("/api/metrics", tags=["Health"])
+async def metrics():
+    """Queue depths and cache hit rates (LLM cache includes tokens saved)."""
+    from nlp.summarizer import llm_cache
+    from nlp.llm_client import scheduler
+
+    return JSONResponse({
+        "jobs": {"queue_depth": job_queue.depth},
+        "llm_scheduler": scheduler.stats(),
+        "transcript_cache": transcript_cache.stats() if transcript_cache else None,
+        "llm_cache": llm_cache.stats() if llm_cache else None,
+    })
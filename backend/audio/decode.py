@@ -0,0 +1,201 @@
+"""
+Audio decoding to mono float32 PCM via an ffmpeg pipe
+
+Every consumer (VAD, chunk planning, Whisper workers, WAV export) works from
+one decode. ``decode_to_shared`` streams ffmpeg output into a memory-mapped
+file so worker processes can map the same samples without copying or
+decoding again.
+"""
+import os
+import subprocess
+import tempfile
+import wave
+import numpy as np
+from typing import Iterator, List, Optional, Tuple
+from config import config
+from utils.logger import logger
+
+READ_BLOCK_BYTES = 1024 * 1024  # ffmpeg stdout is consumed in 1 MB blocks
+FFMPEG_EXIT_TIMEOUT = 30  # seconds ffmpeg may take to exit once stdout is done
+MAX_STDERR_BYTES = 4096  # tail of ffmpeg's error output kept for the exception
+
+
+def _ffmpeg_pcm_command(file_path: str, sample_rate: int) -> List[str]:
+    # Header durations can be wrong (an MP3's is estimated from its first frame),
+    # so the decode itself stops at the duration limit
+    limit = ["-t", str(config.MAX_AUDIO_DURATION_SECONDS)] if config.MAX_AUDIO_DURATION_SECONDS else []
+    return [
+        "ffmpeg", "-nostdin", "-loglevel", "error", "-threads", "0", "-i", file_path, *limit,
+        "-f", "f32le", "-ac", "1", "-acodec", "pcm_f32le", "-ar", str(sample_rate), "-",
+    ]
+
+
+def _stream_pcm_bytes(file_path: str, sample_rate: int) -> Iterator[bytes]:
+    """
+    Yield raw little-endian float32 PCM from ffmpeg in fixed-size blocks.
+
+    ffmpeg's stderr goes to a temporary file rather than a pipe: a damaged file
+    can produce more error output than a pipe buffer holds, and ffmpeg would
+    block writing it while we block reading stdout.
+
+    Raises:
+        RuntimeError: If ffmpeg is missing, fails to decode the file or doesn't exit
+    """
+    stderr_file = tempfile.TemporaryFile()
+    try:
+        proc = subprocess.Popen(
+            _ffmpeg_pcm_command(file_path, sample_rate),
+            stdout=subprocess.PIPE, stderr=stderr_file,
+        )
+    except FileNotFoundError as e:
+        stderr_file.close()
+        raise RuntimeError("ffmpeg not found. Install: https://ffmpeg.org/download.html") from e
+
+    try:
+        while True:
+            block = proc.stdout.read(READ_BLOCK_BYTES)
+            if not block:
+                break
+            yield block
+    finally:
+        proc.stdout.close()
+        try:
+            returncode = proc.wait(timeout=FFMPEG_EXIT_TIMEOUT)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait()
+            returncode = None
+        stderr_file.seek(0, os.SEEK_END)
+        stderr_file.seek(max(0, stderr_file.tell() - MAX_STDERR_BYTES))
+        stderr = stderr_file.read()
+        stderr_file.close()
+    if returncode is None:
+        raise RuntimeError(f"ffmpeg did not exit within {FFMPEG_EXIT_TIMEOUT}s after decoding; killed it")
+    if returncode != 0:
+        raise RuntimeError(f"Failed to decode audio: {stderr.decode(errors='replace')}")
+
+
+def load_pcm(file_path: str, sample_rate: int = 16000) -> np.ndarray:
+    """
+    Decode any ffmpeg-readable file to mono float32 samples in [-1, 1].
+
+    Args:
+        file_path: Audio file path
+        sample_rate: Output sample rate (Whisper expects 16 kHz)
+
+    Returns:
+        1-D float32 array (writable, backed by the decode buffer)
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file
+    """
+    buffer = bytearray()
+    for block in _stream_pcm_bytes(file_path, sample_rate):
+        buffer += block
+    usable = len(buffer) - len(buffer) % 4
+    samples = np.frombuffer(buffer, dtype=np.float32, count=usable // 4)
+    logger.info(f"Decoded {file_path}: {len(samples) / sample_rate:.1f}s at {sample_rate} Hz")
+    return samples
+
+
+def _default_pcm_dir() -> str:
+    return os.getenv("PCM_DIR") or tempfile.gettempdir()
+
+
+class SharedPCM:
+    """
+    Handle to float32 PCM stored in a memory-mapped file.
+
+    Only the path and length are pickled, so handles are cheap to send to
+    worker processes; each process maps the file and the OS page cache
+    shares the pages between them.
+    """
+
+    def __init__(self, path: str, num_samples: int, sample_rate: int):
+        self.path = path
+        self.num_samples = num_samples
+        self.sample_rate = sample_rate
+
+    @property
+    def duration(self) -> float:
+        return self.num_samples / self.sample_rate
+
+    def array(self) -> np.ndarray:
+        """Map the samples. Copy-on-write, so consumers may modify their view."""
+        if self.num_samples == 0:
+            return np.zeros(0, dtype=np.float32)
+        return np.memmap(self.path, dtype=np.float32, mode="c", shape=(self.num_samples,))
+
+    def slice(self, start: int, end: int) -> np.ndarray:
+        return self.array()[start:end]
+
+    def remove(self):
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.remove()
+
+    @classmethod
+    def from_regions(
+        cls, samples: np.ndarray, regions: List[Tuple[int, int]], sample_rate: int,
+        directory: Optional[str] = None,
+    ) -> "SharedPCM":
+        """Write the given sample ranges back to back into a new shared buffer."""
+        fd, path = tempfile.mkstemp(suffix=".f32", dir=directory or _default_pcm_dir())
+        with os.fdopen(fd, "wb") as f:
+            for start, end in regions:
+                f.write(np.ascontiguousarray(samples[start:end], dtype=np.float32).tobytes())
+        num_samples = sum(end - start for start, end in regions)
+        return cls(path, num_samples, sample_rate)
+
+
+def decode_to_shared(file_path: str, sample_rate: int = 16000, directory: Optional[str] = None) -> SharedPCM:
+    """
+    Decode a file once into a memory-mapped float32 buffer.
+
+    ffmpeg output is written to disk block by block, so the decode never
+    holds the whole recording in process memory.
+
+    Args:
+        file_path: Audio file path
+        sample_rate: Output sample rate
+        directory: Where to place the buffer (PCM_DIR env or system temp dir)
+
+    Returns:
+        SharedPCM handle; call remove() (or use as a context manager) when done
+
+    Raises:
+        RuntimeError: If ffmpeg fails to decode the file
+    """
+    fd, path = tempfile.mkstemp(suffix=".f32", dir=directory or _default_pcm_dir())
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as f:
+            for block in _stream_pcm_bytes(file_path, sample_rate):
+                f.write(block)
+                size += len(block)
+    except Exception:
+        os.remove(path)
+        raise
+    pcm = SharedPCM(path, size // 4, sample_rate)
+    logger.info(f"Decoded {file_path}: {pcm.duration:.1f}s at {sample_rate} Hz -> {path}")
+    return pcm
+
+
+def write_wav(output_path: str, samples: np.ndarray, sample_rate: int) -> str:
+    """
+    Write mono float samples as 16-bit PCM WAV.
+    """
+    pcm16 = (np.clip(samples, -1.0, 1.0) * 32767).astype("<i2")
+    with wave.open(output_path, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(sample_rate)
+        wav.writeframes(pcm16.tobytes())
+    return output_path
@@ -0,0 +1,34 @@
+"""
+Audio container detection from magic bytes
+"""
+from typing import Optional
+
+# Number of leading bytes needed to recognise every supported container
+SNIFF_BYTES = 12
+
+
+def detect_audio_format(header: bytes) -> Optional[str]:
+    """
+    Detect audio container format from the first bytes of a file.
+    
+    Args:
+        header: Leading bytes of the file (at least SNIFF_BYTES for a reliable result)
+    
+    Returns:
+        File extension such as ".wav" or ".mp3", or None if unrecognised
+    """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return ".wav"
+    if header[:4] == b"fLaC":
+        return ".flac"
+    if header[:4] == b"OggS":
+        return ".ogg"
+    if header[4:8] == b"ftyp":
+        return ".m4a"
+    if header[:3] == b"ID3":
+        return ".mp3"
+    # Bare MPEG audio frame: 11-bit sync word and a non-reserved layer
+    # (layer bits 00 would be an AAC ADTS stream)
+    if len(header) >= 2 and header[0] == 0xFF and (header[1] & 0xE0) == 0xE0 and (header[1] & 0x06) != 0:
+        return ".mp3"
+    return None
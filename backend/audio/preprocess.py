@@ -2,7 +2,11 @@ from pydub import AudioSegment
 from pydub.effects import normalize
 from typing import List
 import os
+import numpy as np
 from config import config
+from audio.decode import load_pcm, write_wav
+from audio.segmentation import plan_chunks
+from audio.vad import detect_speech
 from utils.logger import logger
 
 def normalize_audio(audio: AudioSegment) -> AudioSegment:
@@ -11,14 +15,24 @@ def normalize_audio(audio: AudioSegment) -> AudioSegment:
     """
     return normalize(audio)
 
-def split_audio(audio: AudioSegment, chunk_length_ms: int = 30000) -> List[AudioSegment]:
+def split_audio(audio: AudioSegment, chunk_length_ms: int = 30000, at_silence: bool = False) -> List[AudioSegment]:
     """
     Split audio into chunks
+    
+    With ``at_silence`` the cuts are moved to the quietest point near each
+    ``chunk_length_ms`` boundary instead of falling mid-word.
     """
-    chunks = []
-    for i in range(0, len(audio), chunk_length_ms):
-        chunk = audio[i:i + chunk_length_ms]
-        chunks.append(chunk)
+    if at_silence:
+        mono = audio.set_channels(1)
+        samples = np.array(mono.get_array_of_samples())
+        ranges = plan_chunks(samples, mono.frame_rate, chunk_length_ms, overlap_ms=0)
+        chunks = [audio[start * 1000 // mono.frame_rate:end * 1000 // mono.frame_rate]
+                  for start, end in ranges]
+    else:
+        chunks = []
+        for i in range(0, len(audio), chunk_length_ms):
+            chunk = audio[i:i + chunk_length_ms]
+            chunks.append(chunk)
     logger.info(f"Split audio into {len(chunks)} chunks")
     return chunks
 
@@ -29,20 +43,16 @@ def preprocess_audio(input_path: str, output_path: str) -> str:
     try:
         logger.info(f"Preprocessing audio: {input_path}")
         
-        # Load audio
-        audio = AudioSegment.from_file(input_path)
-        
-        # Normalize
-        audio = normalize_audio(audio)
+        # Decode once to mono at 16kHz (optimal for Whisper)
+        samples = load_pcm(input_path, config.SAMPLE_RATE)
         
-        # Convert to mono
-        audio = audio.set_channels(1)
-        
-        # Set sample rate to 16kHz (optimal for Whisper)
-        audio = audio.set_frame_rate(config.SAMPLE_RATE)
+        # Normalize peak to -0.1 dBFS (same headroom as pydub's normalize)
+        peak = float(np.max(np.abs(samples))) if len(samples) else 0.0
+        if peak > 0:
+            samples *= 10 ** (-0.1 / 20) / peak
         
         # Export
-        audio.export(output_path, format="wav")
+        write_wav(output_path, samples, config.SAMPLE_RATE)
         
         logger.info(f"Preprocessed audio saved: {output_path}")
         return output_path
@@ -54,14 +64,24 @@ def preprocess_audio(input_path: str, output_path: str) -> str:
 def remove_silence(audio: AudioSegment, silence_thresh: int = -40) -> AudioSegment:
     """
     Remove silence from audio
+    
+    Pauses of 1 second or more below ``silence_thresh`` dBFS are cut,
+    keeping 500ms of silence around speech.
     """
-    from pydub.silence import split_on_silence
+    mono = audio.set_channels(1)
+    samples = np.array(mono.get_array_of_samples(), dtype=np.float32)
+    samples /= float(1 << (8 * mono.sample_width - 1))
     
-    chunks = split_on_silence(
-        audio,
-        min_silence_len=1000,  # 1 second
-        silence_thresh=silence_thresh,
-        keep_silence=500  # Keep 500ms of silence
+    speech = detect_speech(
+        samples,
+        mono.frame_rate,
+        threshold_db=silence_thresh,
+        min_silence_ms=1000,  # 1 second
+        pad_ms=500  # Keep 500ms of silence
     )
+    if not speech.regions:
+        return audio
     
-    return sum(chunks) if chunks else audio
\ No newline at end of file
+    raw = np.frombuffer(audio.raw_data, dtype=np.uint8).reshape(-1, audio.frame_width)
+    kept = np.concatenate([raw[start:end] for start, end in speech.regions])
+    return audio._spawn(kept.tobytes())
@@ -0,0 +1,293 @@
+"""
+Header-only audio probing
+
+Reads just the container headers (and for Ogg the last page) to get duration,
+channels and sample rate, so multi-hour files are probed in milliseconds
+without decoding. Unknown layouts fall back to ffprobe.
+"""
+import json
+import os
+import struct
+import subprocess
+from typing import BinaryIO, Optional
+from audio.formats import SNIFF_BYTES, detect_audio_format
+from utils.logger import logger
+
+# Largest moov atom we are willing to read when probing MP4/M4A
+MAX_MOOV_BYTES = 64 * 1024 * 1024
+
+_MP3_BITRATES = {  # kbps, index 1..14, keyed by (MPEG-1?, layer)
+    (True, 1): [32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448],
+    (True, 2): [32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384],
+    (True, 3): [32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320],
+    (False, 1): [32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256],
+    (False, 2): [8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+    (False, 3): [8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160],
+}
+_MP3_SAMPLE_RATES = {3: [44100, 48000, 32000], 2: [22050, 24000, 16000], 0: [11025, 12000, 8000]}
+
+
+class AudioProbeError(ValueError):
+    """Raised when a file's headers can't be parsed."""
+
+
+def _info(fmt: str, duration: float, channels: int, sample_rate: int, sample_width: Optional[int] = None) -> dict:
+    return {
+        "format": fmt,
+        "duration_seconds": duration,
+        "channels": channels,
+        "sample_rate": sample_rate,
+        "sample_width": sample_width,
+    }
+
+
+def _probe_wav(f: BinaryIO, file_size: int) -> dict:
+    f.seek(12)
+    fmt = None
+    while True:
+        header = f.read(8)
+        if len(header) < 8:
+            raise AudioProbeError("WAV data chunk not found")
+        chunk_id, chunk_size = struct.unpack("<4sI", header)
+        if chunk_id == b"fmt ":
+            fmt = struct.unpack("<HHIIHH", f.read(16))
+            f.seek(chunk_size - 16 + (chunk_size & 1), os.SEEK_CUR)
+        elif chunk_id == b"data":
+            if fmt is None:
+                raise AudioProbeError("WAV fmt chunk missing")
+            _, channels, sample_rate, byte_rate, _, bits = fmt
+            if chunk_size in (0, 0xFFFFFFFF):  # streamed WAV without a final size
+                chunk_size = file_size - f.tell()
+            duration = chunk_size / byte_rate if byte_rate else 0.0
+            return _info("wav", duration, channels, sample_rate, bits // 8)
+        else:
+            f.seek(chunk_size + (chunk_size & 1), os.SEEK_CUR)
+
+
+def _probe_flac(f: BinaryIO, file_size: int) -> dict:
+    f.seek(4)
+    block_header = f.read(4)
+    if len(block_header) < 4 or block_header[0] & 0x7F != 0:
+        raise AudioProbeError("FLAC STREAMINFO block missing")
+    info = f.read(34)
+    packed = int.from_bytes(info[10:18], "big")
+    sample_rate = packed >> 44
+    channels = ((packed >> 41) & 0x7) + 1
+    bits = ((packed >> 36) & 0x1F) + 1
+    total_samples = packed & 0xFFFFFFFFF
+    duration = total_samples / sample_rate if sample_rate else 0.0
+    return _info("flac", duration, channels, sample_rate, (bits + 7) // 8)
+
+
+def _probe_mp3(f: BinaryIO, file_size: int) -> dict:
+    f.seek(0)
+    start = 0
+    head = f.read(10)
+    if head[:3] == b"ID3":
+        size = (head[6] << 21) | (head[7] << 14) | (head[8] << 7) | head[9]
+        start = 10 + size + (10 if head[5] & 0x10 else 0)
+
+    # Find the first frame sync after the tag
+    f.seek(start)
+    window = f.read(64 * 1024)
+    for i in range(len(window) - 4):
+        b1, b2, b3 = window[i + 1], window[i + 2], window[i + 3]
+        if window[i] != 0xFF or b1 & 0xE0 != 0xE0:
+            continue
+        version, layer_bits = (b1 >> 3) & 0x3, (b1 >> 1) & 0x3
+        bitrate_index, rate_index = b2 >> 4, (b2 >> 2) & 0x3
+        if version == 1 or layer_bits == 0 or bitrate_index in (0, 15) or rate_index == 3:
+            continue
+        break
+    else:
+        raise AudioProbeError("No MP3 frame found")
+
+    mpeg1 = version == 3
+    layer = 4 - layer_bits
+    sample_rate = _MP3_SAMPLE_RATES[version][rate_index]
+    bitrate = _MP3_BITRATES[(mpeg1, layer)][bitrate_index - 1] * 1000
+    channels = 1 if (b3 >> 6) == 3 else 2
+    samples_per_frame = 384 if layer == 1 else (1152 if mpeg1 or layer == 2 else 576)
+    frame_start = start + i
+
+    # VBR files carry the frame count in a Xing/Info or VBRI header
+    side_info = (32 if channels == 2 else 17) if mpeg1 else (17 if channels == 2 else 9)
+    xing = window[i + 4 + side_info:i + 4 + side_info + 12]
+    frames = None
+    if xing[:4] in (b"Xing", b"Info") and struct.unpack(">I", xing[4:8])[0] & 0x1:
+        frames = struct.unpack(">I", xing[8:12])[0]
+    elif window[i + 36:i + 40] == b"VBRI":
+        frames = struct.unpack(">I", window[i + 50:i + 54])[0]
+
+    if frames:
+        duration = frames * samples_per_frame / sample_rate
+    else:
+        duration = (file_size - frame_start) * 8 / bitrate
+    return _info("mp3", duration, channels, sample_rate)
+
+
+def _probe_ogg(f: BinaryIO, file_size: int) -> dict:
+    f.seek(0)
+    first_page = f.read(27 + 255)
+    segments = first_page[26]
+    packet = first_page[27 + segments:] + f.read(64)
+    if packet[:7] == b"\x01vorbis":
+        channels = packet[11]
+        sample_rate = struct.unpack("<I", packet[12:16])[0]
+        granule_rate, pre_skip, fmt = sample_rate, 0, "ogg"
+    elif packet[:8] == b"OpusHead":
+        channels = packet[9]
+        pre_skip = struct.unpack("<H", packet[10:12])[0]
+        sample_rate = struct.unpack("<I", packet[12:16])[0] or 48000
+        granule_rate, fmt = 48000, "opus"  # Opus granule positions are always 48 kHz
+    else:
+        raise AudioProbeError("Unsupported Ogg codec")
+
+    # Duration = granule position of the last page
+    tail_size = min(file_size, 64 * 1024)
+    f.seek(file_size - tail_size)
+    tail = f.read(tail_size)
+    last = tail.rfind(b"OggS")
+    if last < 0 or last + 14 > len(tail):
+        raise AudioProbeError("Last Ogg page not found")
+    granule = struct.unpack("<q", tail[last + 6:last + 14])[0]
+    duration = max(0, granule - pre_skip) / granule_rate
+    return _info(fmt, duration, channels, sample_rate)
+
+
+def _iter_atoms(data: bytes, offset: int = 0, end: Optional[int] = None):
+    end = len(data) if end is None else end
+    while offset + 8 <= end:
+        size, kind = struct.unpack(">I4s", data[offset:offset + 8])
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", data[offset + 8:offset + 16])[0]
+            header = 16
+        elif size == 0:
+            size = end - offset
+        if size < header:
+            return
+        yield kind, offset + header, offset + size
+        offset += size
+
+
+def _find_atom(data: bytes, path, offset: int = 0, end: Optional[int] = None):
+    for kind, body, atom_end in _iter_atoms(data, offset, end):
+        if kind == path[0]:
+            if len(path) == 1:
+                return body, atom_end
+            return _find_atom(data, path[1:], body, atom_end)
+    return None
+
+
+def _probe_mp4(f: BinaryIO, file_size: int) -> dict:
+    # Walk top-level atoms by seeking; moov may sit at the end of the file
+    offset = 0
+    moov = None
+    while offset + 8 <= file_size:
+        f.seek(offset)
+        size, kind = struct.unpack(">I4s", f.read(8))
+        header = 8
+        if size == 1:
+            size = struct.unpack(">Q", f.read(8))[0]
+            header = 16
+        elif size == 0:
+            size = file_size - offset
+        if size < header:
+            break
+        if kind == b"moov":
+            if size > MAX_MOOV_BYTES:
+                raise AudioProbeError("moov atom too large")
+            moov = f.read(size - header)
+            break
+        offset += size
+    if moov is None:
+        raise AudioProbeError("moov atom not found")
+
+    mvhd = _find_atom(moov, [b"mvhd"])
+    if mvhd is None:
+        raise AudioProbeError("mvhd atom not found")
+    body = mvhd[0]
+    if moov[body] == 1:  # version 1: 64-bit times
+        timescale, duration = struct.unpack(">IQ", moov[body + 20:body + 32])
+    else:
+        timescale, duration = struct.unpack(">II", moov[body + 12:body + 20])
+
+    channels = sample_rate = None
+    for kind, trak, trak_end in _iter_atoms(moov):
+        if kind != b"trak":
+            continue
+        stsd = _find_atom(moov, [b"mdia", b"minf", b"stbl", b"stsd"], trak, trak_end)
+        if stsd is None:
+            continue
+        entry = stsd[0] + 8  # skip version/flags + entry count
+        entry_kind = moov[entry + 4:entry + 8]
+        if entry_kind in (b"mp4a", b"alac", b"Opus", b"fLaC", b"ac-3", b"ec-3"):
+            # AudioSampleEntry: 8-byte header, 6 reserved, 2 dref index, 8 reserved
+            channels = struct.unpack(">H", moov[entry + 24:entry + 26])[0]
+            sample_rate = struct.unpack(">I", moov[entry + 32:entry + 36])[0] >> 16
+            break
+
+    return _info("m4a", duration / timescale if timescale else 0.0, channels, sample_rate)
+
+
+_PARSERS = {
+    ".wav": _probe_wav,
+    ".flac": _probe_flac,
+    ".mp3": _probe_mp3,
+    ".ogg": _probe_ogg,
+    ".m4a": _probe_mp4,
+}
+
+
+def _probe_ffprobe(file_path: str) -> dict:
+    cmd = [
+        "ffprobe", "-v", "error", "-select_streams", "a:0",
+        "-show_entries", "format=duration,format_name:stream=channels,sample_rate",
+        "-of", "json", file_path,
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True, timeout=30).stdout
+    except FileNotFoundError as e:
+        raise AudioProbeError("ffprobe not found") from e
+    except (subprocess.CalledProcessError, subprocess.TimeoutExpired) as e:
+        raise AudioProbeError(f"ffprobe failed: {e}") from e
+    data = json.loads(out)
+    stream = (data.get("streams") or [{}])[0]
+    fmt = data.get("format", {})
+    return _info(
+        fmt.get("format_name", "unknown").split(",")[0],
+        float(fmt.get("duration", 0.0)),
+        stream.get("channels"),
+        int(stream["sample_rate"]) if stream.get("sample_rate") else None,
+    )
+
+
+def probe_audio(file_path: str) -> dict:
+    """
+    Read duration and stream parameters from the file headers.
+
+    Args:
+        file_path: Audio file path
+
+    Returns:
+        Dict with format, duration_seconds, channels, sample_rate,
+        sample_width (None when not stored in the header) and file_size_mb
+
+    Raises:
+        AudioProbeError: If neither the header parsers nor ffprobe can read it
+    """
+    file_size = os.path.getsize(file_path)
+    with open(file_path, "rb") as f:
+        audio_format = detect_audio_format(f.read(SNIFF_BYTES))
+        parser = _PARSERS.get(audio_format)
+        info = None
+        if parser is not None:
+            try:
+                info = parser(f, file_size)
+            except (AudioProbeError, struct.error, IndexError, KeyError, ZeroDivisionError) as e:
+                logger.debug(f"Header probe failed for {file_path} ({e}), trying ffprobe")
+    if info is None:
+        info = _probe_ffprobe(file_path)
+    info["file_size_mb"] = file_size / (1024 * 1024)
+    return info
@@ -0,0 +1,85 @@
+"""
+Silence-aware planning of audio chunk boundaries (NumPy)
+"""
+import numpy as np
+from typing import List, Tuple
+
+# Frames converted and summed at a time by frame_rms
+RMS_BLOCK_FRAMES = 8192
+
+
+def frame_rms(samples: np.ndarray, frame_length: int) -> np.ndarray:
+    """
+    Root-mean-square energy of consecutive non-overlapping frames.
+    
+    Args:
+        samples: Mono PCM samples
+        frame_length: Samples per frame
+    
+    Returns:
+        Array with one RMS value per full frame
+    """
+    n_frames = len(samples) // frame_length
+    if n_frames == 0:
+        return np.zeros(0, dtype=np.float32)
+    frames = samples[:n_frames * frame_length].reshape(n_frames, frame_length)
+    rms = np.empty(n_frames, dtype=np.float32)
+    # Block-wise, so a memory-mapped recording is never copied whole
+    for start in range(0, n_frames, RMS_BLOCK_FRAMES):
+        block = frames[start:start + RMS_BLOCK_FRAMES].astype(np.float32, copy=False)
+        rms[start:start + len(block)] = np.einsum("ij,ij->i", block, block)
+    return np.sqrt(rms / frame_length)
+
+
+def plan_chunks(
+    samples: np.ndarray,
+    sample_rate: int,
+    chunk_length_ms: int = 30000,
+    overlap_ms: int = 1000,
+    search_ms: int = 5000,
+    frame_ms: int = 20,
+) -> List[Tuple[int, int]]:
+    """
+    Plan chunk boundaries that fall on the quietest point near each nominal cut.
+    
+    Each cut is placed at the lowest-energy frame within ``search_ms`` of the
+    nominal ``chunk_length_ms`` boundary, so words are rarely split. Every
+    chunk after the first starts ``overlap_ms`` before its cut point so the
+    decoder has some context; callers de-duplicate the overlap afterwards.
+    
+    Args:
+        samples: Mono PCM samples
+        sample_rate: Sample rate of ``samples``
+        chunk_length_ms: Target chunk length
+        overlap_ms: Audio shared with the previous chunk
+        search_ms: How far from the nominal boundary to look for silence
+        frame_ms: Energy frame size
+    
+    Returns:
+        List of (start, end) sample indices; ``end`` of chunk i is the cut
+        point where chunk i+1's own (non-overlapping) audio begins
+    """
+    total = len(samples)
+    chunk_len = int(sample_rate * chunk_length_ms / 1000)
+    search_len = int(sample_rate * search_ms / 1000)
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    overlap_len = int(sample_rate * overlap_ms / 1000)
+
+    cuts = [0]
+    while total - cuts[-1] > chunk_len + search_len:
+        nominal = cuts[-1] + chunk_len
+        lo = max(cuts[-1] + frame_len, nominal - search_len)
+        hi = min(total, nominal + search_len)
+        energy = frame_rms(samples[lo:hi], frame_len)
+        if len(energy) == 0:
+            cut = nominal
+        else:
+            # Among the quietest frames, prefer the one closest to the nominal cut
+            quiet = np.flatnonzero(energy <= energy.min() + 1e-6)
+            centers = lo + quiet * frame_len + frame_len // 2
+            cut = int(centers[np.argmin(np.abs(centers - nominal))])
+        cuts.append(cut)
+    cuts.append(total)
+
+    return [(max(0, start - overlap_len) if i else 0, end)
+            for i, (start, end) in enumerate(zip(cuts[:-1], cuts[1:]))]
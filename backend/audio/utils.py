@@ -1,20 +1,23 @@
-from pydub import AudioSegment
 import os
-from typing import Tuple
+from typing import Optional, Tuple
+from config import config
 from utils.logger import logger
+from audio.decode import load_pcm, write_wav
+from audio.formats import SNIFF_BYTES, detect_audio_format
+from audio.probe import AudioProbeError, probe_audio
 
 def get_audio_info(file_path: str) -> dict:
     """
-    Get audio file metadata
+    Get audio file metadata from the container headers (no decoding)
     """
     try:
-        audio = AudioSegment.from_file(file_path)
+        info = probe_audio(file_path)
         return {
-            "duration_seconds": len(audio) / 1000,
-            "channels": audio.channels,
-            "sample_rate": audio.frame_rate,
-            "sample_width": audio.sample_width,
-            "file_size_mb": os.path.getsize(file_path) / (1024 * 1024)
+            "duration_seconds": info["duration_seconds"],
+            "channels": info["channels"],
+            "sample_rate": info["sample_rate"],
+            "sample_width": info["sample_width"],
+            "file_size_mb": info["file_size_mb"]
         }
     except Exception as e:
         logger.error(f"Error getting audio info: {e}")
@@ -25,19 +28,19 @@ def convert_to_wav(input_path: str, output_path: str) -> str:
     Convert audio to WAV format for Whisper
     """
     try:
-        audio = AudioSegment.from_file(input_path)
-        audio = audio.set_channels(1)  # Mono
-        audio = audio.set_frame_rate(16000)  # 16kHz
-        audio.export(output_path, format="wav")
+        samples = load_pcm(input_path, 16000)  # Mono, 16kHz
+        write_wav(output_path, samples, 16000)
         logger.info(f"Converted audio to WAV: {output_path}")
         return output_path
     except Exception as e:
         logger.error(f"Error converting audio: {e}")
         raise
 
-def validate_audio_file(file_path: str, max_size_mb: int = 100) -> Tuple[bool, str]:
+def validate_audio_file(
+    file_path: str, max_size_mb: int = 100, max_duration_s: Optional[float] = None
+) -> Tuple[bool, str]:
     """
-    Validate audio file
+    Validate audio file by size, content (magic bytes) and header duration
     """
     if not os.path.exists(file_path):
         return False, "File does not exist"
@@ -46,9 +49,17 @@ def validate_audio_file(file_path: str, max_size_mb: int = 100) -> Tuple[bool, s
     if file_size_mb > max_size_mb:
         return False, f"File too large: {file_size_mb:.2f}MB (max: {max_size_mb}MB)"
     
-    ext = os.path.splitext(file_path)[1].lower()
-    allowed_formats = [".mp3", ".wav", ".m4a", ".ogg", ".flac"]
-    if ext not in allowed_formats:
-        return False, f"Unsupported format: {ext}"
+    with open(file_path, "rb") as f:
+        audio_format = detect_audio_format(f.read(SNIFF_BYTES))
+    if audio_format not in config.ALLOWED_AUDIO_FORMATS:
+        return False, f"Unsupported format: {audio_format or 'unknown'}"
+    
+    if max_duration_s:
+        try:
+            duration = probe_audio(file_path)["duration_seconds"]
+        except AudioProbeError as e:
+            return False, f"Unreadable audio headers: {e}"
+        if duration > max_duration_s:
+            return False, f"Audio too long: {duration:.0f}s (max: {max_duration_s:.0f}s)"
     
     return True, "Valid"
\ No newline at end of file
@@ -0,0 +1,126 @@
+"""
+Energy-based voice activity detection (NumPy)
+
+Finds speech regions so only those are sent to Whisper, and maps timestamps
+from the compacted (speech-only) audio back onto the original timeline.
+"""
+import numpy as np
+from typing import List, Tuple
+from audio.segmentation import frame_rms
+
+
+def _runs(mask: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Start (inclusive) and end (exclusive) indices of True runs in a boolean array."""
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+class SpeechMap:
+    """
+    Speech regions of a recording plus the mapping between the original and
+    the compacted timeline (speech regions concatenated back to back).
+    """
+
+    def __init__(self, regions: List[Tuple[int, int]], sample_rate: int, total_samples: int):
+        self.regions = regions
+        self.sample_rate = sample_rate
+        self.total_samples = total_samples
+        lengths = np.array([end - start for start, end in regions], dtype=np.int64)
+        self._orig_starts = np.array([start for start, _ in regions], dtype=np.int64)
+        self._compact_starts = np.concatenate(([0], np.cumsum(lengths)[:-1])) if regions else np.zeros(0, np.int64)
+        self.speech_samples = int(lengths.sum())
+
+    @property
+    def speech_ratio(self) -> float:
+        return self.speech_samples / self.total_samples if self.total_samples else 0.0
+
+    def compact(self, samples: np.ndarray) -> np.ndarray:
+        """Concatenate the speech regions of ``samples``."""
+        if not self.regions:
+            return samples[:0]
+        return np.concatenate([samples[start:end] for start, end in self.regions])
+
+    def to_original(self, seconds):
+        """Map time(s) on the compacted timeline to the original timeline."""
+        if not self.regions:
+            return seconds
+        pos = np.asarray(seconds, dtype=np.float64) * self.sample_rate
+        idx = np.clip(np.searchsorted(self._compact_starts, pos, side="right") - 1, 0, None)
+        original = (self._orig_starts[idx] + (pos - self._compact_starts[idx])) / self.sample_rate
+        return original if original.ndim else float(original)
+
+    def remap_segments(self, segments: List[dict]) -> List[dict]:
+        """Return copies of segments with start/end on the original timeline."""
+        if not segments:
+            return []
+        starts = self.to_original([s["start"] for s in segments])
+        ends = self.to_original([s["end"] for s in segments])
+        return [
+            dict(segment, start=round(float(start), 3), end=round(float(end), 3))
+            for segment, start, end in zip(segments, starts, ends)
+        ]
+
+
+def detect_speech(
+    samples: np.ndarray,
+    sample_rate: int,
+    frame_ms: int = 30,
+    threshold_db: float = None,
+    margin_db: float = 12.0,
+    min_speech_ms: int = 250,
+    min_silence_ms: int = 1000,
+    pad_ms: int = 300,
+) -> SpeechMap:
+    """
+    Detect speech regions from frame energy.
+
+    Args:
+        samples: Mono float samples in [-1, 1]
+        sample_rate: Sample rate of ``samples``
+        frame_ms: Analysis frame size
+        threshold_db: Absolute speech threshold in dBFS; by default it adapts
+            to the recording as noise floor (10th percentile) + ``margin_db``
+        margin_db: Margin above the noise floor for the adaptive threshold
+        min_speech_ms: Shorter bursts of energy are ignored
+        min_silence_ms: Shorter pauses are kept as part of the speech
+        pad_ms: Audio kept on each side of a speech region
+
+    Returns:
+        SpeechMap with the detected regions (sample indices)
+    """
+    total = len(samples)
+    frame_len = max(1, int(sample_rate * frame_ms / 1000))
+    db = 20 * np.log10(frame_rms(samples, frame_len) + 1e-10)
+    if len(db) == 0:
+        return SpeechMap([(0, total)] if total else [], sample_rate, total)
+
+    if threshold_db is None:
+        floor, peak = np.percentile(db, [10, 95])
+        if peak - floor < margin_db:
+            # No clear silence/speech contrast: don't risk cutting speech
+            return SpeechMap([(0, total)], sample_rate, total)
+        threshold_db = max(floor + margin_db, -60.0)
+    speech = db > threshold_db
+
+    # Fill short pauses, then drop short blips
+    starts, ends = _runs(~speech)
+    fill = ((ends - starts) * frame_ms < min_silence_ms) & (starts > 0) & (ends < len(speech))
+    delta = np.zeros(len(speech) + 1, dtype=np.int32)
+    np.add.at(delta, starts[fill], 1)
+    np.add.at(delta, ends[fill], -1)
+    speech |= np.cumsum(delta[:-1]) > 0
+    starts, ends = _runs(speech)
+    keep = (ends - starts) * frame_ms >= min_speech_ms
+    starts, ends = starts[keep], ends[keep]
+
+    # Frames -> padded sample ranges, merging regions that now touch
+    pad = int(sample_rate * pad_ms / 1000)
+    sample_starts = np.maximum(starts * frame_len - pad, 0)
+    sample_ends = np.minimum(ends * frame_len + pad, total)
+    regions: List[Tuple[int, int]] = []
+    for start, end in zip(sample_starts.tolist(), sample_ends.tolist()):
+        if regions and start <= regions[-1][1]:
+            regions[-1] = (regions[-1][0], max(regions[-1][1], end))
+        else:
+            regions.append((start, end))
+    return SpeechMap(regions, sample_rate, total)
@@ -0,0 +1,57 @@
+"""
+Benchmark: re-cleaning and re-chunking an archive one transcript at a time vs chunk_many.
+
+Usage (from backend/):
+    python benchmarks/bench_batch.py                              # 2000 synthetic 10-minute transcripts
+    python benchmarks/bench_batch.py --transcripts 20000 --workers 1 4 8 --batch-size 32
+"""
+import argparse
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from bench_cleaner import synthetic_transcript
+from nlp.batch import BATCH_SIZE, chunk_many
+from nlp.chunker import chunk_by_tokens
+from nlp.cleaner import clean_transcript
+
+
+def archive(count: int, minutes: int):
+    """Lazily generated transcripts, as if read from disk one by one."""
+    for i in range(count):
+        yield synthetic_transcript(minutes, seed=i)
+
+
+def main(args):
+    logging.disable(logging.INFO)
+    print(f"Archive: {args.transcripts} transcripts of {args.minutes} minutes")
+
+    started = time.perf_counter()
+    expected = [chunk_by_tokens(clean_transcript(text), args.max_tokens, args.overlap)
+                for text in archive(args.transcripts, args.minutes)]
+    sequential = time.perf_counter() - started
+    print(f"{'sequential':>12}: {sequential:7.2f} s")
+
+    for workers in args.workers:
+        started = time.perf_counter()
+        results = list(chunk_many(archive(args.transcripts, args.minutes), args.max_tokens, args.overlap,
+                                  clean=True, workers=workers, batch_size=args.batch_size))
+        elapsed = time.perf_counter() - started
+        print(f"{f'{workers} workers':>12}: {elapsed:7.2f} s ({sequential / elapsed:4.1f}x), "
+              f"identical output: {results == expected}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--transcripts", type=int, default=2000)
+    parser.add_argument("--minutes", type=int, default=10, help="Length of each synthetic transcript")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, os.cpu_count() or 1])
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument("--overlap", type=int, default=200)
+    main(parser.parse_args())
@@ -0,0 +1,126 @@
+"""
+Benchmark: token-array chunker vs the previous per-sentence implementation.
+
+Usage (from backend/):
+    python benchmarks/bench_chunker.py                    # synthetic 3-hour transcript
+    python benchmarks/bench_chunker.py transcript.txt --max-tokens 4000
+"""
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+import tiktoken
+from nlp.chunker import chunk_by_tokens, count_tokens
+
+WORDS_PER_MINUTE = 150
+VOCABULARY = (
+    "so today we are going to look at the gradient of the loss function and why "
+    "it converges when the learning rate is small enough which is the key idea "
+    "behind stochastic optimisation in practice"
+).split()
+
+
+def synthetic_transcript(minutes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words_left = minutes * WORDS_PER_MINUTE
+    sentences = []
+    while words_left > 0:
+        n = min(rng.randint(6, 30), words_left)
+        words_left -= n
+        sentences.append(" ".join(rng.choice(VOCABULARY) for _ in range(n)).capitalize() + ".")
+    return " ".join(sentences)
+
+
+# -- previous implementation, kept verbatim for comparison -----------------
+
+def legacy_count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
+    try:
+        encoding = tiktoken.encoding_for_model(model)
+        return len(encoding.encode(text))
+    except Exception:
+        return len(text) // 4
+
+
+def legacy_chunk_by_tokens(text: str, max_tokens: int = 2000, overlap: int = 200):
+    sentences = text.split('. ')
+    chunks = []
+    current_chunk = []
+    current_tokens = 0
+    for sentence in sentences:
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        if not sentence.endswith('.'):
+            sentence += '.'
+        sentence_tokens = legacy_count_tokens(sentence)
+        if sentence_tokens > max_tokens:
+            if current_chunk:
+                chunks.append(' '.join(current_chunk))
+                overlap_buffer = current_chunk[-int(len(current_chunk) * overlap/max_tokens):]
+                current_chunk = overlap_buffer.copy()
+                current_tokens = legacy_count_tokens(' '.join(current_chunk))
+            word_chunk = []
+            word_tokens = 0
+            for word in sentence.split():
+                word_token_count = legacy_count_tokens(word)
+                if word_tokens + word_token_count > max_tokens and word_chunk:
+                    chunks.append(' '.join(word_chunk))
+                    word_chunk = [word]
+                    word_tokens = word_token_count
+                else:
+                    word_chunk.append(word)
+                    word_tokens += word_token_count
+            if word_chunk:
+                chunks.append(' '.join(word_chunk))
+            continue
+        if current_tokens + sentence_tokens > max_tokens and current_chunk:
+            chunks.append(' '.join(current_chunk))
+            overlap_buffer = current_chunk[-int(len(current_chunk) * overlap/max_tokens):]
+            current_chunk = overlap_buffer + [sentence]
+            current_tokens = legacy_count_tokens(' '.join(current_chunk))
+        else:
+            current_chunk.append(sentence)
+            current_tokens += sentence_tokens
+    if current_chunk:
+        chunks.append(' '.join(current_chunk))
+    return chunks
+
+# --------------------------------------------------------------------------
+
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(args):
+    if args.transcript:
+        text = Path(args.transcript).read_text(encoding="utf-8")
+    else:
+        text = synthetic_transcript(args.minutes)
+    print(f"Transcript: {len(text.split())} words, {count_tokens(text)} tokens")
+
+    for name, fn in (("legacy", legacy_chunk_by_tokens), ("token-array", chunk_by_tokens)):
+        elapsed, chunks = best_of(lambda: fn(text, args.max_tokens, args.overlap), args.repeat)
+        sizes = [count_tokens(c) for c in chunks]
+        print(f"{name:>12}: {elapsed * 1000:8.1f} ms, {len(chunks)} chunks, "
+              f"max {max(sizes)} tokens (limit {args.max_tokens})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("transcript", nargs="?", help="Text file (default: synthetic lecture)")
+    parser.add_argument("--minutes", type=int, default=180, help="Length of the synthetic lecture")
+    parser.add_argument("--max-tokens", type=int, default=2000)
+    parser.add_argument("--overlap", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,140 @@
+"""
+Benchmark: compiled CleaningPipeline vs the previous per-rule cleaner, in MB/s.
+
+Usage (from backend/):
+    python benchmarks/bench_cleaner.py                    # synthetic 3-hour transcript
+    python benchmarks/bench_cleaner.py transcript.txt --repeat 5
+"""
+import argparse
+import logging
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from nlp.cleaner import CleaningPipeline
+
+WORDS_PER_MINUTE = 150
+VOCABULARY = (
+    "so today we are going to um look at the the gradient of the loss function and uh why "
+    "it converges you know when the learning rate is like small enough which is basically "
+    "the key idea behind sort of stochastic optimisation in practice right okay sooo"
+).split()
+
+
+def synthetic_transcript(minutes: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    words_left = minutes * WORDS_PER_MINUTE
+    sentences = []
+    while words_left > 0:
+        n = min(rng.randint(6, 30), words_left)
+        words_left -= n
+        words = " ".join(rng.choice(VOCABULARY) for _ in range(n))
+        sentences.append(words + rng.choice([".", ". ", " ...", "?", " !", ","]))
+    return " ".join(sentences)
+
+
+# -- previous implementation, kept verbatim for comparison -----------------
+
+LEGACY_FILLER_WORDS = [
+    "um", "uh", "er", "ah", "like", "you know", "basically", "actually",
+    "literally", "sort of", "kind of", "i mean", "right", "okay", "so",
+    "well", "you see", "i think", "i guess", "at least", "don't you know",
+    "furthermore", "moreover", "in addition"
+]
+
+
+def legacy_remove_filler_words(text: str) -> str:
+    cleaned = text
+    for filler in LEGACY_FILLER_WORDS:
+        pattern = r'\b' + re.escape(filler) + r'\b'
+        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    return cleaned
+
+
+def legacy_fix_punctuation(text: str) -> str:
+    text = re.sub(r'\s+([.,!?;:])', r'\1', text)
+    text = re.sub(r'([.,!?;:])([A-Za-z])', r'\1 \2', text)
+    text = re.sub(r'\.{2,}', '.', text)
+    sentences = re.split(r'([.!?])\s*', text)
+    result = []
+    capitalize_next = True
+    for i, part in enumerate(sentences):
+        if part in ['.', '!', '?']:
+            result.append(part + ' ')
+            capitalize_next = True
+        elif part.strip():
+            if capitalize_next and part:
+                part = part[0].upper() + part[1:] if len(part) > 0 else part
+                capitalize_next = False
+            result.append(part)
+    return ''.join(result).strip()
+
+
+def legacy_normalize_text(text: str) -> str:
+    text = re.sub(r'[^\w\s\-.,!?;:\'"()]', '', text, flags=re.UNICODE)
+    text = re.sub(r'\s+', ' ', text)
+    return text.strip()
+
+
+def legacy_remove_repetitions(text: str) -> str:
+    words = text.split()
+    cleaned_words = []
+    prev_word = None
+    for word in words:
+        if word.lower() != prev_word:
+            cleaned_words.append(word)
+        prev_word = word.lower()
+    return ' '.join(cleaned_words)
+
+
+def legacy_clean_transcript(text: str) -> str:
+    text = legacy_normalize_text(text)
+    text = legacy_remove_filler_words(text)
+    text = legacy_fix_punctuation(text)
+    text = re.sub(r'([a-z])\1{2,}', r'\1', text, flags=re.IGNORECASE)
+    text = legacy_remove_repetitions(text)
+    text = re.sub(r'\s+', ' ', text).strip()
+    return text
+
+# --------------------------------------------------------------------------
+
+
+def best_of(fn, repeat: int):
+    best, result = float("inf"), None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn()
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main(args):
+    logging.disable(logging.INFO)
+    if args.transcript:
+        text = Path(args.transcript).read_text(encoding="utf-8")
+    else:
+        text = synthetic_transcript(args.minutes)
+    megabytes = len(text.encode("utf-8")) / 1e6
+    print(f"Transcript: {len(text.split())} words, {megabytes:.2f} MB")
+
+    pipeline = CleaningPipeline()
+    results = {}
+    for name, fn in (("legacy", legacy_clean_transcript), ("pipeline", pipeline.clean)):
+        elapsed, results[name] = best_of(lambda: fn(text), args.repeat)
+        print(f"{name:>10}: {elapsed * 1000:8.1f} ms, {megabytes / elapsed:6.2f} MB/s, "
+              f"{len(results[name])} chars out")
+    print(f"Identical output: {results['legacy'] == results['pipeline']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("transcript", nargs="?", help="Text file (default: synthetic lecture)")
+    parser.add_argument("--minutes", type=int, default=180, help="Length of the synthetic lecture")
+    parser.add_argument("--repeat", type=int, default=3)
+    main(parser.parse_args())
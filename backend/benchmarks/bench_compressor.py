@@ -0,0 +1,114 @@
+"""
+Benchmark: extractive pre-compression, token reduction and end-to-end note latency.
+
+Notes are generated against the fake LLM server with and without compression;
+the server's per-token delay stands in for a real model's prompt processing.
+
+Usage (from backend/):
+    python benchmarks/bench_compressor.py                     # synthetic 60-minute lecture
+    python benchmarks/bench_compressor.py transcript.txt --budget 4000 --ms-per-1k-tokens 300
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fake_llm_server import start_fake_server
+
+WORDS_PER_MINUTE = 150
+TOPICS = [
+    "gradient descent updates the weights in the direction that reduces the loss",
+    "the learning rate controls how large each update step is",
+    "a learning rate that is too large makes the loss diverge",
+    "stochastic gradient descent estimates the gradient from a mini batch",
+    "momentum averages past gradients to smooth the updates",
+    "regularization penalizes large weights to reduce overfitting",
+    "the validation set is used to choose hyperparameters",
+    "early stopping halts training when the validation loss stops improving",
+    "batch normalization rescales activations inside the network",
+    "the chain rule lets backpropagation compute every gradient in one pass",
+]
+RESTATEMENTS = ["So again, {}.", "In other words, {}.", "Remember that {}.", "As I said, {}.",
+                "The key point is that {}.", "Basically {}.", "{}."]
+ASIDES = ["Okay, let's move on.", "Any questions so far?", "Can everyone see the slide?",
+          "Let me write that down.", "We will come back to this later.", "Right, so where was I."]
+
+
+def synthetic_lecture(minutes: int, seed: int = 0) -> str:
+    """Lecture-like text: each topic stated, then restated with asides in between."""
+    rng = random.Random(seed)
+    words_left = minutes * WORDS_PER_MINUTE
+    sentences = []
+    while words_left > 0:
+        if rng.random() < 0.25:
+            sentence = rng.choice(ASIDES)
+        else:
+            sentence = rng.choice(RESTATEMENTS).format(rng.choice(TOPICS))
+            sentence = sentence[0].upper() + sentence[1:]
+        sentences.append(sentence)
+        words_left -= len(sentence.split())
+    return " ".join(sentences)
+
+
+def time_notes(label: str, server, transcript: str, method: str, repeat: int):
+    from config import config
+    from nlp.summarizer import generate_notes
+
+    config.NOTES_COMPRESSION_METHOD = method
+    elapsed = float("inf")
+    for _ in range(repeat):
+        requests, tokens = server.requests, server.prompt_tokens
+        started = time.perf_counter()
+        generate_notes(transcript)
+        elapsed = min(elapsed, time.perf_counter() - started)
+        requests, tokens = server.requests - requests, server.prompt_tokens - tokens
+    print(f"{label:>14}: {elapsed * 1000:8.1f} ms end to end, {requests} LLM calls, ~{tokens} prompt tokens")
+
+
+def main(args):
+    # Measure the LLM path itself: no response cache, no rate limiting
+    os.environ.update(LLM_CACHE_ENABLED="false", LLM_REQUESTS_PER_MINUTE="0", LLM_TOKENS_PER_MINUTE="0")
+    server = start_fake_server(latency_ms=args.latency_ms, ms_per_1k_tokens=args.ms_per_1k_tokens)
+    from config import config
+    config.GROQ_BASE_URL, config.GROQ_API_KEY = server.url, "test"
+    config.NOTES_COMPRESSION_TOKENS = args.budget
+
+    from nlp.chunker import count_tokens
+    from nlp.cleaner import clean_transcript
+    from nlp.compressor import compress_transcript
+
+    transcript = Path(args.file).read_text(encoding="utf-8") if args.file else synthetic_lecture(args.minutes)
+    cleaned = clean_transcript(transcript)
+    print(f"Transcript: {count_tokens(transcript)} tokens ({count_tokens(cleaned)} after cleaning), "
+          f"budget {args.budget}")
+
+    for method in ("tfidf", "textrank"):
+        started = time.perf_counter()
+        _, stats = compress_transcript(cleaned, args.budget, method)
+        elapsed = time.perf_counter() - started
+        reduction = 1 - stats["tokens_out"] / max(1, stats["tokens_in"])
+        print(f"{method:>14}: {elapsed * 1000:8.1f} ms, kept {stats['kept']}/{stats['sentences']} sentences, "
+              f"{stats['tokens_in']} -> {stats['tokens_out']} tokens ({reduction:.0%} fewer)")
+
+    try:
+        time_notes("uncompressed", server, transcript, "", args.repeat)
+        for method in ("tfidf", "textrank"):
+            time_notes(method, server, transcript, method, args.repeat)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("file", nargs="?", help="Transcript text file (default: synthetic lecture)")
+    parser.add_argument("--minutes", type=int, default=60, help="Length of the synthetic lecture")
+    parser.add_argument("--budget", type=int, default=6000, help="NOTES_COMPRESSION_TOKENS")
+    parser.add_argument("--latency-ms", type=float, default=200, help="Fixed fake LLM latency per call")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=150, help="Fake LLM delay per 1k prompt tokens")
+    parser.add_argument("--repeat", type=int, default=1, help="Best of N runs per mode")
+    main(parser.parse_args())
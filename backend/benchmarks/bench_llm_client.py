@@ -0,0 +1,87 @@
+"""
+Benchmark: pooled LLM client vs a new Groq client per call, against the fake server.
+
+Usage (from backend/):
+    python benchmarks/bench_llm_client.py --calls 50 --concurrency 8 --latency-ms 50
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from fake_llm_server import start_fake_server
+
+
+def stats(server) -> tuple:
+    return server.connections, server.requests
+
+
+def per_call_clients(base_url: str, calls: int):
+    from groq import Groq
+    for _ in range(calls):
+        client = Groq(api_key="test", base_url=base_url)  # previous behaviour
+        client.chat.completions.create(
+            model="fake", messages=[{"role": "user", "content": "hello"}], max_tokens=8
+        )
+        client.close()
+
+
+def pooled_sync(calls: int):
+    from nlp.llm_client import complete
+    for _ in range(calls):
+        complete("hello", max_tokens=8)
+
+
+async def pooled_async(calls: int, concurrency: int):
+    from nlp.llm_client import acomplete, aclose_async_client
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await acomplete("hello", max_tokens=8)
+
+    try:
+        await asyncio.gather(*[one() for _ in range(calls)])
+    finally:
+        await aclose_async_client()
+
+
+def run(name: str, server, fn, repeat: int):
+    elapsed = float("inf")
+    for _ in range(repeat):
+        before = stats(server)
+        started = time.perf_counter()
+        fn()
+        elapsed = min(elapsed, time.perf_counter() - started)
+        connections, requests = (a - b for a, b in zip(stats(server), before))
+    print(f"{name:>22}: {elapsed * 1000:8.1f} ms, {requests} requests over {connections} connections")
+
+
+def main(args):
+    server = start_fake_server(latency_ms=args.latency_ms)
+    os.environ["GROQ_BASE_URL"] = server.url
+    os.environ.setdefault("GROQ_API_KEY", "test")
+    from config import config
+    config.GROQ_BASE_URL, config.GROQ_API_KEY = server.url, os.environ["GROQ_API_KEY"]
+
+    try:
+        run("new client per call", server, lambda: per_call_clients(server.url, args.calls), args.repeat)
+        run("pooled sync", server, lambda: pooled_sync(args.calls), args.repeat)
+        run(f"pooled async (x{args.concurrency})", server,
+            lambda: asyncio.run(pooled_async(args.calls, args.concurrency)), args.repeat)
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--calls", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs per mode")
+    main(parser.parse_args())
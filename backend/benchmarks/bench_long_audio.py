@@ -0,0 +1,61 @@
+"""
+Benchmark: serial vs parallel chunked transcription of a long recording.
+
+Usage (from backend/):
+    python benchmarks/bench_long_audio.py lecture.mp3 --workers 8 --model tiny
+"""
+import argparse
+import asyncio
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from config import config
+from audio.decode import load_pcm
+from services.long_audio import SAMPLE_RATE, transcribe_long_audio
+from services.transcription_pool import TranscriptionPool
+
+
+async def _warm_up(pool: TranscriptionPool):
+    # Load the model in every worker so model loading isn't timed
+    silence = np.zeros(SAMPLE_RATE, dtype=np.float32)
+    await asyncio.gather(*[pool.transcribe_samples(silence) for _ in range(pool.workers)])
+
+
+async def main(args):
+    samples = load_pcm(args.audio, SAMPLE_RATE)
+    duration = len(samples) / SAMPLE_RATE
+    print(f"Audio: {args.audio} ({duration / 60:.1f} min)")
+
+    serial_pool = TranscriptionPool(workers=1, model_name=args.model)
+    await _warm_up(serial_pool)
+    started = time.perf_counter()
+    serial_segments = await serial_pool.transcribe_samples(samples)
+    serial_time = time.perf_counter() - started
+    serial_pool.shutdown()
+    print(f"Serial:   {serial_time:8.1f}s  ({len(serial_segments)} segments)")
+
+    parallel_pool = TranscriptionPool(workers=args.workers, model_name=args.model)
+    await _warm_up(parallel_pool)
+    result = await transcribe_long_audio(
+        parallel_pool, args.audio,
+        chunk_length_ms=args.chunk_ms, overlap_ms=config.CHUNK_OVERLAP_MS
+    )
+    parallel_pool.shutdown()
+    print(f"Parallel: {result['elapsed']:8.1f}s  ({len(result['segments'])} segments, "
+          f"{result['chunks']} chunks, {args.workers} workers, includes decode)")
+    print(f"Speedup:  {serial_time / result['elapsed']:8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("audio")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--chunk-ms", type=int, default=config.CHUNK_LENGTH_MS)
+    asyncio.run(main(parser.parse_args()))
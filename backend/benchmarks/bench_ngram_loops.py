@@ -0,0 +1,129 @@
+"""
+Benchmark: n-gram loop collapse on pathological inputs, and tokens saved on lectures.
+
+Pathological inputs are 1M-word texts made of hallucination-style loops (a
+phrase repeated hundreds of times), loops of every length up to the limit,
+and loop-free text (the worst case for the scan, since nothing shrinks).
+
+Usage (from backend/):
+    python benchmarks/bench_ngram_loops.py                          # synthetic inputs
+    python benchmarks/bench_ngram_loops.py lecture1.txt lecture2.txt --max-words 40
+"""
+import argparse
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from nlp.chunker import count_tokens
+from nlp.cleaner import LOOP_MAX_WORDS, LOOP_MIN_REPEATS, CleaningPipeline, clean_transcript, collapse_loops
+
+VOCABULARY = [f"w{i}" for i in range(5000)]
+# (input, expected) with the default limits; checked before timing
+REGRESSIONS = [
+    ("Thank you. Thank you. Thank you. Bye", "Thank you. Bye"),
+    ("No, no, no.", "No, no, no."),
+    # Collapsing "b d" joins the "e d" copies into a new loop
+    ("h e b d b d b d b d b d b d e d e d e d", "h e b d e d"),
+]
+HALLUCINATIONS = ["Thank you.", "Thanks for watching!", "Please subscribe to the channel.",
+                  "and then we and then we", "So the next slide shows the gradient of the loss."]
+
+
+def loop_free(words: int, rng: random.Random) -> list:
+    return [rng.choice(VOCABULARY) for _ in range(words)]
+
+
+def hallucination_loops(words: int, rng: random.Random) -> list:
+    """Lecture text interrupted by phrases repeated 50-500 times."""
+    out = []
+    while len(out) < words:
+        out += loop_free(rng.randint(50, 500), rng)
+        out += rng.choice(HALLUCINATIONS).split() * rng.randint(50, 500)
+    return out[:words]
+
+
+def every_length(words: int, max_words: int, rng: random.Random) -> list:
+    """Loops of random length 1..max_words, each repeated a few times."""
+    out = []
+    while len(out) < words:
+        out += loop_free(rng.randint(1, max_words), rng) * rng.randint(2, 6)
+    return out[:words]
+
+
+def synthetic_lecture(minutes: int, rng: random.Random) -> str:
+    """Lecture-like text with an occasional short Whisper loop."""
+    sentences = []
+    for _ in range(minutes * 10):
+        sentence = " ".join(loop_free(rng.randint(6, 24), rng)) + "."
+        if rng.random() < 0.03:
+            sentence += (" " + rng.choice(HALLUCINATIONS)) * rng.randint(3, 30)
+        sentences.append(sentence)
+    return " ".join(sentences)
+
+
+def check_regressions(rng: random.Random):
+    for text, expected in REGRESSIONS:
+        result = collapse_loops(text)
+        assert result == expected, f"collapse_loops({text!r}) = {result!r}, expected {expected!r}"
+    # Collapsing is idempotent: no loop survives a call
+    for _ in range(200):
+        text = " ".join(every_length(rng.randint(10, 300), 5, random.Random(rng.random())))
+        once = collapse_loops(text, 5)
+        assert collapse_loops(once, 5) == once, f"loop left in {once!r}"
+
+
+def time_collapse(label: str, text: str, args):
+    best = float("inf")
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        result = collapse_loops(text, args.max_words, args.min_repeats)
+        best = min(best, time.perf_counter() - started)
+    words_in, words_out = len(text.split()), len(result.split())
+    print(f"{label:>22}: {best * 1000:8.1f} ms, {words_in / best / 1e6:5.2f} M words/s, "
+          f"{words_in} -> {words_out} words")
+
+
+def tokens_saved(label: str, text: str, args):
+    without_loops = CleaningPipeline(loop_max_words=0)
+    with_loops = CleaningPipeline(loop_max_words=args.max_words, loop_min_repeats=args.min_repeats)
+    before = count_tokens(clean_transcript(text, without_loops))
+    after = count_tokens(clean_transcript(text, with_loops))
+    print(f"{label:>22}: {before} -> {after} tokens after cleaning "
+          f"({(before - after) / max(1, before):.1%} saved)")
+
+
+def main(args):
+    logging.disable(logging.INFO)
+    rng = random.Random(0)
+    check_regressions(rng)
+    print(f"Pathological inputs ({args.words} words, max loop {args.max_words} words, "
+          f"{args.min_repeats}+ copies):")
+    for label, words in (
+        ("loop-free", loop_free(args.words, rng)),
+        ("hallucination loops", hallucination_loops(args.words, rng)),
+        ("loops of every length", every_length(args.words, args.max_words, rng)),
+        ("single word x1M", ["okay"] * args.words),
+    ):
+        time_collapse(label, " ".join(words), args)
+
+    print("Tokens saved by loop collapse:")
+    if args.transcripts:
+        for path in args.transcripts:
+            tokens_saved(Path(path).name, Path(path).read_text(encoding="utf-8"), args)
+    else:
+        tokens_saved("synthetic 60 min", synthetic_lecture(60, rng), args)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("transcripts", nargs="*", help="Raw transcript text files (default: synthetic lecture)")
+    parser.add_argument("--words", type=int, default=1_000_000, help="Size of the pathological inputs")
+    parser.add_argument("--max-words", type=int, default=LOOP_MAX_WORDS)
+    parser.add_argument("--min-repeats", type=int, default=LOOP_MIN_REPEATS)
+    parser.add_argument("--repeat", type=int, default=3, help="Best of N runs")
+    main(parser.parse_args())
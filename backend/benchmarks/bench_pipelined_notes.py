@@ -0,0 +1,124 @@
+"""
+Benchmark: notes after transcription vs notes pipelined with transcription.
+
+Transcription is simulated: segments are released in batches with a fixed
+decoding delay per batch, as long-audio mode does. The fake LLM server stands
+in for the model. Reported is the time from the last segment to the finished
+notes, which is what the user waits for on top of transcription.
+
+Usage (from backend/):
+    python benchmarks/bench_pipelined_notes.py                     # synthetic 60-minute lecture
+    python benchmarks/bench_pipelined_notes.py --minutes 90 --context-window 8192 --batch-delay 2
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from bench_compressor import WORDS_PER_MINUTE, synthetic_lecture
+from fake_llm_server import start_fake_server
+
+SEGMENT_SECONDS = 30
+
+
+def lecture_segments(minutes: int) -> list:
+    words = synthetic_lecture(minutes).split()
+    per_segment = WORDS_PER_MINUTE * SEGMENT_SECONDS // 60
+    return [
+        {"start": i // per_segment * SEGMENT_SECONDS, "end": (i // per_segment + 1) * SEGMENT_SECONDS,
+         "text": " ".join(words[i:i + per_segment])}
+        for i in range(0, len(words), per_segment)
+    ]
+
+
+async def transcribe(segments: list, batch: int, delay: float, queue: asyncio.Queue) -> float:
+    """Release segments like a transcriber would; returns when the last one was out."""
+    for i in range(0, len(segments), batch):
+        await asyncio.sleep(delay)
+        for segment in segments[i:i + batch]:
+            queue.put_nowait(segment)
+    queue.put_nowait(None)
+    return time.perf_counter()
+
+
+async def drain(queue: asyncio.Queue) -> list:
+    segments = []
+    while (segment := await queue.get()) is not None:
+        segments.append(segment)
+    return segments
+
+
+async def queued(queue: asyncio.Queue):
+    while (segment := await queue.get()) is not None:
+        yield segment
+
+
+async def sequential(segments: list, args) -> float:
+    from nlp.summarizer import astream_notes
+
+    queue = asyncio.Queue()
+    done, received = await asyncio.gather(transcribe(segments, args.batch, args.batch_delay, queue), drain(queue))
+    async for _ in astream_notes(" ".join(s["text"] for s in received)):
+        pass
+    return time.perf_counter() - done
+
+
+async def pipelined(segments: list, args) -> float:
+    from nlp.summarizer import astream_notes_pipelined
+
+    async def notes(queue):
+        async for _ in astream_notes_pipelined(queued(queue)):
+            pass
+
+    queue = asyncio.Queue()
+    done, _ = await asyncio.gather(transcribe(segments, args.batch, args.batch_delay, queue), notes(queue))
+    return time.perf_counter() - done
+
+
+async def run(args, server):
+    from nlp.llm_client import aclose_async_client
+
+    segments = lecture_segments(args.minutes)
+    print(f"Lecture: {args.minutes} min, {len(segments)} segments, "
+          f"transcription {len(segments) / args.batch * args.batch_delay:.1f} s simulated")
+    try:
+        for label, mode in (("sequential", sequential), ("pipelined", pipelined)):
+            requests = server.requests
+            tail = await mode(segments, args)
+            print(f"{label:>12}: notes ready {tail * 1000:7.0f} ms after the last segment, "
+                  f"{server.requests - requests} LLM calls")
+    finally:
+        await aclose_async_client()
+
+
+def main(args):
+    logging.disable(logging.INFO)
+    # Measure the LLM path itself: no response cache, no rate limiting
+    os.environ.update(LLM_CACHE_ENABLED="false", LLM_REQUESTS_PER_MINUTE="0", LLM_TOKENS_PER_MINUTE="0")
+    server = start_fake_server(latency_ms=args.latency_ms, ms_per_1k_tokens=args.ms_per_1k_tokens)
+    from config import config
+    config.GROQ_BASE_URL, config.GROQ_API_KEY = server.url, "test"
+    config.LLM_CONTEXT_WINDOW = args.context_window
+    config.NOTES_WINDOW_SECONDS = args.window_seconds
+    try:
+        asyncio.run(run(args, server))
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--minutes", type=int, default=60, help="Length of the synthetic lecture")
+    parser.add_argument("--batch", type=int, default=10, help="Segments released per transcription step")
+    parser.add_argument("--batch-delay", type=float, default=0.5, help="Seconds of decoding per step")
+    parser.add_argument("--window-seconds", type=float, default=300, help="NOTES_WINDOW_SECONDS")
+    parser.add_argument("--context-window", type=int, default=4096, help="LLM_CONTEXT_WINDOW")
+    parser.add_argument("--latency-ms", type=float, default=300, help="Fixed fake LLM latency per call")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=150, help="Fake LLM delay per 1k prompt tokens")
+    main(parser.parse_args())
@@ -0,0 +1,69 @@
+"""
+Benchmark: decode time saved by the energy VAD pre-pass.
+
+Usage (from backend/):
+    python benchmarks/bench_vad.py lecture1.mp3 lecture2.m4a --model tiny
+    python benchmarks/bench_vad.py lecture1.mp3 --no-decode   # VAD stats only
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+# Add backend to path
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from audio.decode import load_pcm
+from audio.vad import detect_speech
+
+SAMPLE_RATE = 16000
+
+
+def main(args):
+    service = None
+    if not args.no_decode:
+        from services.audio_service import AudioTranscriptionService
+        service = AudioTranscriptionService(args.model)
+
+    totals = {"audio": 0.0, "speech": 0.0, "full": 0.0, "vad": 0.0}
+    for path in args.audio:
+        samples = load_pcm(path, SAMPLE_RATE)
+        duration = len(samples) / SAMPLE_RATE
+
+        started = time.perf_counter()
+        speech = detect_speech(samples, SAMPLE_RATE)
+        vad_time = time.perf_counter() - started
+        compacted = speech.compact(samples)
+
+        line = (f"{Path(path).name}: {duration / 60:.1f} min, speech {speech.speech_ratio:.0%} "
+                f"({len(speech.regions)} regions), VAD pass {vad_time * 1000:.0f} ms")
+        totals["audio"] += duration
+        totals["speech"] += len(compacted) / SAMPLE_RATE
+
+        if service is not None:
+            started = time.perf_counter()
+            service.transcribe_samples(samples)
+            full_time = time.perf_counter() - started
+            started = time.perf_counter()
+            if len(compacted):
+                service.transcribe_samples(compacted)
+            vad_decode_time = time.perf_counter() - started + vad_time
+            totals["full"] += full_time
+            totals["vad"] += vad_decode_time
+            line += f", decode {full_time:.1f}s -> {vad_decode_time:.1f}s"
+        print(line)
+
+    print(f"\nTotal audio {totals['audio'] / 60:.1f} min, "
+          f"speech {totals['speech'] / max(totals['audio'], 1e-9):.0%}")
+    if service is not None and totals["full"]:
+        saved = totals["full"] - totals["vad"]
+        print(f"Decode time {totals['full']:.1f}s -> {totals['vad']:.1f}s "
+              f"(saved {saved:.1f}s, {saved / totals['full']:.0%})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("audio", nargs="+")
+    parser.add_argument("--model", default="tiny")
+    parser.add_argument("--no-decode", action="store_true", help="Only report VAD statistics")
+    main(parser.parse_args())
@@ -0,0 +1,147 @@
+"""
+Fake OpenAI-compatible chat completions server for offline LLM tests.
+
+Answers POST .../chat/completions after a fixed latency (plus an optional
+per-prompt-token delay, like a real model's prefill) with a canned reply
+(streamed word by word as SSE chunks when the request sets "stream") and
+counts TCP connections, so connection reuse can be checked without network
+access. GET /stats returns {"connections", "requests", "prompt_tokens"}.
+
+Usage (from backend/):
+    python benchmarks/fake_llm_server.py --port 8100 --latency-ms 200
+    GROQ_BASE_URL=http://127.0.0.1:8100 GROQ_API_KEY=test uvicorn app:app
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeLLMServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, latency_ms: float = 0.0, ms_per_1k_tokens: float = 0.0):
+        super().__init__(address, _Handler)
+        self.latency = latency_ms / 1000
+        self.per_token = ms_per_1k_tokens / 1000 / 1000
+        self.connections = 0
+        self.requests = 0
+        self.prompt_tokens = 0  # estimated at 4 characters per token
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def count(self, connection: bool = False, prompt_tokens: int = 0):
+        with self._lock:
+            if connection:
+                self.connections += 1
+            else:
+                self.requests += 1
+                self.prompt_tokens += prompt_tokens
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+    disable_nagle_algorithm = True  # headers and body are separate writes
+
+    def setup(self):
+        super().setup()
+        self.server.count(connection=True)
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status: int, payload: dict):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, {"connections": self.server.connections, "requests": self.server.requests,
+                                  "prompt_tokens": self.server.prompt_tokens})
+        else:
+            self._send_json(404, {"error": {"message": "not found"}})
+
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": "not found"}})
+            return
+        prompt = request.get("messages", [{}])[-1].get("content", "")
+        self.server.count(prompt_tokens=len(prompt) // 4)
+        time.sleep(self.server.latency + len(prompt) // 4 * self.server.per_token)
+        content = f"# Notes\n\n- Fake summary of {len(prompt.split())} words"
+        if request.get("stream"):
+            self._stream(request, content)
+            return
+        self._send_json(200, {
+            "id": f"chatcmpl-{self.server.requests}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": 8,
+                      "total_tokens": len(prompt) // 4 + 8},
+        })
+
+
+    def _stream(self, request: dict, content: str):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        words = content.split(" ")
+        for i, word in enumerate(words):
+            delta = word if i == 0 else " " + word
+            self._write_chunk(self._sse_chunk(request, {"content": delta}, None))
+            time.sleep(self.server.latency / len(words))
+        self._write_chunk(self._sse_chunk(request, {}, "stop"))
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _sse_chunk(self, request: dict, delta: dict, finish_reason) -> bytes:
+        chunk = {
+            "id": f"chatcmpl-{self.server.requests}",
+            "object": "chat.completion.chunk",
+            "created": int(time.time()),
+            "model": request.get("model", "fake"),
+            "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+        }
+        return f"data: {json.dumps(chunk)}\n\n".encode()
+
+    def _write_chunk(self, data: bytes):
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+def start_fake_server(port: int = 0, latency_ms: float = 0.0, ms_per_1k_tokens: float = 0.0) -> FakeLLMServer:
+    """Start the server on a background thread; call shutdown() to stop it."""
+    server = FakeLLMServer(("127.0.0.1", port), latency_ms, ms_per_1k_tokens)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--port", type=int, default=8100)
+    parser.add_argument("--latency-ms", type=float, default=200)
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=0, help="Extra delay per 1k prompt tokens")
+    args = parser.parse_args()
+    server = FakeLLMServer(("127.0.0.1", args.port), args.latency_ms, args.ms_per_1k_tokens)
+    print(f"Fake LLM server on {server.url} (latency {args.latency_ms:.0f} ms)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
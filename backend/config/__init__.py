@@ -0,0 +1,7 @@
+from config.settings import (
+    GROQ_API_KEY,
+    AUDIO_SAMPLE_RATE,
+    APP_NAME,
+    Config,
+    config,
+)
@@ -8,3 +8,117 @@ GROQ_API_KEY = os.getenv("GROQ_API_KEY")
 AUDIO_SAMPLE_RATE = 16000
 
 APP_NAME = "Lecture Voice-to-Notes Generator"
+
+
+class Config:
+    # API Keys
+    GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+    
+    # Whisper Settings
+    WHISPER_MODEL = os.getenv("WHISPER_MODEL", "base")  # tiny, base, small, medium, large
+    
+    # LLM Settings
+    LLM_MODEL = os.getenv("LLM_MODEL", "gpt-3.5-turbo")
+    MAX_TOKENS = int(os.getenv("MAX_TOKENS", "2000"))
+    TEMPERATURE = float(os.getenv("TEMPERATURE", "0.7"))
+    
+    WHISPER_MODEL_MEMORY_MB = int(os.getenv("WHISPER_MODEL_MEMORY_MB", "6000"))  # budget for loaded models
+    WHISPER_POOL_WORKERS = int(os.getenv("WHISPER_POOL_WORKERS", "1"))  # each worker loads its own model
+    
+    # Audio Settings
+    SAMPLE_RATE = 16000
+    CHUNK_LENGTH_MS = 30000  # 30 seconds
+    CHUNK_OVERLAP_MS = int(os.getenv("CHUNK_OVERLAP_MS", "1000"))
+    
+    # Skip silence before Whisper with the energy VAD pre-pass
+    VAD_ENABLED = os.getenv("VAD_ENABLED", "true").lower() == "true"
+    
+    # Long-audio mode: chunks transcribed in parallel (with WHISPER_POOL_WORKERS > 1)
+    # and their segments streamed to clients in order as each chunk finishes
+    LONG_AUDIO_ENABLED = os.getenv("LONG_AUDIO_ENABLED", "true").lower() == "true"
+    LONG_AUDIO_MIN_SECONDS = int(os.getenv("LONG_AUDIO_MIN_SECONDS", "600"))
+    
+    # File Upload
+    MAX_UPLOAD_SIZE = 100 * 1024 * 1024  # 100 MB
+    ALLOWED_AUDIO_FORMATS = [".mp3", ".wav", ".m4a", ".ogg", ".flac"]
+    MAX_AUDIO_DURATION_SECONDS = int(os.getenv("MAX_AUDIO_DURATION_SECONDS", str(4 * 3600)))
+    
+    # Paths
+    UPLOAD_DIR = "uploads"
+    OUTPUT_DIR = "outputs"
+    PROMPTS_DIR = "prompts"
+    
+    # Chunking
+    MAX_CHUNK_TOKENS = 4000
+    
+    # Pooled LLM client (keep-alive connections shared by all requests)
+    GROQ_BASE_URL = os.getenv("GROQ_BASE_URL")  # e.g. a local fake server for offline tests
+    LLM_TIMEOUT_SECONDS = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    LLM_CONNECT_TIMEOUT_SECONDS = float(os.getenv("LLM_CONNECT_TIMEOUT_SECONDS", "10"))
+    LLM_MAX_CONNECTIONS = int(os.getenv("LLM_MAX_CONNECTIONS", "20"))
+    LLM_KEEPALIVE_CONNECTIONS = int(os.getenv("LLM_KEEPALIVE_CONNECTIONS", "10"))
+    LLM_KEEPALIVE_EXPIRY_SECONDS = float(os.getenv("LLM_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    # Provider rate limits enforced by the LLM scheduler (0 disables a limit); it also
+    # owns all retries (429s, connection errors, 5xx), the SDK clients make none
+    LLM_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "30"))
+    LLM_TOKENS_PER_MINUTE = int(os.getenv("LLM_TOKENS_PER_MINUTE", "30000"))
+    LLM_RETRY_ATTEMPTS = int(os.getenv("LLM_RETRY_ATTEMPTS", "5"))
+    LLM_RETRY_BASE_DELAY = float(os.getenv("LLM_RETRY_BASE_DELAY", "1.0"))
+    LLM_RETRY_MAX_DELAY = float(os.getenv("LLM_RETRY_MAX_DELAY", "60"))
+    
+    # Prompt sizing: context window of NOTES_MODEL (0 looks it up) and the share of it
+    # held back because tiktoken counts only approximate the model's tokenizer
+    LLM_CONTEXT_WINDOW = int(os.getenv("LLM_CONTEXT_WINDOW", "0"))
+    LLM_CONTEXT_MARGIN = float(os.getenv("LLM_CONTEXT_MARGIN", "0.05"))
+    
+    # Note generation: transcripts that don't fit one prompt are summarized chunk by
+    # chunk (NOTES_CONCURRENCY calls in flight) and the partial notes merged. Chunk size
+    # and reduce fan-in are planned from the context window; the settings below only
+    # cap them (0 = no cap)
+    NOTES_MODEL = os.getenv("NOTES_MODEL", "llama3-8b-8192")
+    NOTES_MAP_REDUCE_MIN_TOKENS = int(os.getenv("NOTES_MAP_REDUCE_MIN_TOKENS", "0"))
+    NOTES_CHUNK_TOKENS = int(os.getenv("NOTES_CHUNK_TOKENS", "0"))
+    NOTES_CHUNK_OVERLAP = int(os.getenv("NOTES_CHUNK_OVERLAP", "150"))
+    NOTES_CONCURRENCY = int(os.getenv("NOTES_CONCURRENCY", "4"))
+    NOTES_REDUCE_FAN_IN = int(os.getenv("NOTES_REDUCE_FAN_IN", "0"))
+    # Pipelined jobs: segments are grouped into NOTES_WINDOW_SECONDS chunks as they are
+    # transcribed, and long transcripts get their map calls while Whisper is still running
+    NOTES_PIPELINE_ENABLED = os.getenv("NOTES_PIPELINE_ENABLED", "true").lower() == "true"
+    NOTES_WINDOW_SECONDS = float(os.getenv("NOTES_WINDOW_SECONDS", "300"))
+    # Optional extractive pre-compression before note generation: "tfidf" or "textrank"
+    # keep the most central sentences up to NOTES_COMPRESSION_TOKENS (empty = off)
+    NOTES_COMPRESSION_METHODS = ("tfidf", "textrank")
+    NOTES_COMPRESSION_METHOD = os.getenv("NOTES_COMPRESSION_METHOD", "").strip().lower()
+    if NOTES_COMPRESSION_METHOD and NOTES_COMPRESSION_METHOD not in NOTES_COMPRESSION_METHODS:
+        raise ValueError(
+            f"NOTES_COMPRESSION_METHOD must be empty or one of {NOTES_COMPRESSION_METHODS}, "
+            f"got {NOTES_COMPRESSION_METHOD!r}"
+        )
+    NOTES_COMPRESSION_TOKENS = int(os.getenv("NOTES_COMPRESSION_TOKENS", "6000"))
+    NOTES_COMPRESSION_REDUNDANCY = float(os.getenv("NOTES_COMPRESSION_REDUNDANCY", "0.8"))
+    
+    # Clean transcript segments (fillers, punctuation, repeats) as they are transcribed
+    TRANSCRIPT_CLEANING_ENABLED = os.getenv("TRANSCRIPT_CLEANING_ENABLED", "false").lower() == "true"
+    
+    # Transcript cache
+    TRANSCRIPT_CACHE_ENABLED = os.getenv("TRANSCRIPT_CACHE_ENABLED", "true").lower() == "true"
+    TRANSCRIPT_CACHE_DIR = os.getenv("TRANSCRIPT_CACHE_DIR", os.path.join("cache", "transcripts"))
+    TRANSCRIPT_CACHE_MAX_MB = int(os.getenv("TRANSCRIPT_CACHE_MAX_MB", "512"))
+    
+    # LLM response cache (identical prompt + model + sampling params)
+    LLM_CACHE_ENABLED = os.getenv("LLM_CACHE_ENABLED", "true").lower() == "true"
+    LLM_CACHE_DIR = os.getenv("LLM_CACHE_DIR", os.path.join("cache", "llm"))
+    LLM_CACHE_MAX_MB = int(os.getenv("LLM_CACHE_MAX_MB", "256"))
+    LLM_CACHE_TTL_SECONDS = int(os.getenv("LLM_CACHE_TTL_SECONDS", str(7 * 24 * 3600)))
+    # Bypass the cache for temperature > 0 calls when fresh samples are wanted
+    LLM_CACHE_SKIP_SAMPLED = os.getenv("LLM_CACHE_SKIP_SAMPLED", "false").lower() == "true"
+    
+    # Admin endpoints require X-Admin-Token to match (they are disabled when unset)
+    ADMIN_TOKEN = os.getenv("ADMIN_TOKEN")
+    
+    # Background jobs
+    JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+    JOB_QUEUE_SIZE = int(os.getenv("JOB_QUEUE_SIZE", "16"))
+    JOB_RESULT_TTL = int(os.getenv("JOB_RESULT_TTL", "3600"))  # seconds
+    
+config = Config()
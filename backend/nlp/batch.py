@@ -0,0 +1,170 @@
+"""
+Batch cleaning and chunking of many transcripts on a process pool.
+
+Transcripts are grouped into batches of ``batch_size`` and each batch is one
+task, so pickling and scheduling overhead is paid per batch rather than per
+transcript. Each worker process loads the tokenizer and receives the
+cleaning pipeline once, in its initializer, and reuses them for every batch.
+Only a bounded window of batches is in flight, so inputs are read lazily and
+results are yielded in input order as soon as they are ready.
+
+The pool uses the "spawn" start method: scripts calling these functions need
+an ``if __name__ == "__main__":`` guard.
+"""
+import logging
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from nlp.chunker import chunk_by_tokens, get_encoding
+from nlp.cleaner import CleaningPipeline
+from utils.logger import logger
+
+BATCH_SIZE = 64
+# Batches queued per worker beyond the one it is running
+PREFETCH_BATCHES = 2
+
+# Per-worker-process state, set by _init_worker
+_worker_pipeline: Optional[CleaningPipeline] = None
+
+
+def _init_worker(model: str, pipeline: Optional[CleaningPipeline]):
+    """Load the tokenizer and keep the cleaning pipeline once per worker process."""
+    global _worker_pipeline
+    # Per-transcript progress messages would flood the parent's console
+    logger.setLevel(logging.WARNING)
+    get_encoding(model)
+    _worker_pipeline = pipeline or CleaningPipeline()
+
+
+def _clean_batch(texts: List[str], pipeline: Optional[CleaningPipeline] = None) -> List[str]:
+    pipeline = pipeline or _worker_pipeline
+    return [pipeline.clean(text) for text in texts]
+
+
+def _chunk_batch(
+    texts: List[str],
+    max_tokens: int,
+    overlap: int,
+    model: str,
+    clean: bool,
+    pipeline: Optional[CleaningPipeline] = None,
+) -> List[List[str]]:
+    if clean:
+        texts = _clean_batch(texts, pipeline)
+    return [chunk_by_tokens(text, max_tokens, overlap, model) for text in texts]
+
+
+def _batches(items: Iterable, size: int) -> Iterator[list]:
+    iterator = iter(items)
+    while True:
+        batch = list(islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _ordered_map(
+    task: Callable,
+    items: Iterable,
+    args: tuple,
+    model: str,
+    pipeline: Optional[CleaningPipeline],
+    workers: Optional[int],
+    batch_size: int,
+) -> Iterator:
+    """
+    Run ``task(batch, *args)`` over batches of ``items`` and yield the results in order.
+
+    With a single worker the batches run in this process and nothing is pickled.
+    """
+    workers = workers or os.cpu_count() or 1
+    batch_size = max(1, batch_size)
+
+    if workers <= 1:
+        pipeline = pipeline or CleaningPipeline()
+        for batch in _batches(items, batch_size):
+            yield from task(batch, *args, pipeline)
+        return
+
+    logger.info(f"Batch processing with {workers} workers, {batch_size} transcripts per task")
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(model, pipeline),
+    ) as executor:
+        pending = deque()
+        window = workers * PREFETCH_BATCHES
+        try:
+            for batch in _batches(items, batch_size):
+                pending.append(executor.submit(task, batch, *args))
+                if len(pending) >= window:
+                    yield from pending.popleft().result()
+            while pending:
+                yield from pending.popleft().result()
+        finally:
+            # Consumer stopped early or a task failed: don't run what's still queued
+            for future in pending:
+                future.cancel()
+
+
+def clean_many(
+    texts: Iterable[str],
+    pipeline: Optional[CleaningPipeline] = None,
+    workers: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[str]:
+    """
+    Clean many transcripts in parallel.
+
+    Args:
+        texts: Raw transcripts (consumed lazily)
+        pipeline: Rule set to apply (default: all rules with FILLER_WORDS)
+        workers: Worker processes (default: CPU count; 1 runs in this process)
+        batch_size: Transcripts per pool task
+
+    Returns:
+        Iterator over cleaned transcripts, in input order
+
+    Raises:
+        Exception: Whatever a worker raised, when its batch is reached
+    """
+    return _ordered_map(_clean_batch, texts, (), "gpt-3.5-turbo", pipeline, workers, batch_size)
+
+
+def chunk_many(
+    texts: Iterable[str],
+    max_tokens: int = 2000,
+    overlap: int = 200,
+    model: str = "gpt-3.5-turbo",
+    clean: bool = False,
+    pipeline: Optional[CleaningPipeline] = None,
+    workers: Optional[int] = None,
+    batch_size: int = BATCH_SIZE,
+) -> Iterator[List[str]]:
+    """
+    Chunk many transcripts in parallel (see chunk_by_tokens).
+
+    Args:
+        texts: Transcripts (consumed lazily)
+        max_tokens: Maximum tokens per chunk
+        overlap: Number of tokens to overlap between chunks
+        model: Model whose tokenizer is used for counting
+        clean: Clean each transcript first, in the same task
+        pipeline: Rule set used when ``clean`` is set (default: all rules)
+        workers: Worker processes (default: CPU count; 1 runs in this process)
+        batch_size: Transcripts per pool task
+
+    Returns:
+        Iterator over each transcript's list of chunks, in input order
+
+    Raises:
+        Exception: Whatever a worker raised, when its batch is reached
+    """
+    return _ordered_map(
+        _chunk_batch, texts, (max_tokens, overlap, model, clean), model, pipeline, workers, batch_size
+    )
@@ -1,10 +1,37 @@
 """
 Text chunking module for splitting transcripts into manageable pieces for LLM processing
 """
+import re
 import tiktoken
-from typing import List, Dict, Optional
+import numpy as np
+from functools import lru_cache
+from typing import AsyncIterable, AsyncIterator, Dict, Iterable, Iterator, List, Optional
 from utils.logger import logger
 
+# Fallback when no tiktoken encoding is available: ~4 characters per token
+CHARS_PER_TOKEN = 4
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_WORD_GAP = re.compile(r"\s+")
+
+@lru_cache(maxsize=8)
+def get_encoding(model: str = "gpt-3.5-turbo") -> Optional["tiktoken.Encoding"]:
+    """
+    Return the tiktoken encoding for a model, loaded once per model.
+    
+    Args:
+        model: OpenAI model name
+    
+    Returns:
+        Encoding, or None if it can't be loaded (the failure is cached too,
+        so callers fall back to the character estimate without retrying)
+    """
+    try:
+        return tiktoken.encoding_for_model(model)
+    except Exception as e:
+        logger.warning(f"Failed to load tiktoken encoding for {model}: {e}. Using fallback.")
+        return None
+
 def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
     """
     Count tokens in text using tiktoken.
@@ -16,96 +43,206 @@ def count_tokens(text: str, model: str = "gpt-3.5-turbo") -> int:
     Returns:
         Number of tokens
     """
-    try:
-        encoding = tiktoken.encoding_for_model(model)
-        return len(encoding.encode(text))
-    except Exception as e:
-        logger.warning(f"Failed to count tokens with tiktoken: {e}. Using fallback.")
-        # Fallback: approximate 1 token ≈ 4 characters
-        return len(text) // 4
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN
+    return len(encoding.encode(text, disallowed_special=()))
+
+def token_offsets(text: str, model: str = "gpt-3.5-turbo") -> np.ndarray:
+    """
+    Encode text once and return the character offset where each token starts.
+    
+    Args:
+        text: Input text
+        model: OpenAI model name
+    
+    Returns:
+        int64 array of token start offsets into ``text``
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return np.arange(0, len(text), CHARS_PER_TOKEN, dtype=np.int64)
+    tokens = encoding.encode(text, disallowed_special=())
+    _, offsets = encoding.decode_with_offsets(tokens)
+    return np.asarray(offsets, dtype=np.int64)
 
-def chunk_by_tokens(text: str, max_tokens: int = 2000, overlap: int = 200) -> List[str]:
+def _boundaries(text: str, pattern: re.Pattern, offsets: np.ndarray):
+    """
+    Character positions where a new sentence/word starts, paired with the
+    index of the first token at or after each position.
+    """
+    chars = np.fromiter((m.end() for m in pattern.finditer(text)), dtype=np.int64)
+    return chars, np.searchsorted(offsets, chars, side="left")
+
+def _last_boundary(boundaries, low: int, high: int) -> Optional[int]:
+    """Char position of the last boundary whose token index is in (low, high]."""
+    chars, tokens = boundaries
+    i = np.searchsorted(tokens, high, side="right") - 1
+    return int(chars[i]) if i >= 0 and tokens[i] > low else None
+
+def _first_boundary(boundaries, low: int, high: int) -> Optional[int]:
+    """Char position of the first boundary whose token index is in [low, high)."""
+    chars, tokens = boundaries
+    i = np.searchsorted(tokens, low, side="left")
+    return int(chars[i]) if i < len(tokens) and tokens[i] < high else None
+
+def chunk_by_tokens(text: str, max_tokens: int = 2000, overlap: int = 200,
+                    model: str = "gpt-3.5-turbo") -> List[str]:
     """
     Split text into chunks based on token count with optional overlap.
     
+    The text is encoded once; chunks are cut on token positions aligned to
+    sentence boundaries (word boundaries for overlong sentences) and each
+    chunk is the matching slice of the original text.
+    
     Args:
         text: Input text to chunk
         max_tokens: Maximum tokens per chunk (default 2000)
         overlap: Number of tokens to overlap between chunks (default 200)
+        model: Model whose tokenizer is used for counting
     
     Returns:
         List of text chunks
     """
     logger.info(f"Chunking text (max tokens: {max_tokens}, overlap: {overlap})...")
     
-    # Split into sentences
-    sentences = text.split('. ')
+    offsets = token_offsets(text, model)
+    total = len(offsets)
+    sentences = _boundaries(text, _SENTENCE_END, offsets)
+    words = _boundaries(text, _WORD_GAP, offsets)
+    overlap = min(overlap, max_tokens // 2)
+    
+    def token_at(char: int) -> int:
+        # Token containing ``char``
+        return max(int(np.searchsorted(offsets, char, side="right")) - 1, 0)
     
     chunks = []
-    current_chunk = []
-    current_tokens = 0
-    overlap_buffer = []
-    
-    for sentence in sentences:
-        sentence = sentence.strip()
-        if not sentence:
-            continue
+    start_char, start = 0, 0
+    while start < total:
+        end_char = len(text)
+        if start + max_tokens < total:
+            limit = start + max_tokens
+            end_char = int(offsets[limit])
+            for boundaries in (sentences, words):
+                found = _last_boundary(boundaries, start, limit)
+                if found is not None and found > start_char:
+                    end_char = found
+                    break
         
-        # Add period back if it was removed
-        if not sentence.endswith('.'):
-            sentence += '.'
-        
-        sentence_tokens = count_tokens(sentence)
-        
-        # If single sentence exceeds max tokens, split it further
-        if sentence_tokens > max_tokens:
-            if current_chunk:
-                chunk_text = ' '.join(current_chunk)
-                chunks.append(chunk_text)
-                # Keep overlap
-                overlap_buffer = current_chunk[-int(len(current_chunk) * overlap/max_tokens):]
-                current_chunk = overlap_buffer.copy()
-                current_tokens = count_tokens(' '.join(current_chunk))
-            
-            # Split long sentence by words
-            words = sentence.split()
-            word_chunk = []
-            word_tokens = 0
-            
-            for word in words:
-                word_token_count = count_tokens(word)
-                if word_tokens + word_token_count > max_tokens and word_chunk:
-                    chunks.append(' '.join(word_chunk))
-                    word_chunk = [word]
-                    word_tokens = word_token_count
-                else:
-                    word_chunk.append(word)
-                    word_tokens += word_token_count
-            
-            if word_chunk:
-                chunks.append(' '.join(word_chunk))
-            
-            continue
+        chunk = text[start_char:end_char].strip()
+        if chunk:
+            chunks.append(chunk)
+        if end_char >= len(text):
+            break
         
-        # Check if adding this sentence exceeds limit
-        if current_tokens + sentence_tokens > max_tokens and current_chunk:
-            chunk_text = ' '.join(current_chunk)
-            chunks.append(chunk_text)
-            # Keep overlap
-            overlap_buffer = current_chunk[-int(len(current_chunk) * overlap/max_tokens):]
-            current_chunk = overlap_buffer + [sentence]
-            current_tokens = count_tokens(' '.join(current_chunk))
-        else:
-            current_chunk.append(sentence)
-            current_tokens += sentence_tokens
-    
-    # Add remaining chunk
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
+        # Start the next chunk at a sentence (or word) inside the overlap window
+        end = int(np.searchsorted(offsets, end_char, side="left"))
+        next_char = end_char
+        if overlap:
+            low = max(end - overlap, start + 1)
+            for boundaries in (sentences, words):
+                found = _first_boundary(boundaries, low, end)
+                if found is not None and found > start_char:
+                    next_char = found
+                    break
+        start_char, start = next_char, token_at(next_char)
     
     logger.info(f"Created {len(chunks)} chunks")
     return chunks
 
+class TimeChunker:
+    """
+    Groups Whisper segments, fed in order as they arrive, into time-window chunks.
+    
+    A chunk closes when a segment starts ``max_duration`` seconds or more after
+    the chunk's window opened, or when adding it would take the chunk past
+    ``max_tokens``. The window of the first chunk opens at 0, so the result
+    matches chunk_by_time when there is no token limit.
+    
+    Args:
+        max_duration: Maximum duration in seconds per chunk
+        max_tokens: Maximum tokens per chunk (0 for no limit; a single longer
+            segment still becomes a chunk of its own)
+        model: Model whose tokenizer is used for counting
+    """
+    
+    def __init__(self, max_duration: float = 300, max_tokens: int = 0, model: str = "gpt-3.5-turbo"):
+        self.max_duration = max_duration
+        self.max_tokens = max_tokens
+        self.model = model
+        self._texts: List[str] = []
+        self._window_start = 0
+        self._start = self._end = None
+        self._tokens = 0
+    
+    def feed(self, segment: Dict) -> Optional[Dict]:
+        """
+        Add one segment.
+        
+        Args:
+            segment: Dict with 'start', 'end' and 'text'
+        
+        Returns:
+            The chunk this segment closed, as {start, end, text}, or None
+        """
+        tokens = count_tokens(segment['text'], self.model) if self.max_tokens else 0
+        closed = None
+        over_time = segment['start'] - self._window_start >= self.max_duration
+        over_tokens = self.max_tokens and self._texts and self._tokens + tokens > self.max_tokens
+        if over_time or over_tokens:
+            closed = self.flush()
+            self._window_start = segment['start']
+        
+        if not self._texts:
+            self._start = segment['start']
+        self._texts.append(segment['text'])
+        self._end = segment.get('end', segment['start'])
+        self._tokens += tokens
+        return closed
+    
+    def flush(self) -> Optional[Dict]:
+        """Close and return the open chunk, if any."""
+        if not self._texts:
+            return None
+        chunk = {"start": self._start, "end": self._end, "text": ' '.join(self._texts)}
+        self._texts, self._tokens = [], 0
+        return chunk
+
+def stream_chunk_by_time(segments: Iterable[Dict], max_duration: float = 300, max_tokens: int = 0,
+                         model: str = "gpt-3.5-turbo") -> Iterator[Dict]:
+    """
+    Yield time-window chunks as soon as they close (see TimeChunker).
+    
+    Args:
+        segments: {start, end, text} dicts in time order, possibly still being produced
+        max_duration: Maximum duration in seconds per chunk
+        max_tokens: Maximum tokens per chunk (0 for no limit)
+        model: Model whose tokenizer is used for counting
+    
+    Returns:
+        Iterator of {start, end, text} chunks
+    """
+    chunker = TimeChunker(max_duration, max_tokens, model)
+    for segment in segments:
+        chunk = chunker.feed(segment)
+        if chunk is not None:
+            yield chunk
+    chunk = chunker.flush()
+    if chunk is not None:
+        yield chunk
+
+async def astream_chunk_by_time(segments: AsyncIterable[Dict], max_duration: float = 300,
+                                max_tokens: int = 0, model: str = "gpt-3.5-turbo") -> AsyncIterator[Dict]:
+    """Async variant of stream_chunk_by_time, for segments arriving while transcription runs."""
+    chunker = TimeChunker(max_duration, max_tokens, model)
+    async for segment in segments:
+        chunk = chunker.feed(segment)
+        if chunk is not None:
+            yield chunk
+    chunk = chunker.flush()
+    if chunk is not None:
+        yield chunk
+
 def chunk_by_time(segments: List[Dict], max_duration: int = 300) -> List[str]:
     """
     Chunk transcript by time segments (e.g., every 5 minutes).
@@ -119,21 +256,7 @@ def chunk_by_time(segments: List[Dict], max_duration: int = 300) -> List[str]:
     """
     logger.info(f"Chunking by time (max duration: {max_duration}s)...")
     
-    chunks = []
-    current_chunk = []
-    chunk_start = 0
-    
-    for segment in segments:
-        if segment['start'] - chunk_start >= max_duration:
-            if current_chunk:
-                chunks.append(' '.join(current_chunk))
-            current_chunk = [segment['text']]
-            chunk_start = segment['start']
-        else:
-            current_chunk.append(segment['text'])
-    
-    if current_chunk:
-        chunks.append(' '.join(current_chunk))
+    chunks = [chunk['text'] for chunk in stream_chunk_by_time(segments, max_duration)]
     
     logger.info(f"Created {len(chunks)} time-based chunks")
     return chunks
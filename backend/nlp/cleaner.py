@@ -1,8 +1,20 @@
 """
 Text cleaning and normalization module for lecture transcripts
+
+Cleaning rules are compiled once into a CleaningPipeline. The filler phrases
+are merged into a single trie-shaped alternation, so filler removal is one
+pass over the text regardless of how many phrases are configured.
+
+Repeated n-gram loops (Whisper sometimes emits the same phrase dozens of
+times) are found with one vectorized comparison per loop length: a run of
+positions where word i equals word i + n is a phrase of n words repeated back
+to back. The cost is O(words x max loop length) whatever the input looks like.
 """
 import re
-from typing import List
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Pattern, Sequence, Tuple, Union
+
+import numpy as np
+
 from utils.logger import logger
 
 # Common filler words and phrases in lectures
@@ -13,6 +25,231 @@ FILLER_WORDS = [
     "furthermore", "moreover", "in addition"
 ]
 
+Rule = Tuple[Pattern, Union[str, Callable[[re.Match], str]]]
+
+_SPECIAL_CHARS = re.compile(r'[^\w\s\-.,!?;:\'"()]+', flags=re.UNICODE)
+_WHITESPACE = re.compile(r'\s+')
+_SPACE_BEFORE_PUNCT = re.compile(r'\s+([.,!?;:])')
+_MISSING_SPACE_AFTER_PUNCT = re.compile(r'([.,!?;:])([A-Za-z])')
+_MULTIPLE_PERIODS = re.compile(r'\.{2,}')
+# Start of text or a sentence terminator, the whitespace after it and the next sentence's first character
+_SENTENCE_START = re.compile(r'(^|[.!?])\s*([^.!?]?)')
+# The same without start of text, for text that continues a sentence
+_SENTENCE_CONTINUE = re.compile(r'([.!?])\s*([^.!?]?)')
+_LEADING_PUNCT = re.compile(r'[.,!?;:]+')
+_REPEATED_CHARS = re.compile(r'([a-z])\1\1+', flags=re.IGNORECASE)
+# A space-delimited word followed by case-insensitive copies of itself (text is single-spaced)
+_REPEATED_WORDS = re.compile(r'(?<![^ ])([^ ]+)(?: \1(?![^ ]))+', flags=re.IGNORECASE)
+
+# Longest phrase (in words) checked for loops, and how many back-to-back copies make a loop
+LOOP_MAX_WORDS = 40
+LOOP_MIN_REPEATS = 3
+
+
+def _trie_regex(phrases: Iterable[str]) -> str:
+    """
+    Regex alternation of phrases factored by common prefix ("i (?:guess|mean|think)").
+
+    Longer phrases win over their prefixes ("sort of" before "so"); spaces inside a
+    phrase match any run of whitespace.
+    """
+    trie = {}
+    for phrase in phrases:
+        node = trie
+        for ch in phrase.lower():
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        branches = [
+            (r'\s+' if ch == " " else re.escape(ch)) + build(child)
+            for ch, child in sorted(node.items()) if ch
+        ]
+        if not branches:
+            return ""
+        pattern = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+        return "(?:" + pattern + ")?" if "" in node else pattern
+
+    return build(trie)
+
+
+def compile_filler_pattern(filler_words: Iterable[str]) -> Optional[Pattern]:
+    """Single case-insensitive matcher for whole-word filler phrases (None if empty)."""
+    phrases = [w.strip().lower() for w in filler_words if w.strip()]
+    if not phrases:
+        return None
+    # The lookahead on first letters lets most word starts fail before entering the trie
+    first_letters = "".join(re.escape(c) for c in sorted({p[0] for p in phrases}))
+    return re.compile(
+        r'\b(?=[' + first_letters + r'])' + _trie_regex(phrases) + r'\b', flags=re.IGNORECASE
+    )
+
+
+_FILLER_PATTERN = compile_filler_pattern(FILLER_WORDS)
+
+
+def _capitalize_sentence(match: re.Match) -> str:
+    """Single space after a sentence terminator and a capital letter after it."""
+    terminator = match.group(1) + ' ' if match.group(1) else ''
+    return terminator + match.group(2).upper()
+
+
+def collapse_loops(text: str, max_words: int = LOOP_MAX_WORDS, min_repeats: int = LOOP_MIN_REPEATS) -> str:
+    """
+    Collapse phrases repeated back to back into a single copy.
+
+    Words are compared case-insensitively, punctuation included (like
+    remove_repetitions), so "Thank you. Thank you. Thank you." becomes
+    "Thank you." while "No, no, no." is kept. Shorter loops are collapsed
+    first, and passes repeat until no loop is left; a trailing partial copy
+    of the phrase is kept.
+    
+    Args:
+        text: Input text (whitespace is normalized to single spaces if anything is removed)
+        max_words: Longest phrase, in words, to look for
+        min_repeats: Copies in a row needed to count as a loop (2 or more)
+    
+    Returns:
+        Text with loops collapsed
+    """
+    words = text.split()
+    if len(words) < min_repeats:
+        return text
+
+    vocabulary = {}
+    ids = np.fromiter(
+        (vocabulary.setdefault(word.lower(), len(vocabulary)) for word in words),
+        dtype=np.int64, count=len(words),
+    )
+    if len(vocabulary) == len(words):
+        return text
+    kept = np.arange(len(words))
+
+    # Collapsing a loop can join the pieces of another: repeat until nothing changes
+    while True:
+        remaining = len(ids)
+        for n in range(1, max_words + 1):
+            if len(ids) < n * min_repeats:
+                break
+            # same[i + 1]: word i equals word i + n (padded so every run has both edges)
+            same = np.concatenate(([False], ids[n:] == ids[:-n], [False]))
+            edges = np.flatnonzero(same[1:] != same[:-1])
+            starts, ends = edges[0::2], edges[1::2]
+            # A run of length L means words [start, start + L + n) repeat with period n
+            loops = ends - starts >= (min_repeats - 1) * n
+            if not loops.any():
+                continue
+            starts, ends = starts[loops], ends[loops]
+            # A run may begin inside the copies dropped from the one before it: move its
+            # start forward by whole periods so the copy it keeps is intact
+            drop_ends = starts + (ends - starts + n) // n * n
+            overlap = np.maximum(np.concatenate(([0], drop_ends[:-1])) - starts, 0)
+            starts = starts + (overlap + n - 1) // n * n
+            copies = (ends - starts + n) // n
+            loops = copies >= min_repeats
+            if not loops.any():
+                continue
+            starts, copies = starts[loops], copies[loops]
+
+            # Drop every copy after the first
+            delta = np.zeros(len(ids) + 1, dtype=np.int64)
+            delta[starts + n] += 1
+            delta[starts + copies * n] -= 1
+            keep = np.cumsum(delta[:-1]) == 0
+            ids, kept = ids[keep], kept[keep]
+        if len(ids) == remaining:
+            break
+
+    if len(kept) == len(words):
+        return text
+    logger.debug(f"Collapsed repeated phrases: {len(words)} -> {len(kept)} words")
+    return ' '.join(words[i] for i in kept)
+
+
+class CleaningPipeline:
+    """
+    Transcript cleaning rules compiled once and applied in a fixed order.
+
+    Args:
+        filler_words: Phrases removed as whole words (empty disables filler removal)
+        normalize: Drop characters other than word characters, whitespace and
+            common punctuation
+        fix_punctuation: Tighten spacing around punctuation, collapse "..." and
+            capitalize sentence starts
+        collapse_repeated_chars: Shorten letters repeated 3+ times ("sooo" -> "so")
+        remove_repetitions: Collapse consecutive duplicate words ("the the" -> "the")
+        extra_rules: Additional (pattern, replacement) pairs applied after the
+            built-in rules, before the final whitespace cleanup
+        loop_max_words: Collapse phrases of up to this many words repeated
+            loop_min_repeats times or more in a row, as the last step (0 disables)
+        loop_min_repeats: Back-to-back copies that count as a loop
+    """
+
+    def __init__(
+        self,
+        filler_words: Iterable[str] = FILLER_WORDS,
+        normalize: bool = True,
+        fix_punctuation: bool = True,
+        collapse_repeated_chars: bool = True,
+        remove_repetitions: bool = True,
+        extra_rules: Sequence[Tuple[str, Union[str, Callable[[re.Match], str]]]] = (),
+        loop_max_words: int = LOOP_MAX_WORDS,
+        loop_min_repeats: int = LOOP_MIN_REPEATS,
+    ):
+        self.rules: List[Rule] = []
+        if normalize:
+            self.rules.append((_SPECIAL_CHARS, ''))
+        fillers = compile_filler_pattern(filler_words)
+        if fillers is not None:
+            self.rules.append((fillers, ''))
+        if fix_punctuation:
+            self.rules.append((_SPACE_BEFORE_PUNCT, r'\1'))
+        # Collapse once after the deletions above instead of after each of them
+        self.rules.append((_WHITESPACE, ' '))
+        if fix_punctuation:
+            self.rules += [
+                (_MISSING_SPACE_AFTER_PUNCT, r'\1 \2'),
+                (_MULTIPLE_PERIODS, '.'),
+                (_SENTENCE_START, _capitalize_sentence),
+            ]
+        if collapse_repeated_chars:
+            self.rules.append((_REPEATED_CHARS, r'\1'))
+        if remove_repetitions:
+            self.rules.append((_REPEATED_WORDS, r'\1'))
+        self.rules += [(re.compile(pattern), repl) for pattern, repl in extra_rules]
+        self.collapse_last = bool(extra_rules)
+        self.loop_max_words = loop_max_words
+        self.loop_min_repeats = loop_min_repeats
+
+    def clean(self, text: str, sentence_start: bool = True) -> str:
+        """
+        Apply every rule to ``text``.
+
+        Args:
+            text: Raw transcript
+            sentence_start: Whether ``text`` starts a sentence (capitalized)
+        
+        Returns:
+            Cleaned text
+        """
+        for pattern, repl in self.rules:
+            if pattern is _SENTENCE_START and not sentence_start:
+                pattern = _SENTENCE_CONTINUE
+            text = pattern.sub(repl, text)
+            if pattern is _WHITESPACE:
+                text = text.strip()
+        if self.collapse_last:
+            text = _WHITESPACE.sub(' ', text)
+        text = text.strip()
+        if self.loop_max_words > 0:
+            text = collapse_loops(text, self.loop_max_words, self.loop_min_repeats)
+        return text
+
+
+_default_pipeline = CleaningPipeline()
+
+
+
 def remove_filler_words(text: str) -> str:
     """
     Remove common filler words from transcript.
@@ -23,14 +260,10 @@ def remove_filler_words(text: str) -> str:
     Returns:
         Cleaned text without filler words
     """
-    cleaned = text
-    for filler in FILLER_WORDS:
-        # Case-insensitive replacement with word boundaries
-        pattern = r'\b' + re.escape(filler) + r'\b'
-        cleaned = re.sub(pattern, '', cleaned, flags=re.IGNORECASE)
+    cleaned = _FILLER_PATTERN.sub('', text)
     
     # Clean up extra spaces
-    cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+    cleaned = _WHITESPACE.sub(' ', cleaned).strip()
     return cleaned
 
 def fix_punctuation(text: str) -> str:
@@ -44,30 +277,16 @@ def fix_punctuation(text: str) -> str:
         Text with corrected punctuation
     """
     # Remove space before punctuation
-    text = re.sub(r'\s+([.,!?;:])', r'\1', text)
+    text = _SPACE_BEFORE_PUNCT.sub(r'\1', text)
     
     # Add space after punctuation if missing
-    text = re.sub(r'([.,!?;:])([A-Za-z])', r'\1 \2', text)
+    text = _MISSING_SPACE_AFTER_PUNCT.sub(r'\1 \2', text)
     
     # Fix multiple periods
-    text = re.sub(r'\.{2,}', '.', text)
+    text = _MULTIPLE_PERIODS.sub('.', text)
     
     # Ensure proper capitalization at sentence start
-    sentences = re.split(r'([.!?])\s*', text)
-    result = []
-    capitalize_next = True
-    
-    for i, part in enumerate(sentences):
-        if part in ['.', '!', '?']:
-            result.append(part + ' ')
-            capitalize_next = True
-        elif part.strip():
-            if capitalize_next and part:
-                part = part[0].upper() + part[1:] if len(part) > 0 else part
-                capitalize_next = False
-            result.append(part)
-    
-    return ''.join(result).strip()
+    return _SENTENCE_START.sub(_capitalize_sentence, text).strip()
 
 def normalize_text(text: str) -> str:
     """
@@ -80,10 +299,10 @@ def normalize_text(text: str) -> str:
         Normalized text
     """
     # Remove special unicode characters but keep common punctuation
-    text = re.sub(r'[^\w\s\-.,!?;:\'"()]', '', text, flags=re.UNICODE)
+    text = _SPECIAL_CHARS.sub('', text)
     
     # Replace multiple spaces with single space
-    text = re.sub(r'\s+', ' ', text)
+    text = _WHITESPACE.sub(' ', text)
     
     return text.strip()
 
@@ -115,58 +334,128 @@ def remove_repetitions(text: str) -> str:
     Returns:
         Text with repeated phrases removed
     """
-    words = text.split()
-    
     # Remove consecutive duplicate words
-    cleaned_words = []
-    prev_word = None
-    for word in words:
-        if word.lower() != prev_word:
-            cleaned_words.append(word)
-        prev_word = word.lower()
-    
-    return ' '.join(cleaned_words)
+    return _REPEATED_WORDS.sub(r'\1', _WHITESPACE.sub(' ', text).strip())
 
-def clean_transcript(text: str) -> str:
+def clean_transcript(text: str, pipeline: Optional[CleaningPipeline] = None) -> str:
     """
     Complete transcript cleaning pipeline.
     
+    Normalizes characters, removes filler words, fixes punctuation and
+    collapses repeated characters, words and phrase loops.
+    
     Args:
         text: Raw transcript from speech-to-text
+        pipeline: Rule set to apply (default: all rules with FILLER_WORDS)
     
     Returns:
         Cleaned and normalized transcript
     """
     logger.info("Starting transcript cleaning...")
-    
-    # Step 1: Normalize unicode characters
-    text = normalize_text(text)
-    logger.debug("Normalized unicode characters")
-    
-    # Step 2: Remove filler words
-    text = remove_filler_words(text)
-    logger.debug("Removed filler words")
-    
-    # Step 3: Fix punctuation
-    text = fix_punctuation(text)
-    logger.debug("Fixed punctuation")
-    
-    # Step 4: Remove repeated characters
-    text = re.sub(r'([a-z])\1{2,}', r'\1', text, flags=re.IGNORECASE)
-    logger.debug("Removed repeated characters")
-    
-    # Step 5: Remove consecutive duplicate words
-    text = remove_repetitions(text)
-    logger.debug("Removed repetitions")
-    
-    # Step 6: Final whitespace cleanup
-    text = re.sub(r'\s+', ' ', text).strip()
-    logger.debug("Final whitespace cleanup")
-    
+    text = (pipeline or _default_pipeline).clean(text)
     logger.info(f"Transcript cleaning completed")
     
     return text
 
+class StreamingCleaner:
+    """
+    Cleans Whisper segments one at a time, keeping their timestamps.
+
+    Each segment's text goes through the pipeline; the state that crosses
+    segment boundaries is carried over: whether the next segment starts a
+    sentence (capitalization) and the last word emitted (duplicate-word
+    collapse). One segment is held back so punctuation that opens the next
+    segment can be attached to it. Joined with spaces, the cleaned segments
+    match clean_transcript on the joined raw text, except at boundaries: filler
+    phrases split across two segments are kept, and a duplicate word followed
+    by punctuation from the next segment is still collapsed. Loops are
+    collapsed within a segment; a run of identical segments (Whisper's
+    hallucination loops usually repeat whole segments) is dropped from its
+    ``loop_min_repeats``-th copy on, so one copy fewer than that is kept where
+    clean_transcript would keep one.
+
+    Args:
+        pipeline: Rule set to apply (default: all rules with FILLER_WORDS)
+    """
+
+    def __init__(self, pipeline: Optional[CleaningPipeline] = None):
+        self.pipeline = pipeline or _default_pipeline
+        self._held = None  # last cleaned segment, not yet emitted
+        self._sentence_start = True
+        self._last_word = None
+        self._repeat_key = None  # text of the last segment kept, and how many times in a row
+        self._repeats = 0
+
+    def _after(self, text: str):
+        self._last_word = text.rsplit(' ', 1)[-1].lower()
+        self._sentence_start = text[-1] in '.!?'
+
+    def feed(self, segment: Dict) -> Optional[Dict]:
+        """
+        Clean one segment.
+
+        Args:
+            segment: Dict with 'text' (plus 'start', 'end', ...)
+        
+        Returns:
+            The previous segment, cleaned and final, or None if there is none yet
+            (call flush() after the last segment)
+        """
+        text = self.pipeline.clean(segment.get("text") or "", self._sentence_start)
+
+        punctuation = _LEADING_PUNCT.match(text)
+        if punctuation and self._held is not None:
+            # Only the punctuation rules; the held text is already clean
+            merged = _MULTIPLE_PERIODS.sub('.', self._held["text"] + punctuation.group())
+            merged = _SENTENCE_CONTINUE.sub(_capitalize_sentence, merged).strip()
+            self._held = {**self._held, "text": merged}
+            self._after(merged)
+            text = text[punctuation.end():].lstrip()
+
+        # Drop words repeating the last word emitted
+        words = text.split(' ') if text else []
+        skip = 0
+        while skip < len(words) and words[skip].lower() == self._last_word:
+            skip += 1
+        text = ' '.join(words[skip:])
+        if not text:
+            return None
+
+        key = text.lower()
+        self._repeats = self._repeats + 1 if key == self._repeat_key else 1
+        self._repeat_key = key
+        if self.pipeline.loop_max_words > 0 and self._repeats >= self.pipeline.loop_min_repeats:
+            return None
+
+        ready = self._held
+        self._held = {**segment, "text": text}
+        self._after(text)
+        return ready
+
+    def flush(self) -> Optional[Dict]:
+        """Return the held-back last segment, if any."""
+        ready, self._held = self._held, None
+        return ready
+
+    def clean_segments(self, segments: Iterable[Dict], final: bool = True) -> Iterator[Dict]:
+        """
+        Yield cleaned segments as ``segments`` arrive, skipping emptied ones.
+
+        Args:
+            segments: Raw segments
+            final: Flush the held-back segment at the end (False when more
+                batches of the same transcript follow)
+        """
+        for segment in segments:
+            cleaned = self.feed(segment)
+            if cleaned is not None:
+                yield cleaned
+        if final:
+            cleaned = self.flush()
+            if cleaned is not None:
+                yield cleaned
+
+
 def split_paragraphs(text: str, max_chars: int = 500) -> List[str]:
     """
     Split text into paragraphs for better readability.
@@ -0,0 +1,214 @@
+"""
+Extractive pre-compression of transcripts before LLM summarization.
+
+Sentences are scored locally and the best ones kept, in their original order,
+until a token budget is filled. Two scorers are available:
+
+- ``tfidf``: cosine similarity of each sentence's TF-IDF vector to the
+  document centroid (how typical the sentence is of the lecture)
+- ``textrank``: PageRank over the sentence cosine-similarity graph
+
+The TF-IDF matrix is kept as COO arrays and multiplied with ``np.bincount``,
+so TextRank never materializes the n x n similarity matrix: S @ v is computed
+as X @ (X.T @ v) in O(nonzeros). Sentences too similar to one already kept
+are skipped, since restatements are what most of the budget would go to.
+"""
+import re
+from typing import List, Tuple
+
+import numpy as np
+
+from config import config
+from nlp.chunker import chunk_by_tokens, count_tokens
+from nlp.cleaner import segment_into_sentences
+from utils.logger import logger
+
+METHODS = config.NOTES_COMPRESSION_METHODS
+
+TEXTRANK_DAMPING = 0.85
+TEXTRANK_MAX_ITER = 50
+TEXTRANK_TOL = 1e-6
+
+_WORD = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being
+below between both but by can could did do does doing down during each few for from further
+had has have having he her here hers herself him himself his how i if in into is it its itself
+just let me more most my myself no nor not now of off on once only or other our ours ourselves
+out over own same she should so some such than that the their theirs them themselves then there
+these they this those through to too under until up very was we were what when where which while
+who whom why will with would you your yours yourself yourselves um uh okay right yeah like gonna
+""".split())
+
+
+class TfidfMatrix:
+    """
+    L2-normalized TF-IDF sentence x term matrix in COO form.
+
+    Args:
+        sentences: Sentences (rows)
+    """
+
+    def __init__(self, sentences: List[str]):
+        vocabulary = {}
+        rows, cols = [], []
+        for i, sentence in enumerate(sentences):
+            for word in _WORD.findall(sentence.lower()):
+                if word not in STOPWORDS:
+                    rows.append(i)
+                    cols.append(vocabulary.setdefault(word, len(vocabulary)))
+
+        self.shape = (len(sentences), len(vocabulary))
+        if not rows:
+            self.rows = self.cols = np.zeros(0, dtype=np.int64)
+            self.data = np.zeros(0)
+            return
+
+        # Collapse repeated (row, term) pairs into counts
+        keys = np.asarray(rows, dtype=np.int64) * len(vocabulary) + np.asarray(cols, dtype=np.int64)
+        keys, counts = np.unique(keys, return_counts=True)
+        self.rows, self.cols = np.divmod(keys, len(vocabulary))
+
+        df = np.bincount(self.cols, minlength=len(vocabulary))
+        idf = np.log((1 + len(sentences)) / (1 + df)) + 1
+        data = (1 + np.log(counts)) * idf[self.cols]
+        norms = np.sqrt(np.bincount(self.rows, weights=data ** 2, minlength=len(sentences)))
+        self.data = data / np.where(norms > 0, norms, 1)[self.rows]
+
+    def dot(self, v: np.ndarray) -> np.ndarray:
+        """X @ v for a term-space vector."""
+        return np.bincount(self.rows, weights=self.data * v[self.cols], minlength=self.shape[0])
+
+    def tdot(self, u: np.ndarray) -> np.ndarray:
+        """X.T @ u for a sentence-space vector."""
+        return np.bincount(self.cols, weights=self.data * u[self.rows], minlength=self.shape[1])
+
+    def row(self, i: int) -> np.ndarray:
+        """Dense term vector of sentence ``i``."""
+        v = np.zeros(self.shape[1])
+        mask = self.rows == i
+        v[self.cols[mask]] = self.data[mask]
+        return v
+
+    def nonempty(self) -> np.ndarray:
+        return np.bincount(self.rows, minlength=self.shape[0]) > 0
+
+
+def tfidf_scores(matrix: TfidfMatrix) -> np.ndarray:
+    """Cosine similarity of each sentence to the normalized centroid."""
+    centroid = matrix.tdot(np.ones(matrix.shape[0]))
+    norm = np.linalg.norm(centroid)
+    return matrix.dot(centroid / norm) if norm else np.zeros(matrix.shape[0])
+
+
+def textrank_scores(matrix: TfidfMatrix) -> np.ndarray:
+    """
+    PageRank over the cosine-similarity graph without self-loops.
+
+    With S = X X^T - I (rows of X are unit length), each iteration is
+    r = (1 - d) / n + d * S (r / degree), using two sparse mat-vecs.
+    """
+    n = matrix.shape[0]
+    ones = np.ones(n)
+    degree = matrix.dot(matrix.tdot(ones)) - matrix.nonempty()
+    connected = degree > 1e-12
+    inv_degree = np.where(connected, 1 / np.where(connected, degree, 1), 0)
+
+    ranks = ones / n
+    for _ in range(TEXTRANK_MAX_ITER):
+        weighted = ranks * inv_degree
+        spread = matrix.dot(matrix.tdot(weighted)) - weighted * matrix.nonempty()
+        # Dangling sentences (no similar neighbours) spread their rank uniformly
+        dangling = ranks[~connected].sum() / n
+        updated = (1 - TEXTRANK_DAMPING) / n + TEXTRANK_DAMPING * (spread + dangling)
+        if np.abs(updated - ranks).sum() < TEXTRANK_TOL:
+            return updated
+        ranks = updated
+    return ranks
+
+
+def select_sentences(
+    matrix: TfidfMatrix,
+    scores: np.ndarray,
+    tokens: np.ndarray,
+    max_tokens: int,
+    redundancy: float = 0.8,
+) -> np.ndarray:
+    """
+    Greedily keep the highest-scoring sentences that fit the budget.
+
+    Args:
+        matrix: TF-IDF matrix of the sentences
+        scores: Sentence scores
+        tokens: Token count of each sentence
+        max_tokens: Budget for the kept sentences
+        redundancy: Skip sentences with cosine similarity above this to a kept one (>= 1 disables)
+
+    Returns:
+        Indices of kept sentences in original order
+    """
+    kept = []
+    used = 0
+    closest = np.zeros(matrix.shape[0])  # highest similarity to any kept sentence
+    for i in np.argsort(-scores, kind="stable"):
+        if used + tokens[i] > max_tokens or closest[i] > redundancy:
+            continue
+        kept.append(i)
+        used += tokens[i]
+        if redundancy < 1:
+            np.maximum(closest, matrix.dot(matrix.row(i)), out=closest)
+    return np.sort(np.asarray(kept, dtype=np.int64))
+
+
+def compress_transcript(
+    text: str,
+    max_tokens: int,
+    method: str = "textrank",
+    redundancy: float = 0.8,
+) -> Tuple[str, dict]:
+    """
+    Cut a transcript down to ``max_tokens`` by keeping its most central sentences.
+
+    Args:
+        text: Cleaned transcript
+        max_tokens: Token budget of the result
+        method: Sentence scorer, "tfidf" or "textrank"
+        redundancy: Similarity above which a sentence counts as a restatement
+
+    Returns:
+        (compressed text, stats with 'sentences', 'kept', 'tokens_in' and 'tokens_out')
+
+    Raises:
+        ValueError: If the method is unknown
+    """
+    if method not in METHODS:
+        raise ValueError(f"Unknown compression method {method!r}, expected one of {METHODS}")
+
+    tokens_in = count_tokens(text)
+    sentences = segment_into_sentences(text)
+    if tokens_in <= max_tokens or len(sentences) < 2:
+        return text, {"sentences": len(sentences), "kept": len(sentences),
+                      "tokens_in": tokens_in, "tokens_out": tokens_in}
+
+    matrix = TfidfMatrix(sentences)
+    scores = textrank_scores(matrix) if method == "textrank" else tfidf_scores(matrix)
+    tokens = np.array([count_tokens(s) for s in sentences])
+    kept = select_sentences(matrix, scores, tokens, max_tokens, redundancy)
+
+    if len(kept):
+        compressed = " ".join(sentences[i] for i in kept)
+        tokens_out = int(tokens[kept].sum())
+    else:
+        # Every sentence is over budget (e.g. unpunctuated text): cut the best one to size
+        best = int(np.argmax(scores))
+        compressed = chunk_by_tokens(sentences[best], max_tokens, 0)[0]
+        kept = [best]
+        tokens_out = count_tokens(compressed)
+    stats = {"sentences": len(sentences), "kept": len(kept),
+             "tokens_in": tokens_in, "tokens_out": tokens_out}
+    logger.info(
+        f"Compressed transcript with {method}: {stats['kept']}/{stats['sentences']} sentences, "
+        f"{stats['tokens_in']} -> {stats['tokens_out']} tokens"
+    )
+    return compressed, stats
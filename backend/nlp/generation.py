@@ -0,0 +1,176 @@
+"""
+Study material generation: notes, quiz and flashcards from one transcript.
+
+The prompt templates in config.PROMPTS_DIR are parsed once per process. A
+transcript is condensed once (it is used as-is when it fits all three prompts
+on the notes model's context window, otherwise turned into notes) and the
+three outputs are then generated from that summary concurrently, so the
+whole set takes about as long as the slowest request.
+"""
+import asyncio
+import logging
+import re
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from config import config
+from nlp.llm_client import aclose_async_client, llm_available
+from nlp.summarizer import NOTES_MAX_TOKENS, acached_complete, acondense, prepare_transcript
+from nlp.token_budget import PromptBudget
+from output.formatter import format_flashcards_for_export, format_quiz_for_export
+
+logger = logging.getLogger(__name__)
+
+QUIZ_NUM_QUESTIONS = 10
+QUIZ_MAX_TOKENS = 1500
+FLASHCARDS_MAX_TOKENS = 1000
+
+TEMPLATE_FILES = {
+    "notes": "notes_prompt.txt",
+    "quiz": "quiz_promtp.txt",
+    "flashcards": "flashcard_prompt.txt",
+}
+
+OUTPUT_MAX_TOKENS = {
+    "notes": NOTES_MAX_TOKENS,
+    "quiz": QUIZ_MAX_TOKENS,
+    "flashcards": FLASHCARDS_MAX_TOKENS,
+}
+
+_PLACEHOLDER = re.compile(r"\{([A-Z_]+)\}")
+
+
+class PromptTemplate:
+    """
+    Prompt with ``{NAME}`` placeholders, split into literal text and fields once.
+
+    Only upper-case names are placeholders, so other braces in a template
+    (code, LaTeX, JSON examples) are left alone.
+    """
+
+    def __init__(self, text: str):
+        self.text = text
+        pieces = _PLACEHOLDER.split(text)
+        self.literals: List[str] = pieces[0::2]
+        self.fields: List[str] = pieces[1::2]
+
+    def render(self, **values) -> str:
+        """
+        Fill in the placeholders.
+
+        Raises:
+            KeyError: If a placeholder has no value
+        """
+        out = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            out.append(str(values[field]))
+            out.append(literal)
+        return "".join(out)
+
+
+def _prompts_dir() -> Path:
+    path = Path(config.PROMPTS_DIR)
+    return path if path.is_absolute() else Path(__file__).resolve().parent.parent / path
+
+
+@lru_cache(maxsize=1)
+def load_templates() -> Dict[str, PromptTemplate]:
+    """
+    Read and parse the notes, quiz and flashcard templates (cached).
+
+    Raises:
+        FileNotFoundError: If a template is missing
+    """
+    directory = _prompts_dir()
+    return {
+        name: PromptTemplate((directory / filename).read_text(encoding="utf-8"))
+        for name, filename in TEMPLATE_FILES.items()
+    }
+
+
+def summary_budget() -> int:
+    """Largest summary, in tokens, that fits every template next to its completion budget."""
+    templates = load_templates()
+    return min(
+        PromptBudget(templates[name].text, max_tokens, config.NOTES_MODEL).input_tokens
+        for name, max_tokens in OUTPUT_MAX_TOKENS.items()
+    )
+
+
+def _requests(summary: str, num_questions: int) -> Dict[str, Tuple[str, int]]:
+    """Output name -> (prompt, max_tokens)."""
+    templates = load_templates()
+    return {
+        name: (templates[name].render(SUMMARY=summary, NUM_QUESTIONS=num_questions), max_tokens)
+        for name, max_tokens in OUTPUT_MAX_TOKENS.items()
+    }
+
+
+async def agenerate_study_materials(
+    transcript: str,
+    num_questions: int = QUIZ_NUM_QUESTIONS,
+) -> Optional[Dict]:
+    """
+    Generate notes, quiz and flashcards from one shared summary.
+
+    Args:
+        transcript: Lecture transcript
+        num_questions: Quiz questions to ask for
+
+    Returns:
+        Dict with 'summary', 'notes', 'quiz', 'quiz_items', 'flashcards' and
+        'flashcard_items' ('*_items' are the parsed export lists). An output
+        whose request failed is None and the others are still returned.
+        None if the LLM is unavailable or the summary couldn't be built.
+    """
+    if not llm_available():
+        logger.warning("LLM unavailable - skipping study material generation")
+        return None
+
+    try:
+        transcript = await asyncio.to_thread(prepare_transcript, transcript)
+        summary = await acondense(transcript, summary_budget())
+    except Exception:
+        logger.exception("Failed to condense transcript")
+        return None
+
+    requests = _requests(summary, num_questions)
+    results = await asyncio.gather(
+        *[acached_complete(prompt, max_tokens) for prompt, max_tokens in requests.values()],
+        return_exceptions=True,
+    )
+
+    outputs = {}
+    for name, result in zip(requests, results):
+        if isinstance(result, BaseException):
+            logger.error(f"Failed to generate {name}: {result}")
+            result = None
+        outputs[name] = result
+
+    return {
+        "summary": summary,
+        "notes": outputs["notes"],
+        "quiz": outputs["quiz"],
+        "quiz_items": format_quiz_for_export(outputs["quiz"]) if outputs["quiz"] else [],
+        "flashcards": outputs["flashcards"],
+        "flashcard_items": (
+            format_flashcards_for_export(outputs["flashcards"]) if outputs["flashcards"] else []
+        ),
+    }
+
+
+async def _generate_once(transcript: str, num_questions: int) -> Optional[Dict]:
+    try:
+        return await agenerate_study_materials(transcript, num_questions)
+    finally:
+        await aclose_async_client()
+
+
+def generate_study_materials(transcript: str, num_questions: int = QUIZ_NUM_QUESTIONS) -> Optional[Dict]:
+    """
+    Sync variant of agenerate_study_materials (e.g. for Streamlit).
+
+    Must not be called from a running event loop.
+    """
+    return asyncio.run(_generate_once(transcript, num_questions))
@@ -0,0 +1,214 @@
+"""
+Pooled Groq client shared by every LLM call in the process.
+
+Connections are kept alive between requests so TLS and TCP setup are paid
+once per connection rather than once per call. The async client is bound to
+the event loop it was created on (httpx connections can't move between
+loops), so one is kept per running loop: the FastAPI loop reuses a single
+client for its lifetime, and short-lived loops such as ``asyncio.run`` in the
+sync note path close theirs with ``aclose_async_client``.
+
+All calls pass through one LLMScheduler so concurrent jobs stay within the
+provider's request and token rate limits.
+"""
+try:
+    from groq import AsyncGroq, Groq, DefaultAsyncHttpxClient, DefaultHttpxClient
+    GROQ_AVAILABLE = True
+except ImportError:
+    GROQ_AVAILABLE = False
+    AsyncGroq = Groq = DefaultAsyncHttpxClient = DefaultHttpxClient = None
+
+import asyncio
+import logging
+import threading
+import weakref
+from typing import AsyncIterator, Iterator, Optional
+
+import httpx
+
+from config import config
+from nlp.chunker import count_tokens
+from nlp.llm_scheduler import LLMScheduler
+
+logger = logging.getLogger(__name__)
+
+_lock = threading.Lock()
+_sync_client = None
+_async_clients = weakref.WeakKeyDictionary()  # event loop -> AsyncGroq
+
+scheduler = LLMScheduler(
+    config.LLM_REQUESTS_PER_MINUTE,
+    config.LLM_TOKENS_PER_MINUTE,
+    max_attempts=config.LLM_RETRY_ATTEMPTS,
+    base_delay=config.LLM_RETRY_BASE_DELAY,
+    max_delay=config.LLM_RETRY_MAX_DELAY,
+)
+
+
+class LLMUnavailableError(RuntimeError):
+    """Raised when groq isn't installed or GROQ_API_KEY isn't set."""
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(config.LLM_TIMEOUT_SECONDS, connect=config.LLM_CONNECT_TIMEOUT_SECONDS)
+
+
+def _limits() -> httpx.Limits:
+    return httpx.Limits(
+        max_connections=config.LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=config.LLM_KEEPALIVE_CONNECTIONS,
+        keepalive_expiry=config.LLM_KEEPALIVE_EXPIRY_SECONDS,
+    )
+
+
+def _check_available():
+    if not GROQ_AVAILABLE:
+        raise LLMUnavailableError("Groq not installed. Install with: pip install groq")
+    if not config.GROQ_API_KEY:
+        raise LLMUnavailableError("GROQ_API_KEY not set")
+
+
+def llm_available() -> bool:
+    try:
+        _check_available()
+        return True
+    except LLMUnavailableError:
+        return False
+
+
+def get_sync_client():
+    """
+    Process-wide Groq client with a pooled keep-alive connection.
+
+    Raises:
+        LLMUnavailableError: If groq or the API key is missing
+    """
+    global _sync_client
+    _check_available()
+    with _lock:
+        if _sync_client is None:
+            _sync_client = Groq(
+                api_key=config.GROQ_API_KEY,
+                base_url=config.GROQ_BASE_URL,
+                max_retries=0,  # the scheduler owns retries so they go through its rate limits
+                http_client=DefaultHttpxClient(timeout=_timeout(), limits=_limits()),
+            )
+        return _sync_client
+
+
+def get_async_client():
+    """
+    AsyncGroq client for the running event loop, created on first use.
+
+    Raises:
+        LLMUnavailableError: If groq or the API key is missing
+    """
+    _check_available()
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = AsyncGroq(
+            api_key=config.GROQ_API_KEY,
+            base_url=config.GROQ_BASE_URL,
+            max_retries=0,  # the scheduler owns retries so they go through its rate limits
+            http_client=DefaultAsyncHttpxClient(timeout=_timeout(), limits=_limits()),
+        )
+        _async_clients[loop] = client
+    return client
+
+
+async def aclose_async_client():
+    """Close the running loop's client (call before the loop shuts down)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.close()
+
+
+def close_sync_client():
+    global _sync_client
+    with _lock:
+        if _sync_client is not None:
+            _sync_client.close()
+            _sync_client = None
+
+
+def _request(prompt: str, model: Optional[str], temperature: float, max_tokens: int) -> dict:
+    return {
+        "model": model or config.NOTES_MODEL,
+        "messages": [{"role": "user", "content": prompt}],
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }
+
+
+def _estimated_tokens(request: dict) -> int:
+    """Prompt tokens plus the completion budget, as counted against TPM."""
+    return sum(count_tokens(m["content"]) for m in request["messages"]) + request["max_tokens"]
+
+
+def complete(prompt: str, model: Optional[str] = None, temperature: float = 0.5, max_tokens: int = 800) -> str:
+    """
+    Run one chat completion on the pooled sync client.
+
+    Args:
+        prompt: User message
+        model: Groq model (default: config.NOTES_MODEL)
+        temperature: Sampling temperature
+        max_tokens: Completion limit
+
+    Returns:
+        Stripped completion text
+
+    Raises:
+        LLMUnavailableError: If groq or the API key is missing
+    """
+    request = _request(prompt, model, temperature, max_tokens)
+    client = get_sync_client()
+    response = scheduler.run(
+        lambda: client.chat.completions.create(**request), _estimated_tokens(request)
+    )
+    return response.choices[0].message.content.strip()
+
+
+async def acomplete(prompt: str, model: Optional[str] = None, temperature: float = 0.5, max_tokens: int = 800) -> str:
+    """
+    Async variant of complete() on the running loop's pooled client.
+    """
+    request = _request(prompt, model, temperature, max_tokens)
+    client = get_async_client()
+    response = await scheduler.arun(
+        lambda: client.chat.completions.create(**request), _estimated_tokens(request)
+    )
+    return response.choices[0].message.content.strip()
+
+
+def stream(prompt: str, model: Optional[str] = None, temperature: float = 0.5, max_tokens: int = 800) -> Iterator[str]:
+    """
+    Like complete(), but yield the completion text as it is generated.
+    """
+    request = _request(prompt, model, temperature, max_tokens)
+    client = get_sync_client()
+    chunks = scheduler.run(
+        lambda: client.chat.completions.create(**request, stream=True), _estimated_tokens(request)
+    )
+    with chunks:
+        for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
+
+
+async def astream(prompt: str, model: Optional[str] = None, temperature: float = 0.5, max_tokens: int = 800) -> AsyncIterator[str]:
+    """
+    Async variant of stream() on the running loop's pooled client.
+    """
+    request = _request(prompt, model, temperature, max_tokens)
+    client = get_async_client()
+    chunks = await scheduler.arun(
+        lambda: client.chat.completions.create(**request, stream=True), _estimated_tokens(request)
+    )
+    async with chunks:
+        async for chunk in chunks:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
@@ -0,0 +1,210 @@
+"""
+Rate-limit-aware scheduling of LLM requests.
+
+Every request reserves one unit from a requests-per-minute bucket and its
+estimated tokens from a tokens-per-minute bucket before it is sent. Buckets
+may go into debt: a reservation that can't be covered now returns how long
+the caller must wait, and because reservations are taken under one lock in
+arrival order, waiting callers are released first-in first-out. Rate-limit
+responses (HTTP 429) and transient failures (connection errors, timeouts,
+5xx) are retried here with jittered exponential backoff, each retry taking a
+fresh reservation; the clients themselves are built without retries.
+
+The scheduler is shared by threads and event loops alike; the sync API
+sleeps the calling thread and the async API sleeps the calling coroutine.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Awaitable, Callable, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class TokenBucket:
+    """
+    Bucket of ``capacity`` units refilled continuously at ``rate`` units/s.
+    Not thread-safe on its own; LLMScheduler serializes access.
+    """
+
+    def __init__(self, capacity: float, rate: float):
+        self.capacity = capacity
+        self.rate = rate
+        self.level = capacity
+        self._updated = time.monotonic()
+
+    def reserve(self, amount: float, now: float) -> float:
+        """
+        Take ``amount`` units (going into debt if needed).
+
+        Returns:
+            Seconds until the reservation is covered (0 when available now)
+        """
+        self.level = min(self.capacity, self.level + (now - self._updated) * self.rate)
+        self._updated = now
+        self.level -= min(amount, self.capacity)  # oversize requests wait for a full bucket at most
+        return max(0.0, -self.level / self.rate)
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def is_transient_error(error: Exception) -> bool:
+    """Failures worth retrying besides rate limits: connection errors, timeouts and 5xx."""
+    status = getattr(error, "status_code", None)
+    if status is not None:
+        return status in (408, 409) or status >= 500
+    return type(error).__name__ in ("APIConnectionError", "APITimeoutError")
+
+
+def _retry_after(error: Exception) -> Optional[float]:
+    """Server-suggested delay from a 429 response, if any."""
+    response = getattr(error, "response", None)
+    value = response.headers.get("retry-after") if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+class LLMScheduler:
+    """
+    Central FIFO queue for LLM calls under provider rate limits.
+
+    Args:
+        requests_per_minute: Provider RPM limit (0 disables that bucket)
+        tokens_per_minute: Provider TPM limit (0 disables that bucket)
+        max_attempts: Tries per request when rate limited or failing transiently
+        base_delay: First backoff delay in seconds (doubled per attempt)
+        max_delay: Backoff cap in seconds
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: int,
+        tokens_per_minute: int,
+        max_attempts: int = 5,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+    ):
+        self._requests = TokenBucket(requests_per_minute, requests_per_minute / 60) if requests_per_minute else None
+        self._tokens = TokenBucket(tokens_per_minute, tokens_per_minute / 60) if tokens_per_minute else None
+        self.max_attempts = max(1, max_attempts)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._lock = threading.Lock()
+        self.waiting = 0
+        self.in_flight = 0
+        self.completed = 0
+        self.rate_limited = 0
+        self.failed = 0
+
+    def _reserve(self, tokens: int) -> float:
+        with self._lock:
+            now = time.monotonic()
+            delay = 0.0
+            if self._requests is not None:
+                delay = max(delay, self._requests.reserve(1, now))
+            if self._tokens is not None:
+                delay = max(delay, self._tokens.reserve(tokens, now))
+            return delay
+
+    def _retry_delay(self, attempt: int, error: Exception) -> float:
+        """Backoff before the next attempt; re-raises errors that aren't retried."""
+        rate_limited = is_rate_limit_error(error)
+        if not (rate_limited or is_transient_error(error)) or attempt == self.max_attempts - 1:
+            self._count(failed=1)
+            raise error
+        if rate_limited:
+            self._count(rate_limited=1)
+        delay = min(self.max_delay, self.base_delay * 2 ** attempt)
+        delay = random.uniform(delay / 2, delay)  # jitter so retries don't stampede
+        delay = max(delay, _retry_after(error) or 0.0)
+        reason = "rate limited" if rate_limited else f"failed ({type(error).__name__})"
+        logger.warning(f"LLM request {reason}, retrying in {delay:.1f}s (attempt {attempt + 1})")
+        return delay
+
+    def _count(self, **deltas):
+        with self._lock:
+            for name, delta in deltas.items():
+                setattr(self, name, getattr(self, name) + delta)
+
+    async def _async_wait(self, delay: float):
+        if delay:
+            self._count(waiting=1)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                self._count(waiting=-1)
+
+    def _wait(self, delay: float):
+        if delay:
+            self._count(waiting=1)
+            try:
+                time.sleep(delay)
+            finally:
+                self._count(waiting=-1)
+
+    async def arun(self, call: Callable[[], Awaitable[T]], tokens: int) -> T:
+        """
+        Run ``call()`` once the buckets allow it, retrying on rate limits.
+
+        Args:
+            call: Coroutine factory performing the request
+            tokens: Estimated prompt + completion tokens
+
+        Returns:
+            The call's result
+
+        Raises:
+            Exception: The last error when attempts run out or it isn't a rate limit
+        """
+        for attempt in range(self.max_attempts):
+            await self._async_wait(self._reserve(tokens))
+            self._count(in_flight=1)
+            try:
+                result = await call()
+            except Exception as e:
+                error = e
+            else:
+                self._count(completed=1)
+                return result
+            finally:
+                self._count(in_flight=-1)
+            await self._async_wait(self._retry_delay(attempt, error))
+
+    def run(self, call: Callable[[], T], tokens: int) -> T:
+        """Blocking variant of arun() for sync callers."""
+        for attempt in range(self.max_attempts):
+            self._wait(self._reserve(tokens))
+            self._count(in_flight=1)
+            try:
+                result = call()
+            except Exception as e:
+                error = e
+            else:
+                self._count(completed=1)
+                return result
+            finally:
+                self._count(in_flight=-1)
+            self._wait(self._retry_delay(attempt, error))
+
+    @property
+    def depth(self) -> int:
+        """Requests waiting for rate-limit budget or a retry."""
+        return self.waiting
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "queue_depth": self.waiting,
+                "in_flight": self.in_flight,
+                "completed": self.completed,
+                "rate_limited": self.rate_limited,
+                "failed": self.failed,
+            }
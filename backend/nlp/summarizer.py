@@ -1,48 +1,523 @@
-try:
-    from groq import Groq
-    GROQ_AVAILABLE = True
-except ImportError:
-    GROQ_AVAILABLE = False
-    Groq = None
-
-import os
+import asyncio
+import hashlib
+import json
 import logging
+import re
+import threading
+from typing import AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, Iterator, List, Optional
+
+from config import config
+from nlp.chunker import astream_chunk_by_time, chunk_by_tokens, count_tokens
+from nlp.cleaner import clean_transcript
+from nlp.compressor import compress_transcript
+from nlp.llm_client import (
+    GROQ_AVAILABLE, aclose_async_client, acomplete, astream, complete, llm_available, stream,
+)
+from nlp.token_budget import MapReducePlan, PromptBudget, plan_map_reduce, reduce_fan_in
+from utils.disk_cache import DiskCache
 
 logger = logging.getLogger(__name__)
 
-GROQ_API_KEY = os.getenv("GROQ_API_KEY")
+NOTES_TEMPERATURE = 0.5
+NOTES_MAX_TOKENS = 800
 
-def generate_notes(text: str) -> str:
-    """Generate study notes from lecture transcript using Groq API.
-    
-    Returns None if GROQ_API_KEY is not set or groq not installed.
-    """
+NOTES_PROMPT = """
+Create clear, structured study notes from this lecture transcript.
+Use headings and bullet points.
+
+Transcript:
+{text}
+"""
+
+MAP_PROMPT = """
+Create clear, structured study notes from part {index} of {total} of a lecture transcript.
+Use headings and bullet points. Keep definitions, formulas and examples.
+
+Transcript part:
+{text}
+"""
+
+WINDOW_MAP_PROMPT = """
+Create clear, structured study notes from the part of a lecture transcript between {start} and {end}.
+Use headings and bullet points. Keep definitions, formulas and examples.
+
+Transcript part:
+{text}
+"""
+
+REDUCE_PROMPT = """
+Merge these partial study notes from consecutive parts of one lecture into a single set
+of clear, structured study notes. Keep the lecture order, remove repetition and keep
+all definitions, formulas and examples. Use headings and bullet points.
+
+{notes}
+"""
+
+
+def _notes_available() -> bool:
+    """Whether notes can be generated; logs why not otherwise."""
+    if llm_available():
+        return True
     if not GROQ_AVAILABLE:
         logger.warning("Groq not installed - skipping note generation. Install with: pip install groq")
-        return None
-    
-    if not GROQ_API_KEY:
+    else:
         logger.warning("GROQ_API_KEY not set - skipping note generation")
+    return False
+
+
+def prepare_transcript(text: str) -> str:
+    """
+    Clean and extractively compress a transcript before it is sent to the LLM.
+
+    A no-op unless config.NOTES_COMPRESSION_METHOD is set; then the cleaned
+    transcript is cut to config.NOTES_COMPRESSION_TOKENS, keeping sentence order.
+    """
+    if not config.NOTES_COMPRESSION_METHOD:
+        return text
+    compressed, _ = compress_transcript(
+        clean_transcript(text),
+        config.NOTES_COMPRESSION_TOKENS,
+        config.NOTES_COMPRESSION_METHOD,
+        config.NOTES_COMPRESSION_REDUNDANCY,
+    )
+    return compressed
+
+
+def llm_cache_key(prompt: str, model: str, temperature: float, max_tokens: int) -> str:
+    """Hash of the whitespace-normalized prompt and the request parameters."""
+    payload = json.dumps({
+        "prompt": re.sub(r"\s+", " ", prompt).strip(),
+        "model": model,
+        "temperature": temperature,
+        "max_tokens": max_tokens,
+    }, sort_keys=True)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LLMResponseCache:
+    """
+    Disk-backed LRU cache of completions with a TTL.
+
+    Tracks the tokens (prompt + completion) that hits saved sending to Groq.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: float, skip_sampled: bool = False):
+        self._cache = DiskCache(directory, max_bytes, ttl_seconds)
+        self.skip_sampled = skip_sampled
+        self.saved_tokens = 0
+        self._lock = threading.Lock()
+
+    def enabled_for(self, temperature: float) -> bool:
+        return not (self.skip_sampled and temperature > 0)
+
+    def get(self, key: str) -> Optional[str]:
+        entry = self._cache.get(key)
+        if entry is None:
+            return None
+        with self._lock:
+            self.saved_tokens += entry.get("tokens", 0)
+        return entry["response"]
+
+    def put(self, key: str, prompt: str, response: str):
+        tokens = count_tokens(prompt) + count_tokens(response)
+        self._cache.put(key, {"response": response, "tokens": tokens})
+
+    def purge(self) -> int:
+        return self._cache.purge()
+
+    def stats(self) -> dict:
+        stats = self._cache.stats()
+        stats["saved_tokens"] = self.saved_tokens
+        return stats
+
+
+llm_cache = LLMResponseCache(
+    config.LLM_CACHE_DIR,
+    config.LLM_CACHE_MAX_MB * 1024 * 1024,
+    config.LLM_CACHE_TTL_SECONDS,
+    skip_sampled=config.LLM_CACHE_SKIP_SAMPLED,
+) if config.LLM_CACHE_ENABLED else None
+
+
+def _cache_key(prompt: str, max_tokens: int) -> Optional[str]:
+    """Cache key for a notes call, or None when the cache is off for it."""
+    if llm_cache is None or not llm_cache.enabled_for(NOTES_TEMPERATURE):
         return None
+    return llm_cache_key(prompt, config.NOTES_MODEL, NOTES_TEMPERATURE, max_tokens)
+
+
+def _cache_lookup(prompt: str, max_tokens: int = NOTES_MAX_TOKENS):
+    """Return (key, cached response); key is None when the cache is off for this call."""
+    key = _cache_key(prompt, max_tokens)
+    return key, llm_cache.get(key) if key else None
+
+
+async def _acache_lookup(prompt: str, max_tokens: int = NOTES_MAX_TOKENS):
+    """Async variant of _cache_lookup(); the disk read runs off the event loop."""
+    key = _cache_key(prompt, max_tokens)
+    return key, await asyncio.to_thread(llm_cache.get, key) if key else None
+
+
+def cached_complete(prompt: str, max_tokens: int = NOTES_MAX_TOKENS) -> str:
+    """
+    Complete ``prompt`` with the notes model, going through the response cache.
+
+    Args:
+        prompt: Full prompt
+        max_tokens: Completion limit (part of the cache key)
 
+    Returns:
+        Completion text
+    """
+    key, cached = _cache_lookup(prompt, max_tokens)
+    if cached is not None:
+        return cached
+    response = complete(prompt, config.NOTES_MODEL, NOTES_TEMPERATURE, max_tokens)
+    if key:
+        llm_cache.put(key, prompt, response)
+    return response
+
+
+async def acached_complete(prompt: str, max_tokens: int = NOTES_MAX_TOKENS) -> str:
+    """Async variant of cached_complete() on the running loop's pooled client."""
+    key, cached = await _acache_lookup(prompt, max_tokens)
+    if cached is not None:
+        return cached
+    response = await acomplete(prompt, config.NOTES_MODEL, NOTES_TEMPERATURE, max_tokens)
+    if key:
+        await asyncio.to_thread(llm_cache.put, key, prompt, response)
+    return response
+
+
+def _merge_prompt(parts: List[str]) -> str:
+    return REDUCE_PROMPT.format(notes="\n\n---\n\n".join(parts))
+
+
+def plan_notes(text: str) -> MapReducePlan:
+    """
+    Plan the note calls for ``text`` on config.NOTES_MODEL's context window.
+
+    The NOTES_MAP_REDUCE_MIN_TOKENS, NOTES_CHUNK_TOKENS and NOTES_REDUCE_FAN_IN
+    settings cap the plan when set.
+    """
+    plan = plan_map_reduce(
+        count_tokens(text),
+        NOTES_PROMPT,
+        MAP_PROMPT,
+        REDUCE_PROMPT,
+        NOTES_MAX_TOKENS,
+        overlap=config.NOTES_CHUNK_OVERLAP,
+        model=config.NOTES_MODEL,
+        max_single_tokens=config.NOTES_MAP_REDUCE_MIN_TOKENS,
+        max_chunk_tokens=config.NOTES_CHUNK_TOKENS,
+        max_fan_in=config.NOTES_REDUCE_FAN_IN,
+    )
+    logger.info(f"Note plan: {plan}")
+    return plan
+
+
+async def _gather_or_cancel(calls: Iterable[Awaitable]) -> list:
+    """asyncio.gather() that cancels the calls still running once one fails."""
+    tasks = [asyncio.ensure_future(call) for call in calls]
     try:
-        client = Groq(api_key=GROQ_API_KEY)
-        prompt = f"""
-Create clear, structured study notes from this lecture transcript.
-Use headings and bullet points.
+        return await asyncio.gather(*tasks)
+    finally:
+        # No-op for finished tasks; otherwise the failed map/reduce leaves calls
+        # queued on the semaphore and the rate limiter
+        for task in tasks:
+            task.cancel()
+
+
+async def _map_reduce_parts(
+    text: str,
+    plan: MapReducePlan,
+    concurrency: int = None,
+) -> List[str]:
+    """
+    Summarize transcript chunks concurrently, then merge the partial notes
+    in a tree of ``plan.fan_in``-way reductions until at most that many remain
+    (the caller makes the final merge, possibly streamed).
+
+    Args:
+        text: Transcript
+        plan: Map-reduce plan from plan_notes()
+        concurrency: Maximum LLM calls in flight (default: config.NOTES_CONCURRENCY)
+
+    Returns:
+        Partial notes in lecture order
+    """
+    concurrency = concurrency or config.NOTES_CONCURRENCY
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def call(prompt: str) -> str:
+        async with semaphore:
+            return await acached_complete(prompt, plan.output_tokens)
+
+    chunks = chunk_by_tokens(text, plan.chunk_tokens, plan.overlap)
+    parts = await _gather_or_cancel(
+        call(MAP_PROMPT.format(index=i + 1, total=len(chunks), text=chunk))
+        for i, chunk in enumerate(chunks)
+    )
+    return await _reduce_parts(parts, plan.fan_in, call)
+
+
+async def _reduce_parts(parts: List[str], fan_in: int, call: Callable) -> List[str]:
+    """Merge partial notes ``fan_in`` at a time until at most ``fan_in`` remain."""
+    chunks = len(parts)
+
+    async def reduce(group: List[str]) -> str:
+        if len(group) == 1:
+            return group[0]
+        return await call(_merge_prompt(group))
+
+    depth = 0
+    while len(parts) > fan_in:
+        groups = [parts[i:i + fan_in] for i in range(0, len(parts), fan_in)]
+        parts = await _gather_or_cancel(reduce(group) for group in groups)
+        depth += 1
+
+    logger.info(f"Summarized {chunks} chunks into {len(parts)} parts with {depth} reduce level(s)")
+    return list(parts)
+
+
+async def _anotes(text: str, plan: MapReducePlan) -> str:
+    if plan.single_call:
+        return await acached_complete(NOTES_PROMPT.format(text=text), plan.output_tokens)
+    parts = await _map_reduce_parts(text, plan)
+    return parts[0] if len(parts) == 1 else await acached_complete(_merge_prompt(parts), plan.output_tokens)
+
+
+async def acondense(text: str, max_tokens: int) -> str:
+    """
+    Condensed form of a transcript to generate study material from.
+
+    Args:
+        text: Transcript
+        max_tokens: Largest text the downstream prompts can take
+
+    Returns:
+        ``text`` itself when it fits, otherwise study notes of it
+    """
+    if count_tokens(text) <= max_tokens:
+        return text
+    return await _anotes(text, plan_notes(text))
+
+
+async def _map_reduce_parts_once(text: str, plan: MapReducePlan) -> List[str]:
+    """Map-reduce on a short-lived loop, closing that loop's pooled client."""
+    try:
+        return await _map_reduce_parts(text, plan)
+    finally:
+        await aclose_async_client()
+
+
+async def _astream_complete(prompt: str, max_tokens: int = NOTES_MAX_TOKENS) -> AsyncIterator[str]:
+    """Stream a completion, replaying a cached response in one piece."""
+    key, cached = await _acache_lookup(prompt, max_tokens)
+    if cached is not None:
+        yield cached
+        return
+    pieces = []
+    async for delta in astream(prompt, config.NOTES_MODEL, NOTES_TEMPERATURE, max_tokens):
+        pieces.append(delta)
+        yield delta
+    if key:
+        await asyncio.to_thread(llm_cache.put, key, prompt, "".join(pieces).strip())
+
+
+def _stream_complete(prompt: str, max_tokens: int = NOTES_MAX_TOKENS) -> Iterator[str]:
+    key, cached = _cache_lookup(prompt, max_tokens)
+    if cached is not None:
+        yield cached
+        return
+    pieces = []
+    for delta in stream(prompt, config.NOTES_MODEL, NOTES_TEMPERATURE, max_tokens):
+        pieces.append(delta)
+        yield delta
+    if key:
+        llm_cache.put(key, prompt, "".join(pieces).strip())
+
+
+async def agenerate_notes(text: str) -> Optional[str]:
+    """Async variant of generate_notes for use inside an event loop.
+
+    Calls share the loop's pooled client; long transcripts are summarized
+    with concurrent map-reduce calls.
+    """
+    if not _notes_available():
+        return None
+
+    try:
+        text = await asyncio.to_thread(prepare_transcript, text)
+        return await _anotes(text, plan_notes(text))
+    except Exception as e:
+        logger.exception("Failed to generate notes")
+        return None
 
-Transcript:
-{text}
-"""
 
-        response = client.chat.completions.create(
-            model="llama3-8b-8192",
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.5,
-            max_tokens=800,
-        )
+async def astream_notes(text: str) -> AsyncIterator[str]:
+    """Yield study notes as the LLM generates them.
 
-        return response.choices[0].message.content.strip()
+    Long transcripts are map-reduced first and the final merge is streamed.
+    Yields nothing if note generation is unavailable; API errors propagate.
+    """
+    if not _notes_available():
+        return
+
+    text = await asyncio.to_thread(prepare_transcript, text)
+    plan = plan_notes(text)
+    prompt = NOTES_PROMPT.format(text=text)
+    if not plan.single_call:
+        parts = await _map_reduce_parts(text, plan)
+        if len(parts) == 1:
+            yield parts[0]
+            return
+        prompt = _merge_prompt(parts)
+    async for delta in _astream_complete(prompt, plan.output_tokens):
+        yield delta
+
+
+def stream_notes(text: str) -> Iterator[str]:
+    """Sync variant of astream_notes (e.g. for st.write_stream).
+
+    Must not be called from a running event loop.
+    """
+    if not _notes_available():
+        return
+
+    text = prepare_transcript(text)
+    plan = plan_notes(text)
+    prompt = NOTES_PROMPT.format(text=text)
+    if not plan.single_call:
+        parts = asyncio.run(_map_reduce_parts_once(text, plan))
+        if len(parts) == 1:
+            yield parts[0]
+            return
+        prompt = _merge_prompt(parts)
+    yield from _stream_complete(prompt, plan.output_tokens)
+
+
+def _clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}:{minutes:02d}:{seconds:02d}" if hours else f"{minutes}:{seconds:02d}"
+
+
+def notes_window_tokens() -> int:
+    """Largest time-window chunk, in tokens, that one WINDOW_MAP_PROMPT call takes."""
+    limit = PromptBudget(WINDOW_MAP_PROMPT, NOTES_MAX_TOKENS, config.NOTES_MODEL).input_tokens
+    return min(limit, config.NOTES_CHUNK_TOKENS) if config.NOTES_CHUNK_TOKENS else limit
+
+
+async def astream_notes_pipelined(segments: AsyncIterable[Dict]) -> AsyncIterator[str]:
+    """Yield study notes for a transcript whose segments are still being produced.
+
+    Segments are grouped into config.NOTES_WINDOW_SECONDS chunks as they
+    arrive. Once the transcript is too long for one prompt, each closed chunk
+    is summarized right away (map step) while transcription continues, and
+    every ``fan_in`` consecutive partial notes are merged as soon as they
+    exist, so after the last segment only its chunk, the leftover merges and
+    the streamed final merge remain. Shorter transcripts get the single
+    streamed call of astream_notes, as do all transcripts when compression is
+    enabled (it needs the whole text).
+    Yields nothing if note generation is unavailable; API errors propagate.
+
+    Args:
+        segments: {start, end, text} dicts in time order, ending with the transcript
+    """
+    if not _notes_available():
+        return
+
+    chunk_tokens = notes_window_tokens()
+    single_tokens = PromptBudget(NOTES_PROMPT, NOTES_MAX_TOKENS, config.NOTES_MODEL).input_tokens
+    if config.NOTES_MAP_REDUCE_MIN_TOKENS:
+        single_tokens = min(single_tokens, config.NOTES_MAP_REDUCE_MIN_TOKENS)
+    if config.NOTES_COMPRESSION_METHOD:
+        single_tokens = float("inf")
+    fan_in = reduce_fan_in(REDUCE_PROMPT, NOTES_MAX_TOKENS, config.NOTES_MODEL, config.NOTES_REDUCE_FAN_IN)
+    semaphore = asyncio.Semaphore(config.NOTES_CONCURRENCY)
+
+    async def call(prompt: str) -> str:
+        async with semaphore:
+            return await acached_complete(prompt, NOTES_MAX_TOKENS)
+
+    async def merge(group: List[asyncio.Task]) -> str:
+        return await call(_merge_prompt(list(await asyncio.gather(*group))))
+
+    tasks: List[asyncio.Task] = []
+    levels: List[List[asyncio.Task]] = []  # partial notes not merged yet, by reduce depth
+
+    def add_part(task: asyncio.Task, level: int = 0):
+        tasks.append(task)
+        if len(levels) == level:
+            levels.append([])
+        levels[level].append(task)
+        if len(levels[level]) == fan_in:
+            group, levels[level] = levels[level], []
+            add_part(asyncio.create_task(merge(group)), level + 1)
+
+    def summarize(chunk: Dict):
+        start, end = _clock(chunk["start"]), _clock(chunk["end"])
+        pieces = [chunk["text"]]
+        if count_tokens(chunk["text"]) > chunk_tokens:
+            # A single segment can exceed the window's token limit
+            pieces = chunk_by_tokens(chunk["text"], chunk_tokens, 0)
+        for piece in pieces:
+            add_part(asyncio.create_task(call(WINDOW_MAP_PROMPT.format(start=start, end=end, text=piece))))
+
+    pending: List[Dict] = []  # chunks held back while the transcript may still fit one prompt
+    tokens = 0
+    try:
+        # Counted with the default tokenizer, like every other budget here: Groq
+        # model names aren't tiktoken models
+        async for chunk in astream_chunk_by_time(segments, config.NOTES_WINDOW_SECONDS, chunk_tokens):
+            pending.append(chunk)
+            tokens += count_tokens(chunk["text"])
+            if tokens > single_tokens:
+                for held in pending:
+                    summarize(held)
+                pending = []
+
+        if not tasks:
+            async for delta in astream_notes(" ".join(chunk["text"] for chunk in pending)):
+                yield delta
+            return
+
+        logger.info(f"Transcript complete, {len(tasks)} map/reduce call(s) started while transcribing")
+        for held in pending:
+            summarize(held)
+        # Deeper levels hold the earlier parts of the lecture
+        parts = await asyncio.gather(*[task for level in reversed(levels) for task in level])
+    finally:
+        # Stopped early (error or cancellation): don't leave calls running
+        for task in tasks:
+            task.cancel()
+
+    parts = await _reduce_parts(list(parts), fan_in, call)
+    if len(parts) == 1:
+        yield parts[0]
+        return
+    async for delta in _astream_complete(_merge_prompt(parts), NOTES_MAX_TOKENS):
+        yield delta
+
+def generate_notes(text: str) -> str:
+    """Generate study notes from lecture transcript using Groq API.
+
+    Transcripts that don't fit one prompt on config.NOTES_MODEL are split with
+    the chunker, summarized concurrently and merged (map-reduce).
+    Returns None if GROQ_API_KEY is not set or groq not installed.
+    Must not be called from a running event loop; use agenerate_notes there.
+    """
+    if not _notes_available():
+        return None
+
+    try:
+        text = prepare_transcript(text)
+        plan = plan_notes(text)
+        if plan.single_call:
+            return cached_complete(NOTES_PROMPT.format(text=text), plan.output_tokens)
+        parts = asyncio.run(_map_reduce_parts_once(text, plan))
+        return parts[0] if len(parts) == 1 else cached_complete(_merge_prompt(parts), plan.output_tokens)
     except Exception as e:
         logger.exception("Failed to generate notes")
         return None
@@ -0,0 +1,225 @@
+"""
+Token budgets for LLM prompts sized to the target model's context window.
+
+A request must fit prompt template + inserted text + completion budget into
+the model's context window. PromptBudget measures a template's overhead once
+and reports how much text fits next to a given completion budget; plan_map_reduce
+uses that to pick the fewest calls for a transcript: one call when it fits
+(shrinking the completion budget down to a floor if that avoids splitting),
+otherwise the fewest, evenly sized chunks and the widest reduce fan-in the
+window allows.
+
+Token counts come from tiktoken (or a character estimate), not the model's own
+tokenizer, so a safety margin of the window is held back.
+"""
+import logging
+import math
+import re
+from typing import Optional
+
+from config import config
+from nlp.chunker import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Context lengths of the Groq models this app is configured with
+MODEL_CONTEXT_WINDOWS = {
+    "llama3-8b-8192": 8192,
+    "llama3-70b-8192": 8192,
+    "llama-3.1-8b-instant": 131072,
+    "llama-3.3-70b-versatile": 131072,
+    "mixtral-8x7b-32768": 32768,
+    "gemma2-9b-it": 8192,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+
+# Chat formatting tokens around one user message (role markers, separators)
+MESSAGE_OVERHEAD_TOKENS = 8
+# Tokens added per part when partial notes are joined for a reduce call
+PART_SEPARATOR_TOKENS = 4
+# Smallest completion budget worth sending
+MIN_OUTPUT_TOKENS = 256
+
+_FIELD = re.compile(r"\{[A-Za-z_]+\}")
+_WINDOW_SUFFIX = re.compile(r"-(\d{4,6})$")
+
+
+def context_window(model: Optional[str] = None) -> int:
+    """
+    Context length of ``model`` in tokens.
+
+    config.LLM_CONTEXT_WINDOW overrides the lookup when set. Unknown models
+    named like ``name-32768`` use that suffix, anything else the default.
+    """
+    if config.LLM_CONTEXT_WINDOW:
+        return config.LLM_CONTEXT_WINDOW
+    model = model or config.NOTES_MODEL
+    if model in MODEL_CONTEXT_WINDOWS:
+        return MODEL_CONTEXT_WINDOWS[model]
+    match = _WINDOW_SUFFIX.search(model)
+    if match:
+        return int(match.group(1))
+    logger.warning(f"Unknown context window for {model}; assuming {DEFAULT_CONTEXT_WINDOW}")
+    return DEFAULT_CONTEXT_WINDOW
+
+
+def prompt_overhead(template: str) -> int:
+    """Tokens a template adds around its inserted text (placeholders removed)."""
+    return count_tokens(_FIELD.sub("", template)) + MESSAGE_OVERHEAD_TOKENS
+
+
+class PromptBudget:
+    """
+    Input/output split of one model's context window for one prompt template.
+
+    Args:
+        template: Prompt template (``{field}`` placeholders are not counted)
+        output_tokens: Desired completion budget
+        model: Model name (default: config.NOTES_MODEL)
+        margin: Fraction of the window held back (default: config.LLM_CONTEXT_MARGIN)
+
+    Raises:
+        ValueError: If the template and completion budget don't fit the window
+    """
+
+    def __init__(self, template: str, output_tokens: int, model: Optional[str] = None,
+                 margin: Optional[float] = None):
+        self.model = model or config.NOTES_MODEL
+        self.context_window = context_window(self.model)
+        margin = config.LLM_CONTEXT_MARGIN if margin is None else margin
+        self.usable_tokens = int(self.context_window * (1 - margin))
+        self.overhead = prompt_overhead(template)
+        self.output_tokens = output_tokens
+        self.input_tokens = self.usable_tokens - self.overhead - output_tokens
+        if self.input_tokens <= 0:
+            raise ValueError(
+                f"Prompt overhead {self.overhead} + output {output_tokens} tokens "
+                f"exceed the {self.context_window}-token window of {self.model}"
+            )
+
+    def fits(self, text_tokens: int) -> bool:
+        return text_tokens <= self.input_tokens
+
+    def output_for(self, text_tokens: int, min_output: int = MIN_OUTPUT_TOKENS) -> Optional[int]:
+        """
+        Largest completion budget, up to output_tokens, that fits next to ``text_tokens``.
+
+        Returns:
+            Completion budget, or None if less than ``min_output`` would fit
+        """
+        room = min(self.output_tokens, self.usable_tokens - self.overhead - text_tokens)
+        return room if room >= min(min_output, self.output_tokens) else None
+
+
+class MapReducePlan:
+    """
+    How to summarize a text: in one call, or as map calls plus reduce calls.
+
+    Attributes:
+        single_call: Whether the text fits one prompt
+        output_tokens: Completion budget of the single or final call
+        chunk_tokens: Map chunk size (0 for a single call)
+        overlap: Tokens repeated between consecutive chunks
+        chunks: Expected number of map calls
+        fan_in: Partial notes merged per reduce call
+        reduce_calls: Expected reduce calls, including the final merge
+    """
+
+    def __init__(self, single_call: bool, output_tokens: int, chunk_tokens: int = 0,
+                 overlap: int = 0, chunks: int = 1, fan_in: int = 0, reduce_calls: int = 0):
+        self.single_call = single_call
+        self.output_tokens = output_tokens
+        self.chunk_tokens = chunk_tokens
+        self.overlap = overlap
+        self.chunks = chunks
+        self.fan_in = fan_in
+        self.reduce_calls = reduce_calls
+
+    @property
+    def calls(self) -> int:
+        return (1 if self.single_call else self.chunks) + self.reduce_calls
+
+    def __repr__(self) -> str:
+        if self.single_call:
+            return f"MapReducePlan(single_call, output_tokens={self.output_tokens})"
+        return (f"MapReducePlan(chunks={self.chunks}x{self.chunk_tokens}, fan_in={self.fan_in}, "
+                f"reduce_calls={self.reduce_calls}, output_tokens={self.output_tokens})")
+
+
+def reduce_calls(parts: int, fan_in: int) -> int:
+    """Reduce calls to merge ``parts`` partial notes ``fan_in`` at a time, final merge included."""
+    calls = 0
+    while parts > fan_in:
+        calls += parts // fan_in + (1 if parts % fan_in > 1 else 0)  # singletons pass through
+        parts = math.ceil(parts / fan_in)
+    return calls + (1 if parts > 1 else 0)
+
+
+def reduce_fan_in(reduce_prompt: str, output_tokens: int, model: Optional[str] = None,
+                  max_fan_in: int = 0) -> int:
+    """
+    Partial notes of ``output_tokens`` each that one reduce call can merge.
+
+    Raises:
+        ValueError: If fewer than two fit
+    """
+    reducer = PromptBudget(reduce_prompt, output_tokens, model)
+    fan_in = reducer.input_tokens // (output_tokens + PART_SEPARATOR_TOKENS)
+    if fan_in < 2:
+        raise ValueError(f"Reduce prompt can't merge two {output_tokens}-token notes on {reducer.model}")
+    if max_fan_in:
+        fan_in = max(2, min(fan_in, max_fan_in))
+    return fan_in
+
+def plan_map_reduce(
+    text_tokens: int,
+    prompt: str,
+    map_prompt: str,
+    reduce_prompt: str,
+    output_tokens: int,
+    overlap: int = 0,
+    model: Optional[str] = None,
+    max_single_tokens: int = 0,
+    max_chunk_tokens: int = 0,
+    max_fan_in: int = 0,
+) -> MapReducePlan:
+    """
+    Plan the fewest LLM calls that summarize ``text_tokens`` without overflowing the window.
+
+    Args:
+        text_tokens: Size of the text to summarize
+        prompt: Template for summarizing the whole text in one call
+        map_prompt: Template for summarizing one chunk
+        reduce_prompt: Template for merging partial notes
+        output_tokens: Desired completion budget per call
+        overlap: Tokens repeated between consecutive chunks
+        model: Model name (default: config.NOTES_MODEL)
+        max_single_tokens: Force map-reduce above this size (0: whatever fits)
+        max_chunk_tokens: Cap on the chunk size (0: whatever fits)
+        max_fan_in: Cap on the reduce fan-in (0: whatever fits)
+
+    Returns:
+        MapReducePlan
+
+    Raises:
+        ValueError: If a template and output_tokens don't fit the window
+    """
+    single = PromptBudget(prompt, output_tokens, model)
+    if not max_single_tokens or text_tokens <= max_single_tokens:
+        budget = single.output_for(text_tokens)
+        if budget is not None:
+            return MapReducePlan(True, budget)
+
+    mapper = PromptBudget(map_prompt, output_tokens, model)
+    chunk_limit = mapper.input_tokens
+    if max_chunk_tokens:
+        chunk_limit = min(chunk_limit, max_chunk_tokens)
+    overlap = min(overlap, chunk_limit // 4)
+    step = chunk_limit - overlap
+    chunks = max(1, math.ceil((text_tokens - overlap) / step))
+    # Even chunks, with a little slack for sentence-aligned cuts
+    chunk_tokens = min(chunk_limit, math.ceil((text_tokens - overlap) / chunks * 1.05) + overlap)
+
+    fan_in = reduce_fan_in(reduce_prompt, output_tokens, model, max_fan_in)
+    return MapReducePlan(False, output_tokens, chunk_tokens, overlap, chunks,
+                         fan_in, reduce_calls(chunks, fan_in))
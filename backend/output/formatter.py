@@ -2,7 +2,6 @@
 Content formatting module for converting generated content into various formats
 """
 from typing import Dict
-import markdown
 from datetime import datetime
 from utils.logger import logger
 
@@ -61,6 +60,8 @@ def format_as_html(content: Dict, theme: str = "light") -> str:
     Returns:
         HTML string
     """
+    import markdown  # only needed for HTML; keeps the parsers importable without it
+
     md_content = format_as_markdown(content)
     
     # Choose theme colors
@@ -1,6 +1,14 @@
 import os
+import gc
 import logging
 import subprocess
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+from config import config
+from audio.decode import load_pcm
+from audio.vad import detect_speech
 
 logger = logging.getLogger(__name__)
 
@@ -21,10 +29,21 @@ except ImportError:
     TORCH_AVAILABLE = False
     torch = None  # Explicitly set to None if not available
 
-# Global model instance - loaded once at module level for efficiency
-_global_model = None
+SAMPLE_RATE = 16000  # Whisper's input rate
+
+# Error from the most recent failed model load (surfaced to callers)
 _model_load_error = None
 
+# Approximate memory needed per model size (MB), per the Whisper README
+MODEL_MEMORY_MB = {
+    "tiny": 1000,
+    "base": 1000,
+    "small": 2000,
+    "medium": 5000,
+    "turbo": 6000,
+    "large": 10000,
+}
+
 
 def _check_ffmpeg():
     """Check if ffmpeg is installed and accessible."""
@@ -35,15 +54,18 @@ def _check_ffmpeg():
         return False
 
 
-def _load_global_model(model_name="tiny"):
+def _model_memory_mb(model_name: str) -> int:
+    """Estimate memory for a model name such as "base.en" or "large-v3"."""
+    base_name = model_name.split(".")[0].split("-")[0]
+    return MODEL_MEMORY_MB.get(base_name, MODEL_MEMORY_MB["base"])
+
+
+def _load_model(model_name):
     """
-    Load Whisper model once at startup.
-    Uses "tiny" model by default (minimal memory: ~390MB).
+    Load a Whisper model from disk.
+    Returns None (and records _model_load_error) if it can't be loaded.
     """
-    global _global_model, _model_load_error
-    
-    if _global_model is not None:
-        return _global_model
+    global _model_load_error
     
     if not WHISPER_AVAILABLE:
         _model_load_error = "Whisper module not installed. Install with: pip install openai-whisper"
@@ -65,21 +87,155 @@ def _load_global_model(model_name="tiny"):
                 device = "cpu"
         
         logger.info(f"Loading Whisper model '{model_name}' on device: {device}")
-        _global_model = whisper.load_model(model_name, device=device)
-        logger.info(f"✅ Whisper model loaded successfully on {device}")
-        return _global_model
+        model = whisper.load_model(model_name, device=device)
+        logger.info(f"✅ Whisper model '{model_name}' loaded successfully on {device}")
+        return model
     except Exception as e:
         _model_load_error = str(e)
         logger.exception(f"Failed to load Whisper model: {e}")
         return None
 
 
+class WhisperModelRegistry:
+    """
+    Keeps several Whisper models loaded at once.
+    
+    Models are reference counted while in use and the least recently used
+    idle model is unloaded when the estimated memory of all loaded models
+    would exceed ``memory_budget_mb``. A model in use is never unloaded, so
+    the budget may be exceeded temporarily while transcriptions run.
+    """
+
+    def __init__(self, memory_budget_mb: int):
+        self.memory_budget_mb = memory_budget_mb
+        self._models = OrderedDict()  # name -> model, least recently used first
+        self._refcounts = {}
+        self._loading = set()
+        self._cond = threading.Condition()
+
+    def acquire(self, model_name):
+        """
+        Get a model (loading it if needed) and pin it until release().
+        Returns None if the model can't be loaded.
+        """
+        with self._cond:
+            while model_name in self._loading:
+                self._cond.wait()
+            model = self._models.get(model_name)
+            if model is not None:
+                self._models.move_to_end(model_name)
+                self._refcounts[model_name] += 1
+                return model
+            self._evict_idle(reserve_mb=_model_memory_mb(model_name))
+            self._loading.add(model_name)
+
+        model = None
+        try:
+            model = _load_model(model_name)
+        finally:
+            with self._cond:
+                self._loading.discard(model_name)
+                if model is not None:
+                    self._models[model_name] = model
+                    self._refcounts[model_name] = 1
+                self._cond.notify_all()
+        return model
+
+    def release(self, model_name):
+        """Unpin a model acquired with acquire()."""
+        with self._cond:
+            if self._refcounts.get(model_name, 0) > 0:
+                self._refcounts[model_name] -= 1
+            self._evict_idle()
+
+    @contextmanager
+    def use(self, model_name):
+        """Context manager around acquire()/release()."""
+        model = self.acquire(model_name)
+        try:
+            yield model
+        finally:
+            if model is not None:
+                self.release(model_name)
+
+    def loaded_models(self):
+        with self._cond:
+            return list(self._models)
+
+    def _used_mb(self):
+        return sum(_model_memory_mb(name) for name in self._models)
+
+    def _evict_idle(self, reserve_mb=0):
+        """
+        Unload idle models, least recently used first, until within budget.
+        The most recently used model is kept unless room is needed for another.
+        """
+        candidates = list(self._models)
+        if not reserve_mb:
+            candidates = candidates[:-1]
+        evicted = False
+        for name in candidates:
+            if self._used_mb() + reserve_mb <= self.memory_budget_mb:
+                break
+            if self._refcounts.get(name, 0) > 0:
+                continue
+            logger.info(f"Unloading Whisper model '{name}' (memory budget {self.memory_budget_mb}MB)")
+            del self._models[name]
+            del self._refcounts[name]
+            evicted = True
+        if evicted:
+            gc.collect()
+            if TORCH_AVAILABLE and torch is not None and torch.cuda.is_available():
+                torch.cuda.empty_cache()
+
+
+_registry = WhisperModelRegistry(config.WHISPER_MODEL_MEMORY_MB)
+
+
+def compact_segments(segments, offset_seconds: float = 0.0):
+    """
+    Reduce Whisper segments to the fields we keep.
+    
+    Drops token ids, seek, temperature etc. and rounds floats so segments are
+    cheap to store, cache and send as JSON.
+    
+    Args:
+        segments: result["segments"] from model.transcribe()
+        offset_seconds: Added to start/end (for audio cut from a longer file)
+    
+    Returns:
+        List of {start, end, text, avg_logprob, no_speech_prob} dicts
+    """
+    return [
+        {
+            "start": round(segment["start"] + offset_seconds, 3),
+            "end": round(segment["end"] + offset_seconds, 3),
+            "text": segment["text"].strip(),
+            "avg_logprob": round(segment.get("avg_logprob", 0.0), 4),
+            "no_speech_prob": round(segment.get("no_speech_prob", 0.0), 4),
+        }
+        for segment in segments
+    ]
+
+
+def _load_global_model(model_name="tiny"):
+    """
+    Load a Whisper model into the shared registry (no-op if already loaded).
+    Uses "tiny" model by default (minimal memory).
+    """
+    model = _registry.acquire(model_name)
+    if model is not None:
+        _registry.release(model_name)
+    return model
+
+
 class AudioTranscriptionService:
     """
     Audio transcription service using OpenAI Whisper.
     Models: tiny (minimal), base (balanced), small/medium/large (higher accuracy)
     
-    Uses global model instance loaded once to avoid memory spikes.
+    Models come from a shared registry, so each size is loaded once and
+    several sizes can be used side by side.
     """
 
     def __init__(self, model_name="tiny"):
@@ -91,16 +247,17 @@ class AudioTranscriptionService:
                        Default: "tiny" (390MB) for faster startup
         """
         self.model_name = model_name
-        self.model = _load_global_model(model_name)
-        if self.model is None and _model_load_error:
-            raise RuntimeError(_model_load_error)
+        if _load_global_model(model_name) is None:
+            raise RuntimeError(_model_load_error or "Whisper model failed to load")
 
-    def transcribe_file(self, file_path: str) -> str:
+    def transcribe_file(self, file_path: str, language: str = "en", vad: bool = False) -> str:
         """
         Transcribe an audio file using Whisper.
         
         Args:
             file_path: Path to the audio file (mp3, wav, m4a, flac, etc.)
+            language: Spoken language passed to the decoder
+            vad: Skip silence with the energy VAD pre-pass
             
         Returns:
             Transcribed text (or error message if transcription fails)
@@ -112,15 +269,82 @@ class AudioTranscriptionService:
         if not os.path.exists(file_path):
             raise FileNotFoundError(f"Audio file not found: {file_path}")
         
-        if not self.model:
-            raise RuntimeError("Whisper model failed to load. Check logs for details.")
+        if vad:
+            segments = self.transcribe_segments(file_path, language=language, vad=True)
+            return " ".join(s["text"] for s in segments if s["text"])
+        
+        with _registry.use(self.model_name) as model:
+            if not model:
+                raise RuntimeError("Whisper model failed to load. Check logs for details.")
 
-        try:
-            logger.info(f"Transcribing: {file_path}")
-            result = self.model.transcribe(file_path, language="en")
-            transcript = result["text"].strip()
-            logger.info(f"✅ Transcription complete. Length: {len(transcript)} chars")
-            return transcript
-        except Exception as e:
-            logger.exception(f"Transcription failed for {file_path}")
-            raise RuntimeError(f"Transcription failed: {str(e)}")
+            try:
+                logger.info(f"Transcribing with '{self.model_name}': {file_path}")
+                result = model.transcribe(file_path, language=language)
+                transcript = result["text"].strip()
+                logger.info(f"✅ Transcription complete. Length: {len(transcript)} chars")
+                return transcript
+            except Exception as e:
+                logger.exception(f"Transcription failed for {file_path}")
+                raise RuntimeError(f"Transcription failed: {str(e)}")
+
+    def transcribe_segments(self, file_path: str, language: str = "en", vad: bool = False) -> list:
+        """
+        Transcribe an audio file and keep the timestamped segments.
+        
+        Args:
+            file_path: Path to the audio file (mp3, wav, m4a, flac, etc.)
+            language: Spoken language passed to the decoder
+            vad: Skip silence with the energy VAD pre-pass; segment times
+                 still refer to the original recording
+            
+        Returns:
+            List of {start, end, text, avg_logprob, no_speech_prob} dicts
+            (times in seconds), see compact_segments()
+            
+        Raises:
+            FileNotFoundError: If audio file doesn't exist
+            RuntimeError: If Whisper model not available
+        """
+        if not os.path.exists(file_path):
+            raise FileNotFoundError(f"Audio file not found: {file_path}")
+        
+        if vad:
+            samples = load_pcm(file_path, SAMPLE_RATE)
+            speech = detect_speech(samples, SAMPLE_RATE)
+            logger.info(
+                f"VAD kept {speech.speech_ratio:.0%} of {len(samples) / SAMPLE_RATE:.0f}s "
+                f"({len(speech.regions)} speech regions)"
+            )
+            if not speech.regions:
+                return []
+            result = self.transcribe_samples(speech.compact(samples), language=language)
+            segments = speech.remap_segments(compact_segments(result["segments"]))
+        else:
+            result = self.transcribe_samples(file_path, language=language)
+            segments = compact_segments(result["segments"])
+        logger.info(f"✅ Transcription complete. {len(segments)} segments")
+        return segments
+
+    def transcribe_samples(self, audio, language: str = "en") -> dict:
+        """
+        Transcribe already-decoded audio.
+        
+        Args:
+            audio: Mono float32 samples at 16 kHz (NumPy array), or a file path
+            language: Spoken language passed to the decoder
+            
+        Returns:
+            Whisper result dict with "text" and "segments"
+            
+        Raises:
+            RuntimeError: If Whisper model not available or decoding fails
+        """
+        with _registry.use(self.model_name) as model:
+            if not model:
+                raise RuntimeError("Whisper model failed to load. Check logs for details.")
+
+            try:
+                return model.transcribe(audio, language=language)
+            except Exception as e:
+                logger.exception("Transcription of audio samples failed")
+                raise RuntimeError(f"Transcription failed: {str(e)}")
@@ -0,0 +1,245 @@
+"""
+In-process job queue and result store for long-running audio processing.
+
+Jobs are executed by a fixed number of asyncio worker tasks pulling from a
+bounded queue. Finished jobs are kept in memory for ``ttl_seconds`` so clients
+can poll for status and fetch results, then evicted. Each job also keeps an
+append-only event log (progress, streamed notes, ...) that clients can follow
+live, e.g. over Server-Sent Events.
+"""
+import asyncio
+import logging
+import threading
+import time
+from typing import AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_PROCESSING = "processing"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+
+# Last event of every job's log
+TERMINAL_EVENTS = ("done", "error")
+
+
+class QueueFullError(RuntimeError):
+    """Raised when the job queue has no room for another job."""
+
+
+class Job:
+    """
+    State of a single processing job.
+    """
+
+    def __init__(self, job_id: str):
+        self.job_id = job_id
+        self.status = JOB_QUEUED
+        self.stage = "queued"
+        self.progress = 0.0
+        self.result: Optional[dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.finished_at: Optional[float] = None
+        self.events: List[dict] = []
+        self._new_event = asyncio.Event()
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (JOB_COMPLETED, JOB_FAILED)
+
+    def update(self, stage: str, progress: float):
+        """Record the current pipeline stage and progress (0.0 - 1.0)."""
+        self.stage = stage
+        self.progress = max(0.0, min(1.0, progress))
+        self.emit("status", {"stage": self.stage, "progress": round(self.progress, 3)})
+
+    def emit(self, event: str, data: dict):
+        """Append an event to the job's log and wake followers. Call from the event loop."""
+        self.events.append({"event": event, "data": data})
+        self._new_event.set()
+        self._new_event = asyncio.Event()
+
+    async def follow(self, start: int = 0, heartbeat: Optional[float] = None) -> AsyncIterator[Optional[dict]]:
+        """
+        Yield logged events from index ``start`` on, then new ones as they
+        arrive, ending after the terminal "done" or "error" event.
+
+        Args:
+            start: Index of the first event to replay
+            heartbeat: Yield None after this many idle seconds (keeps proxies open)
+        """
+        index = start
+        while True:
+            while index < len(self.events):
+                event = self.events[index]
+                index += 1
+                yield event
+                if event["event"] in TERMINAL_EVENTS:
+                    return
+            try:
+                await asyncio.wait_for(self._new_event.wait(), heartbeat)
+            except asyncio.TimeoutError:
+                yield None
+
+    def to_status(self) -> dict:
+        return {
+            "job_id": self.job_id,
+            "status": self.status,
+            "stage": self.stage,
+            "progress": round(self.progress, 3),
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobStore:
+    """
+    Thread-safe in-memory job registry with TTL eviction of finished jobs.
+    """
+
+    def __init__(self, ttl_seconds: int = 3600):
+        self.ttl_seconds = ttl_seconds
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def add(self, job: Job) -> Job:
+        with self._lock:
+            self._jobs[job.job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self.evict_expired()
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def remove(self, job_id: str):
+        with self._lock:
+            self._jobs.pop(job_id, None)
+
+    def evict_expired(self) -> int:
+        """Drop finished jobs older than the TTL. Returns number evicted."""
+        cutoff = time.time() - self.ttl_seconds
+        with self._lock:
+            expired = [
+                job_id for job_id, job in self._jobs.items()
+                if job.finished and job.finished_at is not None and job.finished_at < cutoff
+            ]
+            for job_id in expired:
+                del self._jobs[job_id]
+        if expired:
+            logger.info(f"Evicted {len(expired)} expired jobs")
+        return len(expired)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+
+JobHandler = Callable[[Job], Awaitable[dict]]
+
+
+class JobQueue:
+    """
+    Bounded queue drained by a fixed pool of asyncio worker tasks.
+
+    Handlers are async callables that receive the ``Job`` (to report progress)
+    and return the result dict stored on completion.
+    """
+
+    def __init__(self, store: JobStore, workers: int = 2, max_size: int = 16):
+        self.store = store
+        self.workers = max(1, workers)
+        self.max_size = max_size
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks = []
+        self._sweeper: Optional[asyncio.Task] = None
+
+    async def start(self):
+        """Start worker tasks. Must be called from the running event loop."""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.max_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i), name=f"job-worker-{i}")
+            for i in range(self.workers)
+        ]
+        self._sweeper = asyncio.create_task(self._sweep(), name="job-sweeper")
+        logger.info(f"Job queue started with {self.workers} workers (max queued: {self.max_size})")
+
+    async def stop(self):
+        """Cancel worker tasks. Jobs still queued are marked failed."""
+        for task in self._tasks + ([self._sweeper] if self._sweeper else []):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        if self._sweeper:
+            await asyncio.gather(self._sweeper, return_exceptions=True)
+        while self._queue is not None and not self._queue.empty():
+            job, _ = self._queue.get_nowait()
+            self._fail(job, "Server shutting down")
+        self._tasks = []
+        self._sweeper = None
+        logger.info("Job queue stopped")
+
+    def submit(self, job_id: str, handler: JobHandler) -> Job:
+        """
+        Enqueue a job.
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+            RuntimeError: If the queue has not been started
+        """
+        if self._queue is None:
+            raise RuntimeError("Job queue is not running")
+        job = Job(job_id)
+        try:
+            self._queue.put_nowait((job, handler))
+        except asyncio.QueueFull:
+            raise QueueFullError(f"Job queue is full ({self.max_size} jobs pending)")
+        self.store.add(job)
+        return job
+
+    @property
+    def depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def _worker(self, index: int):
+        while True:
+            job, handler = await self._queue.get()
+            try:
+                await self._run(job, handler)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, handler: JobHandler):
+        job.status = JOB_PROCESSING
+        job.update("starting", 0.0)
+        logger.info(f"Job {job.job_id} started")
+        try:
+            job.result = await handler(job)
+        except asyncio.CancelledError:
+            self._fail(job, "Job cancelled")
+            raise
+        except Exception as e:
+            logger.exception(f"Job {job.job_id} failed")
+            self._fail(job, str(e))
+            return
+        job.status = JOB_COMPLETED
+        job.update("done", 1.0)
+        job.finished_at = time.time()
+        job.emit("done", {"status": job.status})
+        logger.info(f"Job {job.job_id} completed")
+
+    def _fail(self, job: Job, error: str):
+        job.status = JOB_FAILED
+        job.error = error
+        job.finished_at = time.time()
+        job.emit("error", {"status": job.status, "error": error})
+
+    async def _sweep(self):
+        interval = max(1, min(self.store.ttl_seconds, 60))
+        while True:
+            await asyncio.sleep(interval)
+            self.store.evict_expired()
@@ -0,0 +1,164 @@
+"""
+Parallel transcription of long recordings.
+
+The audio is decoded once into a shared memory-mapped buffer, cut at
+silence near ``chunk_length_ms`` boundaries and the chunks are transcribed
+concurrently by the transcription pool, each worker mapping its slice of the
+buffer rather than receiving a copy. Segments are shifted onto the global
+timeline and words repeated in the overlap between neighbouring chunks are
+removed when stitching. With the pool's VAD option only speech regions are
+chunked and decoded. Stitched segments can be streamed to a callback in
+timeline order as soon as every earlier chunk has finished.
+"""
+import asyncio
+import logging
+import re
+import time
+from typing import Callable, List, Optional
+
+from audio.decode import SharedPCM, decode_to_shared
+from audio.segmentation import plan_chunks
+from audio.vad import detect_speech
+
+logger = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+MAX_OVERLAP_WORDS = 20  # longest word run that can be repeated at a chunk seam
+
+
+def _normalize_word(word: str) -> str:
+    return re.sub(r"[^\w']", "", word.lower())
+
+
+def _seam_overlap(prev_words: List[str], next_words: List[str], max_words: int) -> int:
+    """Length of the longest suffix of prev_words that is a prefix of next_words."""
+    prev_norm = [_normalize_word(w) for w in prev_words[-max_words:]]
+    next_norm = [_normalize_word(w) for w in next_words[:max_words]]
+    for k in range(min(len(prev_norm), len(next_norm)), 0, -1):
+        if prev_norm[-k:] == next_norm[:k]:
+            return k
+    return 0
+
+
+def _stitch_chunk(
+    merged: List[dict], segments: List[dict], cut_time: Optional[float], max_overlap_words: int
+) -> List[dict]:
+    """
+    Segments of one chunk to append after ``merged`` (the stitched earlier chunks).
+
+    Args:
+        cut_time: Where the chunk's own audio starts (None for the first chunk)
+    """
+    # Segments that end before the cut were already decoded by the previous chunk
+    segments = [dict(s) for s in segments if cut_time is None or s["end"] > cut_time]
+    if merged and segments:
+        prev_words = " ".join(s["text"] for s in merged[-3:]).split()
+        first_words = segments[0]["text"].split()
+        k = _seam_overlap(prev_words, first_words, max_overlap_words)
+        if k:
+            segments[0]["text"] = " ".join(first_words[k:])
+    return [s for s in segments if s["text"]]
+
+
+def stitch_segments(
+    chunk_segments: List[List[dict]], cut_times: List[float], max_overlap_words: int = MAX_OVERLAP_WORDS
+) -> List[dict]:
+    """
+    Merge per-chunk segments into one timeline.
+
+    Args:
+        chunk_segments: Segments of each chunk, already on the global timeline
+        cut_times: Time (s) where each chunk's own, non-overlapping audio starts
+        max_overlap_words: Longest word run that can be repeated at a seam
+
+    Returns:
+        Ordered list of segments
+    """
+    merged: List[dict] = []
+    for i, segments in enumerate(chunk_segments):
+        merged.extend(_stitch_chunk(merged, segments, cut_times[i] if i else None, max_overlap_words))
+    return merged
+
+
+async def transcribe_long_audio(
+    pool,
+    file_path: str,
+    chunk_length_ms: int = 30000,
+    overlap_ms: int = 1000,
+    min_duration_s: float = 0.0,
+    model_name: Optional[str] = None,
+    on_segments: Optional[Callable[[List[dict]], None]] = None,
+) -> dict:
+    """
+    Transcribe a file by splitting it into chunks processed in parallel.
+
+    Args:
+        pool: TranscriptionPool used to run the chunks
+        file_path: Audio file path
+        chunk_length_ms: Target chunk length (cut moved to nearby silence)
+        overlap_ms: Audio shared between neighbouring chunks
+        min_duration_s: Recordings shorter than this are sent as one chunk
+        model_name: Whisper model (defaults to the pool's model)
+        on_segments: Called (on the event loop) with each batch of stitched
+            segments, on the original timeline and in order, as chunks finish
+
+    Returns:
+        Dict with "text", "segments", "chunks", "duration" and "elapsed" (s)
+    """
+    started = time.perf_counter()
+    pcm = await asyncio.to_thread(decode_to_shared, file_path, SAMPLE_RATE)
+    duration = pcm.duration
+    try:
+        speech = None
+        if pool.vad:
+            # Chunk and decode only the speech; segment times are mapped back below
+            speech = await asyncio.to_thread(detect_speech, pcm.array(), SAMPLE_RATE)
+            logger.info(f"VAD kept {speech.speech_ratio:.0%} of {duration:.0f}s")
+            speech_pcm = await asyncio.to_thread(
+                SharedPCM.from_regions, pcm.array(), speech.regions, SAMPLE_RATE
+            )
+            pcm.remove()
+            pcm = speech_pcm
+
+        if pcm.num_samples == 0:
+            ranges = []
+        elif pcm.duration < min_duration_s:
+            ranges = [(0, pcm.num_samples)]
+        else:
+            ranges = plan_chunks(pcm.array(), SAMPLE_RATE, chunk_length_ms, overlap_ms)
+
+        cut_times = [None] + [end / SAMPLE_RATE for _, end in ranges[:-1]]
+        tasks = [
+            asyncio.ensure_future(pool.transcribe_shared(pcm, start, end, model_name))
+            for start, end in ranges
+        ]
+        # Stitch in timeline order as soon as all earlier chunks are done
+        segments: List[dict] = []
+        try:
+            for i, task in enumerate(tasks):
+                new_segments = _stitch_chunk(segments, await task, cut_times[i], MAX_OVERLAP_WORDS)
+                segments.extend(new_segments)
+                if on_segments is not None and new_segments:
+                    on_segments(speech.remap_segments(new_segments) if speech is not None else new_segments)
+        finally:
+            for task in tasks:
+                task.cancel()
+    finally:
+        pcm.remove()
+
+    if speech is not None:
+        segments = speech.remap_segments(segments)
+
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"Transcribed {duration:.0f}s of audio in {len(ranges)} chunks "
+        f"across {pool.workers} workers in {elapsed:.1f}s "
+        f"({duration / elapsed if elapsed else 0:.1f}x realtime)"
+    )
+    return {
+        "text": " ".join(s["text"] for s in segments),
+        "segments": segments,
+        "chunks": len(ranges),
+        "duration": duration,
+        "elapsed": elapsed,
+    }
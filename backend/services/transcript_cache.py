@@ -0,0 +1,54 @@
+"""
+Content-addressed transcript cache.
+
+Entries are keyed by the SHA-256 of the uploaded audio bytes combined with the
+Whisper model name and decode options, so re-uploading the same lecture
+returns the stored transcript without loading or decoding the audio.
+"""
+import hashlib
+import json
+import logging
+from typing import List, Optional
+
+from utils.disk_cache import DiskCache
+
+logger = logging.getLogger(__name__)
+
+
+def transcript_cache_key(audio_sha256: str, model_name: str, decode_options: dict) -> str:
+    """Build the cache key for an audio hash, model and decode options."""
+    payload = json.dumps(
+        {"audio": audio_sha256, "model": model_name, "options": decode_options},
+        sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class TranscriptCache:
+    """
+    Disk-backed LRU cache of Whisper transcripts and segments.
+    """
+
+    def __init__(self, directory: str, max_bytes: int):
+        self._cache = DiskCache(directory, max_bytes)
+
+    def get(self, key: str) -> Optional[dict]:
+        """Return ``{"transcript": str, "segments": list}`` or None on a miss."""
+        entry = self._cache.get(key)
+        if entry is not None:
+            logger.info(f"Transcript cache hit: {key[:12]}")
+        return entry
+
+    def put(self, key: str, transcript: str, segments: Optional[List[dict]] = None):
+        self._cache.put(key, {"transcript": transcript, "segments": segments or []})
+
+    def delete(self, key: str) -> bool:
+        return self._cache.delete(key)
+
+    def purge(self) -> int:
+        count = self._cache.purge()
+        logger.info(f"Purged {count} transcript cache entries")
+        return count
+
+    def stats(self) -> dict:
+        return self._cache.stats()
@@ -0,0 +1,178 @@
+"""
+Process pool for running Whisper transcription off the event loop.
+
+Each worker process loads the Whisper model once (through
+``_load_global_model``) in its initializer and reuses it for every file it
+is handed. Callers await results without blocking the asyncio event loop.
+"""
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Per-worker-process state, set by _init_worker
+_worker_model_name = None
+_worker_init_error = None
+
+
+def _init_worker(model_name: str):
+    """Load the Whisper model once when a worker process starts."""
+    global _worker_model_name, _worker_init_error
+    from services import audio_service
+
+    _worker_model_name = model_name
+    if audio_service._load_global_model(model_name) is None:
+        _worker_init_error = audio_service._model_load_error or "Whisper model failed to load"
+
+
+def _transcribe_in_worker(file_path: str, model_name: Optional[str], decode_options: dict) -> str:
+    """Runs inside a worker process."""
+    from services.audio_service import AudioTranscriptionService
+
+    if _worker_init_error:
+        raise RuntimeError(_worker_init_error)
+    service = AudioTranscriptionService(model_name or _worker_model_name)
+    return service.transcribe_file(file_path, **decode_options)
+
+
+def _transcribe_segments_in_worker(file_path: str, model_name: Optional[str], decode_options: dict) -> List[dict]:
+    """Runs inside a worker process."""
+    from services.audio_service import AudioTranscriptionService
+
+    if _worker_init_error:
+        raise RuntimeError(_worker_init_error)
+    service = AudioTranscriptionService(model_name or _worker_model_name)
+    return service.transcribe_segments(file_path, **decode_options)
+
+
+def _transcribe_samples_in_worker(
+    samples, offset_seconds: float, model_name: Optional[str], decode_options: dict
+) -> List[dict]:
+    """Runs inside a worker process. Returns segments on the global timeline."""
+    from services.audio_service import AudioTranscriptionService, compact_segments
+
+    if _worker_init_error:
+        raise RuntimeError(_worker_init_error)
+    service = AudioTranscriptionService(model_name or _worker_model_name)
+    result = service.transcribe_samples(samples, language=decode_options["language"])
+    return compact_segments(result["segments"], offset_seconds)
+
+
+def _transcribe_shared_in_worker(
+    pcm, start: int, end: int, model_name: Optional[str], decode_options: dict
+) -> List[dict]:
+    """Runs inside a worker process. Maps its slice of a SharedPCM buffer (no copy, no decode)."""
+    return _transcribe_samples_in_worker(
+        pcm.slice(start, end), start / pcm.sample_rate, model_name, decode_options
+    )
+
+
+class TranscriptionPool:
+    """
+    Dispatches transcription to a pool of worker processes.
+
+    Args:
+        workers: Number of worker processes (each holds its own model copy)
+        model_name: Whisper model loaded by every worker at startup
+        language: Spoken language passed to the decoder
+        vad: Skip silence with the energy VAD pre-pass before decoding
+    """
+
+    def __init__(self, workers: int = 1, model_name: str = "tiny", language: str = "en", vad: bool = False):
+        self.workers = max(1, workers)
+        self.model_name = model_name
+        self.language = language
+        self.vad = vad
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def start(self):
+        if self._executor is not None:
+            return
+        # "spawn" avoids forking a parent that may already hold torch/CUDA state
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.model_name,),
+        )
+        logger.info(f"Transcription pool started ({self.workers} workers, model '{self.model_name}')")
+
+    @property
+    def decode_options(self) -> dict:
+        """Options that affect the transcript (used e.g. for cache keys)."""
+        return {"language": self.language, "vad": self.vad}
+
+    async def transcribe(self, file_path: str, model_name: Optional[str] = None) -> str:
+        """Transcribe a file in a worker process without blocking the event loop."""
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, _transcribe_in_worker, file_path, model_name, self.decode_options
+        )
+
+    async def transcribe_segments(self, file_path: str, model_name: Optional[str] = None) -> List[dict]:
+        """
+        Transcribe a file in a worker process, keeping timestamped segments.
+
+        Returns:
+            List of {start, end, text, avg_logprob, no_speech_prob} segments
+        """
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, _transcribe_segments_in_worker, file_path, model_name, self.decode_options
+        )
+
+    async def transcribe_samples(
+        self, samples, offset_seconds: float = 0.0, model_name: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Transcribe decoded audio in a worker process. Callers handle VAD.
+
+        Returns:
+            List of segments (see transcribe_segments) shifted by ``offset_seconds``
+        """
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, _transcribe_samples_in_worker,
+            samples, offset_seconds, model_name, self.decode_options
+        )
+
+    async def transcribe_shared(
+        self, pcm, start: int, end: int, model_name: Optional[str] = None
+    ) -> List[dict]:
+        """
+        Transcribe samples [start, end) of a SharedPCM buffer in a worker process.
+
+        Only the buffer handle crosses the process boundary; the worker maps
+        the samples itself. Callers handle VAD.
+
+        Returns:
+            List of segments on the buffer's timeline
+        """
+        if self._executor is None:
+            self.start()
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, _transcribe_shared_in_worker,
+            pcm, start, end, model_name, self.decode_options
+        )
+
+    def shutdown(self, wait: bool = True):
+        """
+        Stop accepting work, cancel queued transcriptions and (optionally) wait
+        for running ones to finish.
+        """
+        if self._executor is None:
+            return
+        logger.info("Draining transcription pool...")
+        self._executor.shutdown(wait=wait, cancel_futures=True)
+        self._executor = None
+        logger.info("Transcription pool stopped")
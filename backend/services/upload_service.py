@@ -0,0 +1,254 @@
+"""
+Streaming multipart upload handling with early size and format checks.
+
+The request body is parsed incrementally and the audio part is written to a
+temp file as it arrives, so memory use stays bounded by the network chunk
+size. Uploads are rejected as soon as they exceed the size limit, and the
+container format is checked from the magic bytes of the first chunk. The
+SHA-256 of the audio bytes is computed on the fly for content addressing.
+Once saved, the duration is read from the container headers so overlong
+recordings are rejected before anything is decoded.
+"""
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+from typing import Iterable, Optional
+
+from fastapi import Request
+
+try:
+    import python_multipart as multipart
+    from python_multipart.multipart import parse_options_header
+except ModuleNotFoundError:  # python-multipart < 0.0.13
+    import multipart
+    from multipart.multipart import parse_options_header
+
+from audio.formats import SNIFF_BYTES, detect_audio_format
+from audio.probe import AudioProbeError, probe_audio
+
+logger = logging.getLogger(__name__)
+
+# Allowance for multipart boundaries, part headers and small form fields
+MULTIPART_OVERHEAD_BYTES = 64 * 1024
+
+
+class UploadError(Exception):
+    """Base class for rejected uploads. ``status_code`` maps to the HTTP response."""
+    status_code = 400
+
+
+class UploadTooLargeError(UploadError):
+    status_code = 413
+
+
+class UnsupportedAudioFormatError(UploadError):
+    status_code = 415
+
+
+class AudioTooLongError(UploadError):
+    status_code = 413
+
+
+class SavedUpload:
+    """
+    An upload that has been written to a temp file.
+    """
+
+    def __init__(
+        self, path: str, filename: Optional[str], size: int, audio_format: str, sha256: str,
+        duration: Optional[float] = None,
+    ):
+        self.path = path
+        self.filename = filename
+        self.size = size
+        self.audio_format = audio_format
+        self.sha256 = sha256
+        self.duration = duration
+
+    def remove(self):
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class _AudioPartWriter:
+    """
+    python-multipart callbacks that copy one file field to disk.
+    """
+
+    def __init__(self, field_name: str, max_bytes: int, allowed_formats: Iterable[str]):
+        self.field_name = field_name
+        self.max_bytes = max_bytes
+        self.allowed_formats = set(allowed_formats)
+        self.filename = None
+        self.path = None
+        self.size = 0
+        self.audio_format = None
+        self.found = False
+        self.sha256 = hashlib.sha256()
+        self._file = None
+        self._in_target = False
+        self._buffer = bytearray()
+        self._header_name = b""
+        self._header_value = b""
+        self._disposition = b""
+
+    # -- python-multipart callbacks -------------------------------------
+
+    def on_part_begin(self):
+        self._disposition = b""
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_name += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        if self._header_name.lower() == b"content-disposition":
+            self._disposition = self._header_value
+        self._header_name = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._disposition)
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        self._in_target = name == self.field_name and b"filename" in options and not self.found
+        if self._in_target:
+            self.found = True
+            self.filename = options[b"filename"].decode("utf-8", "replace")
+            self._file = tempfile.NamedTemporaryFile(delete=False, suffix=".tmp")
+            self.path = self._file.name
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if not self._in_target:
+            return
+        self.size += end - start
+        if self.size > self.max_bytes:
+            raise UploadTooLargeError(
+                f"File too large (max: {self.max_bytes / (1024 * 1024):.0f}MB)"
+            )
+        self._buffer += data[start:end]
+
+    def on_part_end(self):
+        if self._in_target:
+            self.flush(final=True)
+            self._file.close()
+            self._in_target = False
+
+    # -------------------------------------------------------------------
+
+    def flush(self, final: bool = False):
+        """Write buffered bytes to disk, sniffing the format on the first write."""
+        if not self._in_target or not self._buffer:
+            return
+        if self.audio_format is None:
+            if len(self._buffer) < SNIFF_BYTES and not final:
+                return
+            self.audio_format = detect_audio_format(bytes(self._buffer[:SNIFF_BYTES]))
+            if self.audio_format not in self.allowed_formats:
+                raise UnsupportedAudioFormatError(
+                    f"Unsupported audio format. Allowed: {', '.join(sorted(self.allowed_formats))}"
+                )
+        self._file.write(self._buffer)
+        self.sha256.update(self._buffer)
+        self._buffer.clear()
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+async def stream_audio_upload(
+    request: Request,
+    max_bytes: int,
+    allowed_formats: Iterable[str],
+    field_name: str = "file",
+    max_duration_s: Optional[float] = None,
+) -> SavedUpload:
+    """
+    Stream a multipart audio upload to a temp file.
+
+    Args:
+        request: Incoming multipart/form-data request
+        max_bytes: Maximum size of the audio part
+        allowed_formats: Allowed extensions, e.g. Config.ALLOWED_AUDIO_FORMATS
+        field_name: Form field carrying the file
+        max_duration_s: Maximum recording length, checked from the headers
+
+    Returns:
+        SavedUpload describing the temp file (caller owns and must remove it)
+
+    Raises:
+        UploadError: Malformed, empty, too large, too long or unsupported upload
+    """
+    content_type, params = parse_options_header(request.headers.get("content-type", ""))
+    if content_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError("Expected a multipart/form-data upload")
+
+    content_length = request.headers.get("content-length")
+    if content_length and content_length.isdigit() \
+            and int(content_length) > max_bytes + MULTIPART_OVERHEAD_BYTES:
+        raise UploadTooLargeError(
+            f"File too large (max: {max_bytes / (1024 * 1024):.0f}MB)"
+        )
+
+    writer = _AudioPartWriter(field_name, max_bytes, allowed_formats)
+    parser = multipart.MultipartParser(params[b"boundary"], {
+        "on_part_begin": writer.on_part_begin,
+        "on_part_data": writer.on_part_data,
+        "on_part_end": writer.on_part_end,
+        "on_header_field": writer.on_header_field,
+        "on_header_value": writer.on_header_value,
+        "on_header_end": writer.on_header_end,
+        "on_headers_finished": writer.on_headers_finished,
+    })
+
+    received = 0
+    try:
+        async for chunk in request.stream():
+            received += len(chunk)
+            if received > max_bytes + MULTIPART_OVERHEAD_BYTES:
+                raise UploadTooLargeError(
+                    f"File too large (max: {max_bytes / (1024 * 1024):.0f}MB)"
+                )
+            parser.write(chunk)
+            writer.flush()
+        parser.finalize()
+    except UploadError:
+        writer.discard()
+        raise
+    except Exception as e:
+        writer.discard()
+        raise UploadError(f"Malformed upload: {str(e)}")
+
+    if not writer.found:
+        writer.discard()
+        raise UploadError(f"Missing file field '{field_name}'")
+    if writer.size == 0:
+        writer.discard()
+        raise UploadError("Empty file uploaded")
+
+    # Header-only probe: milliseconds even for multi-hour recordings
+    duration = None
+    try:
+        duration = (await asyncio.to_thread(probe_audio, writer.path))["duration_seconds"]
+    except AudioProbeError as e:
+        if max_duration_s:
+            # Without a duration the limit can't be enforced: fail closed
+            writer.discard()
+            raise UnsupportedAudioFormatError(f"Unreadable audio headers: {e}")
+        logger.warning(f"Could not probe {writer.filename}: {e}")
+    if max_duration_s and duration > max_duration_s:
+        writer.discard()
+        raise AudioTooLongError(
+            f"Audio too long: {duration / 60:.0f} min (max: {max_duration_s / 60:.0f} min)"
+        )
+
+    return SavedUpload(
+        writer.path, writer.filename, writer.size, writer.audio_format, writer.sha256.hexdigest(),
+        duration
+    )
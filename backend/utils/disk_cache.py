@@ -0,0 +1,136 @@
+"""
+Size-bounded on-disk LRU cache of JSON documents, with optional expiry
+"""
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+from utils.logger import logger
+
+
+class DiskCache:
+    """
+    Stores one JSON file per key in ``directory``.
+
+    Recency is tracked in memory (seeded from file mtimes on startup) and the
+    least recently used entries are deleted once the total size exceeds
+    ``max_bytes``. With ``ttl_seconds`` each value is stored with its write
+    time and entries older than the TTL are dropped when next read (file
+    mtimes can't be used for this since reads touch them). Safe for use from
+    multiple threads of one process.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, ttl_seconds: Optional[float] = None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self._lock = threading.Lock()
+        self._index: "OrderedDict[str, int]" = OrderedDict()  # key -> size, LRU first
+        self._total_bytes = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load_index()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def _load_index(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".json"):
+                continue
+            try:
+                stat = os.stat(os.path.join(self.directory, name))
+            except OSError:
+                continue
+            entries.append((stat.st_mtime, name[:-5], stat.st_size))
+        for _, key, size in sorted(entries):
+            self._index[key] = size
+            self._total_bytes += size
+        logger.info(f"Disk cache {self.directory}: {len(self._index)} entries, {self._total_bytes} bytes")
+
+    def get(self, key: str) -> Optional[Any]:
+        """Return the cached value or None, marking the entry as recently used."""
+        path = self._path(key)
+        with self._lock:
+            if key not in self._index:
+                self.misses += 1
+                return None
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    value = json.load(f)
+                if self.ttl_seconds is not None:
+                    if time.time() - value["stored_at"] > self.ttl_seconds:
+                        self._drop(key)
+                        self.expired += 1
+                        self.misses += 1
+                        return None
+                    value = value["value"]
+                os.utime(path)
+            except (OSError, ValueError, KeyError, TypeError) as e:
+                logger.warning(f"Dropping unreadable cache entry {key}: {e}")
+                self._drop(key)
+                self.misses += 1
+                return None
+            self._index.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: str, value: Any):
+        """Store a JSON-serialisable value, evicting LRU entries if over budget."""
+        if self.ttl_seconds is not None:
+            value = {"stored_at": time.time(), "value": value}
+        data = json.dumps(value, separators=(",", ":")).encode("utf-8")
+        if len(data) > self.max_bytes:
+            logger.warning(f"Cache entry {key} ({len(data)} bytes) exceeds cache size, not stored")
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            os.replace(tmp_path, path)
+            self._total_bytes += len(data) - self._index.pop(key, 0)
+            self._index[key] = len(data)
+            while self._total_bytes > self.max_bytes and self._index:
+                oldest = next(iter(self._index))
+                self._drop(oldest)
+
+    def delete(self, key: str) -> bool:
+        with self._lock:
+            if key not in self._index:
+                return False
+            self._drop(key)
+            return True
+
+    def purge(self) -> int:
+        """Delete every entry. Returns the number removed."""
+        with self._lock:
+            count = len(self._index)
+            for key in list(self._index):
+                self._drop(key)
+            return count
+
+    def _drop(self, key: str):
+        self._total_bytes -= self._index.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "size_bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "expired": self.expired,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            }
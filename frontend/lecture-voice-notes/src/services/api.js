@@ -1,6 +1,9 @@
 import axios from "axios";
 
 const BASE_URL = "http://127.0.0.1:8000";
+const POLL_INTERVAL_MS = 2000;
+
+const sleep = (ms) => new Promise((resolve) => setTimeout(resolve, ms));
 
 export async function uploadAudio(file) {
   const formData = new FormData();
@@ -12,5 +15,16 @@ export async function uploadAudio(file) {
     },
   });
 
-  return response.data;
+  return waitForResult(response.data.job_id);
+}
+
+export async function waitForResult(jobId) {
+  // /api/process only queues the job; poll until the result is ready
+  for (;;) {
+    const response = await axios.get(`${BASE_URL}/api/jobs/${jobId}/result`);
+    if (response.status === 200) {
+      return response.data;
+    }
+    await sleep(POLL_INTERVAL_MS);
+  }
 }
@@ -5,6 +5,7 @@ Tests: Backend API, Whisper transcription, Streamlit connection
 """
 import requests
 import json
+import time
 from pathlib import Path
 
 API_BASE = "http://127.0.0.1:8000"
@@ -46,6 +47,16 @@ def test_upload_audio():
                 timeout=60
             )
         
+        if response.status_code == 202:
+            job_id = response.json()["job_id"]
+            print(f"   Job queued: {job_id}")
+            deadline = time.time() + 600
+            while time.time() < deadline:
+                response = requests.get(f"{API_BASE}/api/jobs/{job_id}/result", timeout=10)
+                if response.status_code != 202:
+                    break
+                time.sleep(2)
+
         if response.status_code == 200:
             data = response.json()
             transcript = data.get("transcript", "")[:100]